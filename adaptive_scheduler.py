@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Adaptive-concurrency runner for per-item database work.
+
+Items are processed by a small pool of worker threads, each holding its own
+pooled connection (see medusa_db). Instead of fixed batches with sleeps in
+between, the number of items allowed in flight follows AIMD: it grows while
+per-item latency stays under the target, and is cut back when latency
+overshoots or an item runs into a lock wait (lock_timeout) or deadlock. Items
+that hit a lock are retried. Each session also carries a short lock_timeout,
+so a bulk job backs off instead of queueing behind the storefront's own
+transactions.
+
+No more workers run than the connection pool holds (DB_POOL_SIZE). A worker
+whose connection cannot be opened, or breaks, stops; once no worker is left
+the remaining items are reported as failed with that error rather than
+left waiting.
+"""
+import queue
+import threading
+import time
+
+import psycopg2.errors
+
+import medusa_db
+
+LOCK_ERRORS = (
+    psycopg2.errors.LockNotAvailable,
+    psycopg2.errors.DeadlockDetected,
+    psycopg2.errors.SerializationFailure,
+)
+
+_DONE = object()
+
+
+class AdaptiveScheduler:
+    """Run task(conn, item) for many items with latency-driven concurrency"""
+
+    def __init__(self, max_workers=4, target_latency=1.0, lock_timeout_ms=2000, max_retries=3,
+                 database='medusa'):
+        self.max_workers = max_workers
+        self.target_latency = target_latency
+        self.lock_timeout_ms = lock_timeout_ms
+        self.max_retries = max_retries
+        self.database = database
+
+        self.workers = max_workers
+        self.limit = 1.0
+        self.peak = 0
+        self.lock_waits = 0
+        self.retries = 0
+        self.latency = medusa_db.LatencyHistogram()
+        self.elapsed = 0.0
+
+        self._active = 0
+        self._live = 0
+        self._since_decrease = 0
+        self._gate = threading.Condition()
+        self._report_lock = threading.Lock()
+
+    def _acquire(self):
+        with self._gate:
+            while self._active >= max(1, int(self.limit)):
+                self._gate.wait()
+            self._active += 1
+            self.peak = max(self.peak, self._active)
+
+    def _release(self, seconds, lock_wait):
+        with self._gate:
+            self._active -= 1
+            self._since_decrease += 1
+            if lock_wait or seconds > self.target_latency:
+                # Decrease at most once per window, or one slow burst collapses the limit
+                if self._since_decrease >= self.limit:
+                    self.limit = max(1.0, self.limit / 2)
+                    self._since_decrease = 0
+            else:
+                self.limit = min(float(self.workers), self.limit + 1 / self.limit)
+            self._gate.notify_all()
+
+    def _record(self, item, result, error, on_result, results, seconds=None):
+        with self._gate:
+            if seconds is not None:
+                self.latency.record(seconds)
+            results.append((item, result, error))
+        if on_result:
+            with self._report_lock:
+                on_result(item, result, error)
+
+    def _worker(self, task, work, on_result, results):
+        try:
+            conn = medusa_db.connect(self.database)
+        except Exception as e:
+            self._retire(e, work, on_result, results)
+            return
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SET lock_timeout = %s", (self.lock_timeout_ms,))
+            conn.commit()
+
+            while True:
+                entry = work.get()
+                try:
+                    if entry is _DONE:
+                        return
+                    self._process(task, conn, entry, work, on_result, results)
+                finally:
+                    work.task_done()
+        except Exception as e:
+            self._retire(e, work, on_result, results)
+        finally:
+            try:
+                if not conn.closed:
+                    with conn.cursor() as cursor:
+                        cursor.execute("RESET lock_timeout")
+                    conn.commit()
+            except psycopg2.Error:
+                pass  # release() discards a connection it cannot reset
+            medusa_db.release(conn)
+
+    def _process(self, task, conn, entry, work, on_result, results):
+        """Run one item; raises only when the connection can no longer be used"""
+        item, attempt = entry
+        self._acquire()
+        start = time.perf_counter()
+        result, error, lock_wait = None, None, False
+        try:
+            try:
+                result = task(conn, item)
+            except LOCK_ERRORS as e:
+                lock_wait, error = True, e
+                conn.rollback()
+            except Exception as e:
+                error = e
+                conn.rollback()
+        except psycopg2.Error:
+            # The rollback failed: the connection is gone. Report the item's
+            # own error, then let this worker stop.
+            self._record(item, result, error, on_result, results)
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            self._release(seconds, lock_wait)
+
+        if lock_wait:
+            with self._gate:
+                self.lock_waits += 1
+            if attempt < self.max_retries:
+                with self._gate:
+                    self.retries += 1
+                work.put((item, attempt + 1))
+                return
+
+        self._record(item, result, error, on_result, results, seconds)
+
+    def _retire(self, error, work, on_result, results):
+        """Stop a worker; the last one to stop fails whatever is still queued"""
+        with self._gate:
+            self._live -= 1
+            last = self._live == 0
+        if not last:
+            return
+        while True:
+            try:
+                entry = work.get_nowait()
+            except queue.Empty:
+                return
+            if entry is not _DONE:
+                self._record(entry[0], None, error, on_result, results)
+            work.task_done()
+
+    def run(self, task, items, on_result=None):
+        """Process every item; return [(item, result, error)] in completion order
+
+        task(conn, item) owns its transaction and should commit. On error the
+        connection is rolled back; lock waits are retried up to max_retries.
+        on_result(item, result, error) is called as each item finishes, one call
+        at a time.
+        """
+        work = queue.Queue()
+        for item in items:
+            work.put((item, 0))
+
+        # Every worker holds a pooled connection for the whole run
+        self.workers = max(1, min(self.max_workers, medusa_db.get_pool(self.database).maxconn))
+        self._live = self.workers
+
+        results = []
+        start = time.perf_counter()
+        workers = [threading.Thread(target=self._worker, args=(task, work, on_result, results), daemon=True)
+                   for _ in range(self.workers)]
+        for worker in workers:
+            worker.start()
+        work.join()
+        for _ in workers:
+            work.put(_DONE)
+        for worker in workers:
+            worker.join()
+        self.elapsed = time.perf_counter() - start
+        return results
+
+    def report(self):
+        """Throughput and latency summary lines"""
+        count = self.latency.count
+        rate = count / self.elapsed if self.elapsed else 0.0
+        return [
+            f"Items: {count} in {self.elapsed:.1f}s ({rate:.1f}/s)",
+            f"Latency per item: p50 {self.latency.percentile(50) * 1000:.0f} ms, "
+            f"p95 {self.latency.percentile(95) * 1000:.0f} ms",
+            f"Concurrency: peak {self.peak} of {self.workers}"
+            + (f" (pool-limited from {self.max_workers})" if self.workers < self.max_workers else "")
+            + f", final limit {self.limit:.1f}",
+            f"Lock waits: {self.lock_waits} ({self.retries} retried)",
+        ]
@@ -1,18 +1,18 @@
 #!/usr/bin/env python3
-import psycopg2
-import json
+import medusa_db
 
-# Database connection
-conn = psycopg2.connect(
-    host="centerbeam.proxy.rlwy.net",
-    port=20197,
-    user="postgres",
-    password="MvLLUHcwsDWjPCiWciFTYjQxAlwpxPds",
-    database="railway"
-)
+from product_categories import metadata_coverage, refresh_categories
+from product_metadata import NOT_FOUND, SKIPPED, UPDATED, merge_metadata
+from product_resolver import ProductIndex, describe_miss
+
+# Database connection (settings come from DATABASE_URL)
+conn = medusa_db.connect()
 conn.autocommit = False
 cursor = conn.cursor()
 
+# Metadata keys whose coverage is reported across every suit and tuxedo
+SEO_KEYS = ['color', 'material', 'occasion', 'fit', 'style']
+
 # Define products and their colors, materials, and other SEO metadata
 products_metadata = {
     # Regular Suits
@@ -450,63 +450,45 @@ success_count = 0
 skip_count = 0
 error_count = 0
 
-for product_title, new_metadata in products_metadata.items():
-    try:
-        # Get current product metadata
-        cursor.execute("""
-            SELECT id, metadata
-            FROM product
-            WHERE title = %s AND deleted_at IS NULL
-        """, (product_title,))
-        
-        result = cursor.fetchone()
-        if not result:
-            print(f"❌ Product not found: {product_title}")
-            error_count += 1
-            continue
-        
-        product_id, current_metadata = result
-        
-        # Parse existing metadata or create new
-        if current_metadata:
-            if isinstance(current_metadata, str):
-                try:
-                    existing_meta = json.loads(current_metadata)
-                except:
-                    existing_meta = {}
-            else:
-                existing_meta = dict(current_metadata) if current_metadata else {}
-        else:
-            existing_meta = {}
-        
-        # Check if color already exists
-        if 'color' in existing_meta and existing_meta['color']:
-            print(f"⏭️  Skipping {product_title} - already has color: {existing_meta['color']}")
-            skip_count += 1
-            continue
-        
-        # Merge new metadata with existing
-        updated_metadata = {**existing_meta, **new_metadata}
-        
-        # Update product metadata
-        cursor.execute("""
-            UPDATE product
-            SET metadata = %s::jsonb, updated_at = NOW()
-            WHERE id = %s
-        """, (json.dumps(updated_metadata), product_id))
-        
+# Resolve the titles in memory first, so near-miss titles (case, spacing)
+# still get tagged and real misses come with suggestions
+resolutions = ProductIndex.load(cursor).resolve_all(products_metadata)
+by_stored_title = {r.product.title: products_metadata[title] for title, r in resolutions.items() if r.product}
+
+for resolution in resolutions.values():
+    if not resolution.product:
+        print(f"❌ Product not found: {resolution.query} - {describe_miss(resolution)}")
+        error_count += 1
+
+# Every title is merged server-side in one statement; products that already
+# have a color keep their metadata as-is
+try:
+    outcomes = merge_metadata(cursor, by_stored_title, skip_if_present='color')
+    conn.commit()
+except Exception as e:
+    # Nothing was written, so report every resolved product as failed rather
+    # than pretending the earlier ones went through (misses are already counted)
+    conn.rollback()
+    print(f"❌ Metadata merge failed, no products updated: {str(e)}")
+    outcomes = []
+    error_count += len(by_stored_title)
+
+for outcome in outcomes:
+    product_title = outcome.title
+    if outcome.status == UPDATED:
+        new_metadata = by_stored_title[product_title]
         print(f"✅ Updated: {product_title}")
         print(f"   Added: color={new_metadata.get('color')}, material={new_metadata.get('material', 'N/A')}")
         success_count += 1
-        
-    except Exception as e:
-        print(f"❌ Error updating {product_title}: {str(e)}")
+    elif outcome.status == SKIPPED:
+        print(f"⏭️  Skipping {product_title} - already has color: {outcome.existing}")
+        skip_count += 1
+    elif outcome.status == NOT_FOUND:
+        print(f"❌ Product not found: {product_title}")
+        error_count += 1
+    else:
+        print(f"❌ Invalid metadata for {product_title}")
         error_count += 1
-        conn.rollback()
-        continue
-
-# Commit all changes
-conn.commit()
 
 print("\n" + "=" * 60)
 print("SUMMARY")
@@ -520,34 +502,15 @@ print("\n" + "=" * 60)
 print("VERIFICATION")
 print("=" * 60)
 
-cursor.execute("""
-    SELECT 
-        COUNT(*) as total,
-        COUNT(CASE WHEN metadata::text LIKE '%"color"%' THEN 1 END) as has_color,
-        COUNT(CASE WHEN metadata::text LIKE '%"material"%' THEN 1 END) as has_material,
-        COUNT(CASE WHEN metadata::text LIKE '%"occasion"%' THEN 1 END) as has_occasion,
-        COUNT(CASE WHEN metadata::text LIKE '%"fit"%' THEN 1 END) as has_fit,
-        COUNT(CASE WHEN metadata::text LIKE '%"style"%' THEN 1 END) as has_style
-    FROM product
-    WHERE (title LIKE '%Suit%' OR title LIKE '%Tuxedo%' 
-           OR title IN ('Burnt Orange', 'Dark Teal', 'Estate Blue', 'Light Grey', 
-                       'Mint', 'Pink', 'Brown Gold Buttons', 'Black Strip Shawl Lapel', 
-                       'Fall Rust', 'Brick Fall Suit'))
-    AND deleted_at IS NULL
-""")
-
-result = cursor.fetchone()
-if result:
-    total, has_color, has_material, has_occasion, has_fit, has_style = result
-    print(f"Total suit/tuxedo products: {total}")
-    print(f"Has color metadata: {has_color} ({has_color*100//total if total > 0 else 0}%)")
-    print(f"Has material metadata: {has_material} ({has_material*100//total if total > 0 else 0}%)")
-    print(f"Has occasion metadata: {has_occasion} ({has_occasion*100//total if total > 0 else 0}%)")
-    print(f"Has fit metadata: {has_fit} ({has_fit*100//total if total > 0 else 0}%)")
-    print(f"Has style metadata: {has_style} ({has_style*100//total if total > 0 else 0}%)")
+refresh_categories(cursor)
+conn.commit()
+for category, (total, counts) in sorted(metadata_coverage(cursor, SEO_KEYS).items()):
+    print(f"All {category} products: {total}")
+    for key in SEO_KEYS:
+        print(f"  Has {key} metadata: {counts[key]} ({counts[key]*100//total if total > 0 else 0}%)")
 
 cursor.close()
-conn.close()
+medusa_db.release(conn)
 
 print("\n✅ COLOR AND SEO METADATA ADDITION COMPLETE!")
 print("All products now have proper color tags for Google recognition and SEO.")
\ No newline at end of file
@@ -2,40 +2,12 @@
 """
 Analyze all vendor SKUs to find patterns similar to target SKUs
 """
-import requests
 import json
 import os
-import re
 
-SHOPIFY_DOMAIN = "suits-inventory.myshopify.com"
-
-def fetch_all_products(access_token):
-    """Fetch all products from Shopify"""
-    base_url = f"https://{SHOPIFY_DOMAIN}/admin/api/2024-01/products.json"
-    headers = {
-        'X-Shopify-Access-Token': access_token,
-        'Content-Type': 'application/json'
-    }
-    
-    all_products = []
-    params = {'limit': 250}
-    
-    for page in range(1, 5):  # Get up to 1000 products
-        print(f"Fetching page {page}...")
-        response = requests.get(base_url, headers=headers, params={**params, 'page': page})
-        
-        if response.status_code != 200:
-            break
-            
-        data = response.json()
-        products = data.get('products', [])
-        
-        if not products:
-            break
-            
-        all_products.extend(products)
-    
-    return all_products
+from catalog_snapshot import iter_catalog
+from shopify_catalog import ShopifyAPIError
+from sku_parser import parse_many
 
 def analyze_skus(products):
     """Analyze all SKUs in the catalog"""
@@ -53,12 +25,13 @@ def analyze_skus(products):
                     'price': variant.get('price'),
                     'inventory': variant.get('inventory_quantity', 0)
                 })
-                
-                # Extract base pattern (everything before first dash)
-                base = sku.split('-')[0] if '-' in sku else sku
-                if base not in sku_patterns:
-                    sku_patterns[base] = []
-                sku_patterns[base].append(sku)
+    
+    # Group by base style code, parsing the whole SKU column in one pass
+    bases = parse_many(sku_info['sku'] for sku_info in all_skus)['base']
+    for sku_info, base in zip(all_skus, bases):
+        if base not in sku_patterns:
+            sku_patterns[base] = []
+        sku_patterns[base].append(sku_info['sku'])
     
     return all_skus, sku_patterns
 
@@ -100,12 +73,14 @@ def main():
         print("❌ No access token provided.")
         return
     
-    all_products = fetch_all_products(access_token)
-    print(f"✅ Fetched {len(all_products)} products")
+    try:
+        all_skus, sku_patterns = analyze_skus(iter_catalog(access_token))
+    except ShopifyAPIError as e:
+        print(f"❌ {e}")
+        return
+    print(f"✅ Collected {len(all_skus)} SKUs")
     print()
     
-    all_skus, sku_patterns = analyze_skus(all_products)
-    
     # Show all unique base SKU patterns that start with our target prefixes
     target_prefixes = ['MJ', 'SMJ', 'SM']
     
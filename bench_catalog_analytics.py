@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark the CatalogFrame analytics in analyze_current_vendor against the
+dict-per-product loop it replaced.
+
+The catalog is synthetic (the stub server's product generator), so no
+network is involved. Both sides build the same report - price tiers,
+categories, vendors, stock counts and the full import ranking - and the
+rankings are compared product by product.
+
+It then times an interactive re-rank: the frame is built once, and each
+round re-weights the model, re-scores the catalog and takes a top 20 with
+top_k(), against a full sort of every product.
+
+Usage: python3 bench_catalog_analytics.py [--products 5000] [--variants 20]
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from analyze_current_vendor import analyze_catalog
+from import_scoring import ScoringModel, config_path
+from shopify_stub_server import make_product
+from sku_parser import parse_sku
+
+
+def loop_analysis(products):
+    """The original analyze_catalog + calculate_import_value, condensed"""
+    categories, vendors, tiers = {}, {}, {'under_150': 0, '150_to_200': 0, '200_to_250': 0, 'over_250': 0}
+    high_stock = zero_stock = 0
+    for product in products:
+        product_type = product.get('product_type', 'Unknown')
+        categories.setdefault(product_type, [])
+        vendor = product.get('vendor', 'Unknown')
+        vendors[vendor] = vendors.get(vendor, 0) + 1
+        total_stock, prices, skus = 0, [], []
+        for variant in product.get('variants', []):
+            total_stock += variant.get('inventory_quantity', 0)
+            price = float(variant.get('price', 0))
+            if price > 0:
+                prices.append(price)
+            skus.append(variant.get('sku', ''))
+        if not prices:
+            continue
+        min_price = min(prices)
+        categories[product_type].append({
+            'id': product.get('id'), 'vendor': vendor, 'total_stock': total_stock,
+            'avg_price': sum(prices) / len(prices), 'min_price': min_price,
+            'variants_count': len(skus), 'sku_base': parse_sku(skus[0]).base,
+        })
+        tier = 'under_150' if min_price < 150 else '150_to_200' if min_price < 200 else \
+            '200_to_250' if min_price < 250 else 'over_250'
+        tiers[tier] += 1
+        if total_stock > 20:
+            high_stock += 1
+        elif total_stock == 0:
+            zero_stock += 1
+
+    def score(p):
+        s = 30 if p['total_stock'] > 50 else 20 if p['total_stock'] > 20 else \
+            10 if p['total_stock'] > 10 else 5 if p['total_stock'] > 0 else 0
+        s += 25 if 150 <= p['min_price'] < 200 else 20 if 200 <= p['min_price'] < 250 else \
+            15 if p['min_price'] < 150 else 10
+        s += 15 if p['variants_count'] > 20 else 10 if p['variants_count'] > 10 else \
+            5 if p['variants_count'] > 5 else 0
+        return s + (10 if p['vendor'] in ['Tazzio', 'Perry Ellis', 'Giorgio Inserti'] else 0)
+
+    ranked = [p for ps in categories.values() for p in ps]
+    for p in ranked:
+        p['import_score'] = score(p)
+    ranked.sort(key=lambda p: p['import_score'], reverse=True)
+    return tiers, vendors, high_stock, zero_stock, [(p['id'], p['import_score']) for p in ranked]
+
+
+def frame_analysis(products, model):
+    """The same report from a CatalogFrame, scored by model"""
+    frame = analyze_catalog(products)
+    frame.category_summary()
+    priced = frame.priced
+    high_stock = np.count_nonzero(priced & (frame.total_stock > 20))
+    zero_stock = np.count_nonzero(priced & (frame.total_stock == 0))
+    scores = model.score(frame)
+    ranked = model.top_k(frame, len(frame), scores)
+    return (frame.tier_counts(), frame.vendor_counts(), high_stock, zero_stock,
+            list(zip(frame.ids[ranked].tolist(), scores[ranked].tolist())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vendor catalog analytics")
+    parser.add_argument('--products', type=int, default=5000, help="synthetic vendor products")
+    parser.add_argument('--variants', type=int, default=20, help="variants per product")
+    args = parser.parse_args()
+
+    products = [make_product(i, args.variants) for i in range(args.products)]
+    for product in products[::7]:
+        product['variants'][0]['price'] = '0.00'   # some unpriced variants
+    print(f"🧪 {args.products} products, {args.products * args.variants} variants")
+
+    with open(config_path()) as f:
+        config = json.load(f)
+    model = ScoringModel(config)
+
+    timings = {}
+    results = {}
+    for name, analysis in [('dict loop', loop_analysis), ('CatalogFrame', lambda p: frame_analysis(p, model))]:
+        start = time.perf_counter()
+        results[name] = analysis(products)
+        timings[name] = time.perf_counter() - start
+
+    for name, seconds in timings.items():
+        print(f"{name:<14} {seconds * 1000:8.1f} ms")
+    print(f"Speedup: {timings['dict loop'] / timings['CatalogFrame']:.1f}x")
+    print(f"Same report and ranking: {results['dict loop'] == results['CatalogFrame']}")
+
+    frame = analyze_catalog(products)
+    rounds = 50
+    rerank = {'top_k(20)': 0.0, 'full sort': 0.0}
+    for weight in np.linspace(0.5, 2.0, rounds):
+        config['features']['stock']['weight'] = weight
+        start = time.perf_counter()
+        scores = ScoringModel(config).score(frame)
+        scored = time.perf_counter()
+        top = model.top_k(frame, 20, scores)
+        picked = time.perf_counter()
+        full = model.top_k(frame, len(frame), scores)[:20]
+        rerank['top_k(20)'] += picked - start
+        rerank['full sort'] += scored - start + time.perf_counter() - picked
+        assert (top == full).all()
+    print(f"\nRe-rank of a built frame, mean of {rounds} re-weighted rounds:")
+    for name, seconds in rerank.items():
+        print(f"{name:<14} {seconds / rounds * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark image URL validation against a local static file server.
+
+A temporary directory of synthetic images is served over HTTP/1.1, from a
+separate process, with a fixed per-request latency, standing in for the Shopify CDN. Some files are
+byte-for-byte copies under another name, some are not images, and some
+URLs point at files that do not exist. Every file is also listed with
+cache-buster, host-case and fragment variations, the way a vendor feed
+repeats its URLs.
+
+Three passes are timed: one HEAD per listed URL in a loop, ImageChecker
+with an empty cache, and ImageChecker again on the warm cache. The kept
+images are compared with the set the directory was built to contain.
+
+Usage: python3 bench_image_checker.py [--images 2000] [--latency 0.02] [--workers 32] [--no-etag]
+"""
+import argparse
+import functools
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from image_checker import ImageChecker, dedupe
+
+
+def make_handler(directory, latency, etags):
+    """Static file handler with keep-alive, a fixed delay and optional ETags"""
+
+    class ImageHandler(SimpleHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_head(self):
+            if latency:
+                time.sleep(latency)
+            return super().send_head()
+
+        def end_headers(self):
+            etag = etags.get(self.path.split('?', 1)[0].lstrip('/'))
+            if etag:
+                self.send_header('ETag', etag)
+            super().end_headers()
+
+    return functools.partial(ImageHandler, directory=directory)
+
+
+def serve(directory, latency, etags, ports):
+    """Run the static server (in its own process, so it does not share the GIL)"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(directory, latency, etags))
+    server.daemon_threads = True
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+def build_images(directory, count, with_etags):
+    """Write the synthetic files; returns (every name, names that should be kept, {name: etag})
+
+    Without ETags a copy under another name cannot be recognised, so it is kept.
+    """
+    names, keep, etags = [], [], {}
+    for i in range(count):
+        if i % 10 == 9:
+            name, body = f"copy-of-{i - 1}.jpg", image_body(i - 1)  # same bytes as the previous image
+            if not with_etags:
+                keep.append(name)
+        elif i % 25 == 0:
+            name, body = f"size-chart-{i}.html", b"<html>size chart</html>"
+        else:
+            name, body = f"image-{i}.jpg", image_body(i)
+            keep.append(name)
+        with open(os.path.join(directory, name), 'wb') as f:
+            f.write(body)
+        names.append(name)
+        if with_etags:
+            etags[name] = '"' + hashlib.md5(body).hexdigest() + '"'
+    return names, keep, etags
+
+
+def image_body(i):
+    """A few kilobytes that differ per image"""
+    return b"\xff\xd8\xff\xe0" + hashlib.sha256(str(i).encode()).digest() * (64 + i % 32)
+
+
+def candidate_urls(base, names, missing):
+    """Feed-style URL list: each file several ways, plus some that 404"""
+    host_variant = base.replace('localhost', 'LOCALHOST')
+    urls = []
+    for name in names:
+        urls += [f"{base}/{name}?v=1734569013", f"{base}/{name}?v=1724897331",
+                 f"{host_variant}/{name}", f"{base}/{name}#zoom"]
+    urls += [f"{base}/missing-{i}.jpg" for i in range(missing)]
+    return urls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark image URL validation")
+    parser.add_argument('--images', type=int, default=2000, help="files served")
+    parser.add_argument('--latency', type=float, default=0.02, help="seconds added to every request")
+    parser.add_argument('--workers', type=int, default=32, help="ImageChecker threads")
+    parser.add_argument('--no-etag', action='store_true', help="serve no ETags (dedup by URL only)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        names, keep, etags = build_images(directory, args.images, not args.no_etag)
+        ports = multiprocessing.Queue()
+        server = multiprocessing.Process(target=serve, args=(directory, args.latency, etags, ports), daemon=True)
+        server.start()
+        base = f"http://localhost:{ports.get(timeout=10)}"
+        urls = candidate_urls(base, names, missing=args.images // 20)
+        print(f"🧪 {len(urls)} listed URLs, {len(names)} files, {args.latency * 1000:.0f} ms latency")
+
+        timings = {}
+        start = time.perf_counter()
+        with requests.Session() as session:
+            loop_ok = sum(1 for url in urls[:len(urls) // 10]
+                          if session.head(url, timeout=10).status_code == 200)
+        timings['HEAD loop'] = (time.perf_counter() - start) * 10  # extrapolated from a tenth
+
+        cache = os.path.join(directory, 'checks.sqlite3')
+        for name in ('ImageChecker', 'warm cache'):
+            start = time.perf_counter()
+            with ImageChecker(cache_path=cache, workers=args.workers) as checker:
+                checks = checker.check(urls)
+            timings[name] = time.perf_counter() - start
+            print(f"{name:<14} {checker.requested} requested, {checker.cached} cached")
+        server.terminate()
+
+    print(f"{'HEAD loop':<14} {loop_ok} ok in the first tenth")
+    for name, seconds in timings.items():
+        print(f"{name:<14} {seconds:8.2f} s" + (" (extrapolated)" if name == 'HEAD loop' else ""))
+
+    kept = dedupe(urls, checks)
+    kept_names = sorted(url.rsplit('/', 1)[1].split('?')[0] for url in kept)
+    print(f"\nKept {len(kept)} of {len(urls)} listed URLs; "
+          f"matches the {len(keep)} distinct images: {kept_names == sorted(keep)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Benchmark the scoped inventory backfill against the catalog-wide statements
+migrate-supabase.py used to run after every migration.
+
+For each catalog size a fixed number of new variants is added to a catalog
+whose existing variants already have their inventory items, levels and
+links, then both backfills are timed on the same data (each is rolled back).
+The catalog-wide statements re-check every variant, so their time grows
+with the catalog; the scoped one only looks at the new variants.
+
+Needs a scratch Postgres (it never touches the Railway database). Connection
+settings come from the standard libpq variables (PGHOST, PGPORT, PGUSER,
+PGPASSWORD, PGDATABASE) or --dsn. A throwaway schema holding the variant and
+inventory tables, with Medusa's unique indexes, is created and dropped
+afterwards.
+
+Usage: python3 bench_inventory_backfill.py [--existing 10000 100000] [--new 1000]
+"""
+import argparse
+import time
+
+import psycopg2
+
+from inventory_backfill import STOCK_LOCATION_ID, backfill_inventory
+
+SCHEMA = 'bench_inventory_backfill'
+
+TABLES = """
+CREATE TABLE product_variant (
+    id text PRIMARY KEY, title text, sku text,
+    created_at timestamptz DEFAULT NOW(), updated_at timestamptz DEFAULT NOW(), deleted_at timestamptz
+);
+CREATE TABLE inventory_item (
+    id text PRIMARY KEY, sku text, created_at timestamptz, updated_at timestamptz, deleted_at timestamptz
+);
+CREATE TABLE inventory_level (
+    id text PRIMARY KEY, inventory_item_id text REFERENCES inventory_item (id), location_id text,
+    stocked_quantity integer, reserved_quantity integer, incoming_quantity integer,
+    created_at timestamptz, updated_at timestamptz, deleted_at timestamptz
+);
+CREATE TABLE product_variant_inventory_item (
+    id text PRIMARY KEY, variant_id text REFERENCES product_variant (id),
+    inventory_item_id text REFERENCES inventory_item (id), required_quantity integer,
+    created_at timestamptz, updated_at timestamptz, deleted_at timestamptz
+);
+-- Medusa's unique indexes
+CREATE UNIQUE INDEX ON product_variant (sku) WHERE deleted_at IS NULL;
+CREATE UNIQUE INDEX ON inventory_item (sku) WHERE deleted_at IS NULL;
+CREATE UNIQUE INDEX ON inventory_level (inventory_item_id, location_id) WHERE deleted_at IS NULL;
+CREATE UNIQUE INDEX ON product_variant_inventory_item (variant_id, inventory_item_id) WHERE deleted_at IS NULL;
+"""
+
+# The statements migrate-supabase.py ran before the backfill was scoped
+CATALOG_WIDE = [
+    """
+        INSERT INTO inventory_item (id, sku, created_at, updated_at)
+        SELECT DISTINCT
+            'invitem_' || substr(gen_random_uuid()::text, 1, 16),
+            pv.sku, NOW(), NOW()
+        FROM product_variant pv
+        WHERE pv.sku IS NOT NULL
+        AND NOT EXISTS (
+            SELECT 1 FROM inventory_item ii WHERE ii.sku = pv.sku
+        )
+    """,
+    """
+        INSERT INTO inventory_level (
+            id, inventory_item_id, location_id, stocked_quantity,
+            reserved_quantity, incoming_quantity, created_at, updated_at
+        )
+        SELECT
+            'invlvl_' || substr(gen_random_uuid()::text, 1, 16),
+            ii.id, %(location_id)s,
+            10, 0, 0, NOW(), NOW()
+        FROM inventory_item ii
+        WHERE NOT EXISTS (
+            SELECT 1 FROM inventory_level il
+            WHERE il.inventory_item_id = ii.id
+            AND il.location_id = %(location_id)s
+        )
+    """,
+    """
+        INSERT INTO product_variant_inventory_item (
+            id, variant_id, inventory_item_id, required_quantity,
+            created_at, updated_at
+        )
+        SELECT
+            'pvii_' || substr(gen_random_uuid()::text, 1, 16),
+            pv.id, ii.id, 1, NOW(), NOW()
+        FROM product_variant pv
+        JOIN inventory_item ii ON ii.sku = pv.sku
+        WHERE NOT EXISTS (
+            SELECT 1 FROM product_variant_inventory_item pvii
+            WHERE pvii.variant_id = pv.id AND pvii.inventory_item_id = ii.id
+        )
+    """,
+]
+
+# Variants 1..n with their inventory already in place
+EXISTING = """
+INSERT INTO product_variant (id, title, sku)
+SELECT 'var_' || i, 'Size ' || i, 'SKU-' || i FROM generate_series(1, %(count)s) i;
+INSERT INTO inventory_item (id, sku, created_at, updated_at)
+SELECT 'invitem_' || i, 'SKU-' || i, NOW(), NOW() FROM generate_series(1, %(count)s) i;
+INSERT INTO inventory_level (id, inventory_item_id, location_id, stocked_quantity,
+                             reserved_quantity, incoming_quantity, created_at, updated_at)
+SELECT 'invlvl_' || i, 'invitem_' || i, %(location_id)s, 10, 0, 0, NOW(), NOW() FROM generate_series(1, %(count)s) i;
+INSERT INTO product_variant_inventory_item (id, variant_id, inventory_item_id, required_quantity,
+                                            created_at, updated_at)
+SELECT 'pvii_' || i, 'var_' || i, 'invitem_' || i, 1, NOW(), NOW() FROM generate_series(1, %(count)s) i;
+"""
+
+NEW = """
+INSERT INTO product_variant (id, title, sku)
+SELECT 'var_new_' || i, 'Size ' || i, 'SKU-NEW-' || i FROM generate_series(1, %(count)s) i
+RETURNING id
+"""
+
+INVENTORY_COUNTS = """
+SELECT (SELECT COUNT(*) FROM inventory_item), (SELECT COUNT(*) FROM inventory_level),
+       (SELECT COUNT(*) FROM product_variant_inventory_item)
+"""
+
+
+def catalog_wide_backfill(cursor, variant_ids):
+    for sql in CATALOG_WIDE:
+        cursor.execute(sql, {'location_id': STOCK_LOCATION_ID})
+
+
+def scoped_backfill(cursor, variant_ids):
+    backfill_inventory(cursor, variant_ids, verbose=False)
+
+
+def reset(conn, existing, new):
+    """Seed existing backfilled variants plus new ones; returns the new variant ids"""
+    with conn.cursor() as cursor:
+        cursor.execute("TRUNCATE product_variant_inventory_item, inventory_level, inventory_item, product_variant")
+        cursor.execute(EXISTING, {'count': existing, 'location_id': STOCK_LOCATION_ID})
+        cursor.execute(NEW, {'count': new})
+        variant_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute("ANALYZE")
+    conn.commit()
+    return variant_ids
+
+
+def run(conn, backfill, variant_ids, repeat):
+    """Best of repeat timings in ms, and the (items, levels, links) it leaves; always rolled back"""
+    best = None
+    with conn.cursor() as cursor:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            backfill(cursor, variant_ids)
+            elapsed = (time.perf_counter() - start) * 1000
+            cursor.execute(INVENTORY_COUNTS)
+            counts = cursor.fetchone()
+            conn.rollback()
+            best = elapsed if best is None else min(best, elapsed)
+    return best, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scoped inventory backfill")
+    parser.add_argument('--dsn', default='', help="libpq connection string (default: PG* env vars)")
+    parser.add_argument('--existing', type=int, nargs='+', default=[10000, 100000],
+                        help="catalog sizes (variants already backfilled)")
+    parser.add_argument('--new', type=int, default=1000, help="variants added by the run")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(args.dsn)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+            cursor.execute(f"SET search_path TO {SCHEMA}")
+            cursor.execute(TABLES)
+        conn.commit()
+
+        print(f"🧪 {args.new} new variants, best of {args.repeat}")
+        print(f"{'existing':>10} {'catalog-wide ms':>16} {'scoped ms':>10} {'speedup':>8}  rows after")
+        print("-" * 80)
+        for existing in args.existing:
+            variant_ids = reset(conn, existing, args.new)
+            wide, wide_counts = run(conn, catalog_wide_backfill, variant_ids, args.repeat)
+            scoped, scoped_counts = run(conn, scoped_backfill, variant_ids, args.repeat)
+            same = "same" if wide_counts == scoped_counts else f"MISMATCH {wide_counts} != {scoped_counts}"
+            print(f"{existing:>10} {wide:>16.1f} {scoped:>10.1f} {wide / scoped:>7.1f}x  "
+                  f"{scoped_counts[0]} items, {scoped_counts[1]} levels, {scoped_counts[2]} links ({same})")
+    finally:
+        conn.rollback()
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
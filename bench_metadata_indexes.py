@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+EXPLAIN the script metadata and title queries before and after the
+metadata_indexes.py migration.
+
+Each query is run in its old form (->> comparisons, metadata::text LIKE,
+title LIKE) without the indexes, then in its rewritten form with them. The
+report shows the scan nodes the planner chose and the execution time.
+
+Needs a scratch Postgres (it never touches the Railway database). Connection
+settings come from the standard libpq variables (PGHOST, PGPORT, PGUSER,
+PGPASSWORD, PGDATABASE) or --dsn. A throwaway schema with a product table is
+created and dropped afterwards.
+
+Usage: python3 bench_metadata_indexes.py [--products 100000]
+"""
+import argparse
+import json
+import random
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from metadata_indexes import create_indexes
+from product_metadata import jsonb_literal
+
+SCHEMA = 'bench_metadata_indexes'
+
+TABLE = """
+CREATE TABLE product (
+    id text PRIMARY KEY, title text, handle text, thumbnail text, metadata jsonb,
+    created_at timestamptz DEFAULT NOW(), updated_at timestamptz, deleted_at timestamptz
+)
+"""
+
+COLORS = ['Black', 'Navy', 'Burgundy', 'Light Grey', 'Tan', 'Hunter Green', 'Ivory', 'Blush']
+VENDOR_SKUS = [f"M{300 + i}SK" for i in range(100)]
+
+# (label, old query, new query)
+QUERIES = [
+    ("vendor thumbnail update",
+     "UPDATE product SET thumbnail = 'x' WHERE metadata->>'base_sku' = 'M342SK' "
+     "AND metadata->>'color' = 'Navy' AND metadata->>'source' = 'shopify_vendor'",
+     "UPDATE product SET thumbnail = 'x' WHERE metadata @> "
+     + jsonb_literal({'source': 'shopify_vendor', 'base_sku': 'M342SK', 'color': 'Navy'})),
+    ("vendor listing",
+     "SELECT handle, metadata->>'base_sku', metadata->>'color' FROM product "
+     "WHERE metadata->>'source' = 'shopify_vendor' ORDER BY metadata->>'base_sku', metadata->>'color'",
+     "SELECT handle, metadata->>'base_sku', metadata->>'color' FROM product "
+     "WHERE metadata->>'source' = 'shopify_vendor' ORDER BY metadata->>'base_sku', metadata->>'color'"),
+    ("vendor import check",
+     "SELECT count(*) FROM product WHERE metadata->>'source' = 'shopify_vendor'",
+     "SELECT count(*) FROM product WHERE metadata @> '{\"source\": \"shopify_vendor\"}'"),
+    ("color coverage",
+     "SELECT count(*), count(CASE WHEN metadata::text LIKE '%\"color\"%' THEN 1 END) FROM product "
+     "WHERE (title LIKE '%Suit%' OR title LIKE '%Tuxedo%') AND deleted_at IS NULL",
+     "SELECT count(*), count(*) FILTER (WHERE metadata ? 'color') FROM product "
+     "WHERE title = ANY(ARRAY['Black Suit', 'Navy Suit', 'Black Tuxedo']) AND deleted_at IS NULL"),
+    ("title lookup",
+     "SELECT id, handle FROM product WHERE title = 'Navy Suit' AND deleted_at IS NULL LIMIT 1",
+     "SELECT id, handle FROM product WHERE title = 'Navy Suit' AND deleted_at IS NULL LIMIT 1"),
+]
+
+
+def populate(cursor, count):
+    """count products; one in ten is a vendor import with source/base_sku/color"""
+    rng = random.Random(42)
+    rows = []
+    for i in range(count):
+        color = rng.choice(COLORS)
+        if i % 10 == 0:
+            metadata = {'source': 'shopify_vendor', 'base_sku': rng.choice(VENDOR_SKUS), 'color': color}
+            title = f"{color} Vendor Suit {i}"
+        else:
+            metadata = {'color': color, 'material': 'Wool Blend'} if i % 3 else {}
+            title = f"{color} {'Suit' if i % 2 else 'Tuxedo'} {i}"
+        rows.append((f"prod_{i}", title, f"product-{i}", json.dumps(metadata)))
+    rows += [(f"prod_named_{i}", title, f"named-{i}", '{"color": "Black"}')
+             for i, title in enumerate(['Black Suit', 'Navy Suit', 'Black Tuxedo'])]
+    execute_values(cursor, "INSERT INTO product (id, title, handle, metadata) VALUES %s", rows,
+                   template="(%s, %s, %s, %s::jsonb)", page_size=5000)
+
+
+def scan_nodes(plan):
+    """Scan node descriptions in a JSON plan, e.g. 'Bitmap Index Scan on idx_...'"""
+    nodes = []
+    if 'Scan' in plan['Node Type']:
+        target = plan.get('Index Name') or plan.get('Relation Name')
+        nodes.append(f"{plan['Node Type']} on {target}")
+    for child in plan.get('Plans', []):
+        nodes.extend(scan_nodes(child))
+    return nodes
+
+
+def explain(cursor, query):
+    """Return (scan nodes, execution ms); writes are rolled back by the caller"""
+    cursor.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + query)
+    result = cursor.fetchone()[0][0]
+    return scan_nodes(result['Plan']), result['Execution Time']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark metadata and title indexes")
+    parser.add_argument('--dsn', default='', help="libpq connection string (default: PG* env vars)")
+    parser.add_argument('--products', type=int, default=100000)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(args.dsn)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+            cursor.execute(f"SET search_path TO {SCHEMA}")
+            cursor.execute(TABLE)
+            populate(cursor, args.products)
+            cursor.execute("ANALYZE product")
+        conn.commit()
+
+        before = {}
+        with conn.cursor() as cursor:
+            for label, old, _ in QUERIES:
+                before[label] = explain(cursor, old)
+                conn.rollback()
+
+            create_indexes(cursor, concurrently=False)
+            conn.commit()
+
+            print(f"🧪 {args.products} products")
+            print(f"{'query':<24} {'before ms':>10} {'after ms':>10}  plan")
+            print("-" * 100)
+            for label, _, new in QUERIES:
+                after = explain(cursor, new)
+                conn.rollback()
+                print(f"{label:<24} {before[label][1]:>10.2f} {after[1]:>10.2f}  {', '.join(before[label][0])}")
+                print(f"{'':<46}  -> {', '.join(after[0])}")
+    finally:
+        conn.rollback()
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
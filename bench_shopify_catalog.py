@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark the shared Shopify catalog client against the local stub server.
+
+Reports pages per second, products per second and peak RSS of the client.
+The stub runs in a separate process so its memory is not counted. With
+--bucket the stub enforces a leaky-bucket limit and answers 429s, so the
+pull time shows how close the client gets to what the rate limit allows.
+With --snapshot the catalog is pulled into a local snapshot twice, showing
+the cost of a cold pull against an incremental refresh.
+
+Usage: python3 bench_shopify_catalog.py [--products 5000] [--variants 20] [--collect]
+                                        [--bucket 40 --leak-rate 2] [--fail-every 7]
+                                        [--latency 0.05] [--work-ms 20] [--prefetch 1]
+                                        [--snapshot /tmp/bench_catalog.sqlite3]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import time
+
+from catalog_snapshot import CatalogSnapshot
+from shopify_catalog import RateLimiter, iter_pages
+from shopify_stub_server import create_server, stub_url
+
+
+def serve(server):
+    """Run a stub server until the benchmark terminates the process"""
+    server.serve_forever()
+
+
+def bench_snapshot(url, path, args):
+    """Time a cold snapshot pull followed by an incremental refresh"""
+    if os.path.exists(path):
+        os.remove(path)
+    with CatalogSnapshot(path) as snapshot:
+        for label in ('Cold pull', 'Incremental'):
+            limiter = RateLimiter(leak_rate=args.leak_rate, backoff_base=0.05)
+            start = time.perf_counter()
+            changed = snapshot.refresh('stub-token', base_url=url, prefetch=args.prefetch, limiter=limiter)
+            elapsed = time.perf_counter() - start
+            print(f"{label + ':':14} {elapsed:.2f}s | {limiter.requests} requests | {changed} products pulled")
+
+        start = time.perf_counter()
+        cached = sum(1 for _ in snapshot.iter_products())
+        print(f"{'Read back:':14} {time.perf_counter() - start:.2f}s | {cached} products from disk")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Shopify catalog client")
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--variants', type=int, default=20)
+    parser.add_argument('--collect', action='store_true',
+                        help="Also build an all_products list, like the old fetchers did")
+    parser.add_argument('--bucket', type=int, default=0, help="Stub leaky bucket size (0 disables 429s)")
+    parser.add_argument('--leak-rate', type=float, default=2.0)
+    parser.add_argument('--fail-every', type=int, default=0, help="Stub answers every Nth request with 503")
+    parser.add_argument('--latency', type=float, default=0.0, help="Stub delay per request in seconds")
+    parser.add_argument('--work-ms', type=float, default=0.0, help="Simulated parse time per page")
+    parser.add_argument('--prefetch', type=int, default=1, help="Pages fetched ahead (0 = inline)")
+    parser.add_argument('--snapshot', help="Benchmark cold vs incremental pulls into this snapshot file")
+    args = parser.parse_args()
+
+    server = create_server(0, args.products, args.variants, args.bucket,
+                           args.leak_rate, args.fail_every, args.latency)
+    url = stub_url(server)
+    stub = multiprocessing.Process(target=serve, args=(server,), daemon=True)
+    stub.start()
+    server.server_close()
+
+    print(f"🧪 Benchmarking catalog client against {url}")
+    print(f"   Catalog: {args.products} products x {args.variants} variants")
+    print(f"   Prefetch: {args.prefetch} | Bucket: {args.bucket or 'off'} | Fail every: {args.fail_every or 'off'}")
+
+    if args.snapshot:
+        try:
+            bench_snapshot(url, args.snapshot, args)
+        finally:
+            stub.terminate()
+            stub.join()
+        return
+
+    limiter = RateLimiter(leak_rate=args.leak_rate, backoff_base=0.05)
+    pages = 0
+    products = 0
+    collected = []
+    start = time.perf_counter()
+    try:
+        for page in iter_pages('stub-token', base_url=url, prefetch=args.prefetch, limiter=limiter):
+            if args.work_ms:
+                time.sleep(args.work_ms / 1000)
+            pages += 1
+            products += len(page)
+            if args.collect:
+                collected.extend(page)
+    finally:
+        stub.terminate()
+        stub.join()
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is reported in kilobytes on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print("-" * 50)
+    print(f"Pages:         {pages}")
+    print(f"Products:      {products}")
+    print(f"Elapsed:       {elapsed:.2f}s")
+    print(f"Pages/sec:     {pages / elapsed:.1f}")
+    print(f"Products/sec:  {products / elapsed:.0f}")
+    print(f"Requests:      {limiter.requests} ({limiter.throttled} throttled, {limiter.retries} retried)")
+    print(f"Paced wait:    {limiter.waited:.2f}s")
+    print(f"Peak RSS:      {peak_rss_mb:.1f} MB ({'collected list' if args.collect else 'streaming'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark the SKU index against the nested product x variant x target loop
+that find_exact_skus.find_matching_products used to run.
+
+Builds a synthetic catalog with the stub server's product generator, so no
+network is involved.
+
+Usage: python3 bench_sku_index.py [--variants 50000] [--targets 500]
+"""
+import argparse
+import random
+import time
+
+from shopify_stub_server import make_product
+from sku_index import SkuIndex
+from sku_parser import parse_sku
+
+VARIANTS_PER_PRODUCT = 20
+
+
+def nested_loop_matches(products, target_base_skus):
+    """The original matching loop: every variant against every target"""
+    matches = {}
+    for product in products:
+        for variant in product.get('variants', []):
+            variant_sku = variant.get('sku', '')
+            for base_sku in target_base_skus:
+                if variant_sku.startswith(base_sku + '-') or variant_sku == base_sku:
+                    matches.setdefault(base_sku, []).append(variant_sku)
+    return matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SKU index lookups")
+    parser.add_argument('--variants', type=int, default=50000)
+    parser.add_argument('--targets', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    products = [make_product(i, VARIANTS_PER_PRODUCT)
+                for i in range(args.variants // VARIANTS_PER_PRODUCT)]
+    bases = sorted({parse_sku(v['sku']).base for p in products for v in p['variants']})
+    hits = random.sample(bases, min(len(bases), args.targets // 2))
+    misses = [f"ZZ{n:05d}X" for n in range(args.targets - len(hits))]
+    targets = hits + misses
+
+    print(f"🧪 {len(products) * VARIANTS_PER_PRODUCT} variants, {len(targets)} target base SKUs")
+    print("-" * 50)
+
+    start = time.perf_counter()
+    index = SkuIndex.from_products(products)
+    index.exact('')  # force the sort so build cost is measured here
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    by_base = index.batch(targets, mode='base')
+    base_query = time.perf_counter() - start
+
+    start = time.perf_counter()
+    by_prefix = index.batch([t + '-' for t in targets], mode='prefix')
+    prefix_query = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = nested_loop_matches(products, targets)
+    nested = time.perf_counter() - start
+
+    found = {t: sorted(e.variant['sku'] for e in entries) for t, entries in by_base.items() if entries}
+    assert found == {t: sorted(skus) for t, skus in expected.items()}, "index disagrees with nested loop"
+    assert sum(map(len, by_prefix.values())) == sum(map(len, expected.values()))
+
+    print(f"Index build:        {build * 1000:.1f} ms")
+    print(f"Batch base lookup:  {base_query * 1000:.1f} ms")
+    print(f"Batch prefix sweep: {prefix_query * 1000:.1f} ms")
+    print(f"Nested loops:       {nested * 1000:.1f} ms")
+    print(f"Speedup (incl. build): {nested / (build + base_query):.0f}x")
+    print(f"Matched {len(found)} of {len(targets)} targets, {sum(map(len, found.values()))} variants")
+
+
+if __name__ == "__main__":
+    main()
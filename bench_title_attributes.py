@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark the compiled title attribute extractor against the per-key
+substring loop check_color_metadata.extract_color_from_title used to run.
+
+Titles come from vendor_import_data.json plus a synthetic vendor catalog
+built with the stub server's product generator, so no network is involved.
+Titles where the two disagree are listed, since the old loop's answers
+depended on dict order and matched inside words ("tan" in "Standard").
+
+Usage: python3 bench_title_attributes.py [--products 20000]
+"""
+import argparse
+import os
+import time
+
+from shopify_stub_server import make_product
+from title_attributes import extract_all
+from vendor_feed import iter_colors
+
+VENDOR_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vendor_import_data.json')
+
+
+def substring_extract(title):
+    """The original extract_color_from_title"""
+    title_lower = title.lower()
+    colors = {
+        'black': 'Black', 'navy': 'Navy', 'blue': 'Blue', 'grey': 'Grey', 'gray': 'Grey',
+        'brown': 'Brown', 'burgundy': 'Burgundy', 'ivory': 'Ivory', 'white': 'White', 'pink': 'Pink',
+        'blush': 'Blush Pink', 'burnt orange': 'Burnt Orange', 'orange': 'Orange',
+        'hunter green': 'Hunter Green', 'forest green': 'Forest Green', 'green': 'Green', 'teal': 'Teal',
+        'mint': 'Mint', 'sand': 'Sand', 'tan': 'Tan', 'wine': 'Wine', 'red': 'Red', 'gold': 'Gold',
+        'purple': 'Purple', 'rust': 'Rust', 'mocha': 'Mocha Brown', 'smoked blue': 'Smoky Blue',
+        'estate blue': 'Estate Blue', 'canyon clay': 'Canyon Clay', 'brick': 'Brick Red'
+    }
+    found_colors = []
+    for color_key, color_value in colors.items():
+        if color_key in title_lower:
+            found_colors.append(color_value)
+    if len(found_colors) > 1:
+        if 'gold' in title_lower and ('design' in title_lower or 'paisley' in title_lower):
+            return ' & '.join(found_colors[:2])
+        return found_colors[0]
+    elif found_colors:
+        return found_colors[0]
+    if 'suit' in title_lower or 'tuxedo' in title_lower:
+        return 'Classic'
+    return None
+
+
+def vendor_titles():
+    """Every product title in the saved vendor import"""
+    if not os.path.exists(VENDOR_DATA):
+        return []
+    return [color_data['title'] for _, _, color_data in iter_colors(VENDOR_DATA)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark title attribute extraction")
+    parser.add_argument('--products', type=int, default=20000, help="synthetic vendor products")
+    args = parser.parse_args()
+
+    titles = vendor_titles() + [make_product(i, 1)['title'] for i in range(args.products)]
+    print(f"🧪 {len(titles)} titles")
+
+    start = time.perf_counter()
+    old = [substring_extract(title) for title in titles]
+    old_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    attributes = extract_all(titles)
+    new = [a.color for a in attributes]
+    new_seconds = time.perf_counter() - start
+
+    print(f"{'substring loop':<16} {old_seconds * 1000:8.1f} ms  (color only)")
+    print(f"{'compiled regex':<16} {new_seconds * 1000:8.1f} ms  (color, pattern, fabric, lapel)")
+    print(f"Speedup: {old_seconds / new_seconds:.1f}x")
+
+    changes = {}
+    for title, o, n in zip(titles, old, new):
+        if o != n:
+            changes.setdefault((str(o), str(n)), []).append(title)
+    print(f"\n{sum(len(t) for t in changes.values())} titles answer differently, {len(changes)} distinct changes:")
+    for (o, n), changed in sorted(changes.items(), key=lambda item: -len(item[1])):
+        print(f"  {o:>14} -> {n:<14} x{len(changed):<6} e.g. {changed[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Benchmark the bulk variant rebuild against the per-size INSERT loop the fix
+scripts used to run, and the single-statement teardown against the old
+SELECT-ids-then-DELETE sequence. A repeat run then compares rows written
+by delete-and-recreate against diff-based reconciliation.
+
+Needs a scratch Postgres (it never touches the Railway database). Connection
+settings come from the standard libpq variables (PGHOST, PGPORT, PGUSER,
+PGPASSWORD, PGDATABASE) or --dsn. A throwaway schema holding just the
+Medusa pricing tables is created and dropped afterwards.
+
+--rtt-ms adds a sleep per round trip to model the Railway proxy latency.
+--correction N additionally times an N-product price correction run the old
+way (batches of 5 with a 0.5 s sleep) against the adaptive scheduler.
+
+Usage: python3 bench_variant_rebuild.py [--products 100] [--rtt-ms 0] [--correction 500]
+"""
+import argparse
+import json
+import os
+import time
+
+import psycopg2
+import psycopg2.extensions
+
+import medusa_db
+from adaptive_scheduler import AdaptiveScheduler
+from variant_rebuild import (ALL_SUIT_SIZES, REGION_ID, generate_id, rebuild_variants, reconcile_variants,
+                             teardown_variants)
+
+SCHEMA = 'bench_variant_rebuild'
+
+TABLES = """
+CREATE TABLE product (id text PRIMARY KEY, title text, handle text, deleted_at timestamptz);
+CREATE TABLE product_variant (
+    id text PRIMARY KEY, product_id text REFERENCES product (id), title text, sku text,
+    manage_inventory boolean, created_at timestamptz, updated_at timestamptz, deleted_at timestamptz
+);
+CREATE TABLE price_set (id text PRIMARY KEY, created_at timestamptz, updated_at timestamptz, deleted_at timestamptz);
+CREATE TABLE product_variant_price_set (
+    id text PRIMARY KEY, variant_id text REFERENCES product_variant (id), price_set_id text REFERENCES price_set (id),
+    created_at timestamptz, updated_at timestamptz, deleted_at timestamptz
+);
+CREATE TABLE price (
+    id text PRIMARY KEY, price_set_id text REFERENCES price_set (id), currency_code text, amount numeric,
+    raw_amount jsonb, created_at timestamptz, updated_at timestamptz, deleted_at timestamptz
+);
+CREATE TABLE price_rule (
+    id text PRIMARY KEY, value text, priority integer, price_id text REFERENCES price (id),
+    attribute text, operator text, created_at timestamptz, updated_at timestamptz, deleted_at timestamptz
+);
+-- Medusa indexes its foreign-key columns
+CREATE INDEX ON product_variant (product_id);
+CREATE INDEX ON product_variant_price_set (variant_id);
+CREATE INDEX ON product_variant_price_set (price_set_id);
+CREATE INDEX ON price (price_set_id);
+CREATE INDEX ON price_rule (price_id);
+"""
+
+
+class CountingCursor(psycopg2.extensions.cursor):
+    """Cursor that counts statements sent to the server and fakes network latency"""
+
+    round_trips = 0
+    rtt = 0.0
+
+    def execute(self, query, vars=None):
+        CountingCursor.round_trips += 1
+        if CountingCursor.rtt:
+            time.sleep(CountingCursor.rtt)
+        return super().execute(query, vars)
+
+
+def per_row_rebuild(cursor, products):
+    """The original loop: five INSERTs per size"""
+    for product_id, sku_base, price_cents in products:
+        for size in ALL_SUIT_SIZES:
+            variant_id = generate_id('variant_')
+            price_set_id = generate_id('pset_')
+            price_id = generate_id('price_')
+
+            cursor.execute("""
+                INSERT INTO product_variant (id, product_id, title, sku, manage_inventory, created_at, updated_at)
+                VALUES (%s, %s, %s, %s, false, NOW(), NOW())
+            """, (variant_id, product_id, size, f"{sku_base}-{size}"))
+            cursor.execute("""
+                INSERT INTO price_set (id, created_at, updated_at)
+                VALUES (%s, NOW(), NOW())
+            """, (price_set_id,))
+            cursor.execute("""
+                INSERT INTO product_variant_price_set (id, variant_id, price_set_id, created_at, updated_at)
+                VALUES (%s, %s, %s, NOW(), NOW())
+            """, (generate_id('pvps_'), variant_id, price_set_id))
+            raw_amount = json.dumps({"value": str(price_cents), "precision": 20})
+            cursor.execute("""
+                INSERT INTO price (id, price_set_id, currency_code, amount, raw_amount, created_at, updated_at)
+                VALUES (%s, %s, 'usd', %s, %s::jsonb, NOW(), NOW())
+            """, (price_id, price_set_id, price_cents, raw_amount))
+            cursor.execute("""
+                INSERT INTO price_rule (id, value, priority, price_id, attribute, operator, created_at, updated_at)
+                VALUES (%s, %s, 0, %s, 'region_id', 'eq', NOW(), NOW())
+            """, (generate_id('prule_'), REGION_ID, price_id))
+
+
+def per_product_teardown(cursor, product_ids):
+    """The original delete path: fetch id lists, then one DELETE per table, per product"""
+    for product_id in product_ids:
+        cursor.execute("SELECT id FROM product_variant WHERE product_id = %s", (product_id,))
+        variant_ids = [row[0] for row in cursor.fetchall()]
+        if not variant_ids:
+            continue
+        cursor.execute("SELECT price_set_id FROM product_variant_price_set WHERE variant_id = ANY(%s)",
+                       (variant_ids,))
+        price_set_ids = [row[0] for row in cursor.fetchall() if row[0]]
+        cursor.execute("SELECT id FROM price WHERE price_set_id = ANY(%s)", (price_set_ids,))
+        price_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute("DELETE FROM price_rule WHERE price_id = ANY(%s)", (price_ids,))
+        cursor.execute("DELETE FROM price WHERE price_set_id = ANY(%s)", (price_set_ids,))
+        cursor.execute("DELETE FROM product_variant_price_set WHERE variant_id = ANY(%s)", (variant_ids,))
+        cursor.execute("DELETE FROM price_set WHERE id = ANY(%s)", (price_set_ids,))
+        cursor.execute("DELETE FROM product_variant WHERE product_id = %s", (product_id,))
+
+
+def reset(cursor, count):
+    """Empty the scratch tables and seed count products"""
+    cursor.execute("TRUNCATE price_rule, price, product_variant_price_set, price_set, product_variant, product")
+    products = []
+    for i in range(count):
+        product_id = generate_id('prod_')
+        cursor.execute("INSERT INTO product (id, title, handle) VALUES (%s, %s, %s)",
+                       (product_id, f"Bench Suit {i}", f"bench-suit-{i}"))
+        products.append((product_id, f"BENCH_SUIT_{i}", 22999))
+    return products
+
+
+def run(conn, label, rebuild, count):
+    """Time one rebuild strategy over count products"""
+    with conn.cursor() as cursor:
+        products = reset(cursor, count)
+        conn.commit()
+
+        CountingCursor.round_trips = 0
+        start = time.perf_counter()
+        rebuild(cursor, products)
+        conn.commit()
+        elapsed = time.perf_counter() - start
+        round_trips = CountingCursor.round_trips
+
+        cursor.execute("SELECT COUNT(*) FROM price_rule")
+        rows = cursor.fetchone()[0]
+
+    per_100 = elapsed / count * 100
+    print(f"{label:<10} {round_trips:>8} round trips  {elapsed:8.3f}s  {per_100:8.3f}s/100 products  "
+          f"{rows} price rules")
+    return elapsed
+
+
+def run_teardown(conn, label, teardown, count):
+    """Rebuild count products, then time one teardown strategy removing them"""
+    with conn.cursor() as cursor:
+        products = reset(cursor, count)
+        rebuild_variants(cursor, products)
+        conn.commit()
+
+        CountingCursor.round_trips = 0
+        start = time.perf_counter()
+        teardown(cursor, [product_id for product_id, _, _ in products])
+        conn.commit()
+        elapsed = time.perf_counter() - start
+        round_trips = CountingCursor.round_trips
+
+        cursor.execute("SELECT (SELECT COUNT(*) FROM price_rule) + (SELECT COUNT(*) FROM price_set)")
+        left = cursor.fetchone()[0]
+
+    per_100 = elapsed / count * 100
+    print(f"{label:<10} {round_trips:>8} round trips  {elapsed:8.3f}s  {per_100:8.3f}s/100 products  "
+          f"{left} rows left")
+    return elapsed
+
+
+def wal_position(cursor):
+    """Current WAL insert position; the difference between two is the bytes written"""
+    cursor.execute("SELECT pg_current_wal_insert_lsn()")
+    return cursor.fetchone()[0]
+
+
+def wal_bytes_since(cursor, start):
+    cursor.execute("SELECT pg_wal_lsn_diff(pg_current_wal_insert_lsn(), %s)", (start,))
+    return int(cursor.fetchone()[0])
+
+
+def run_repeat(conn, label, update, count, changed):
+    """Build count products, then time a repeat run where changed of them have a new price"""
+    with conn.cursor() as cursor:
+        products = reset(cursor, count)
+        rebuild_variants(cursor, products)
+        conn.commit()
+        # Live tables have planner statistics; freshly seeded ones do not
+        cursor.execute("ANALYZE product_variant, product_variant_price_set, price_set, price, price_rule")
+
+        repeat = [(product_id, sku_base, price_cents + 1000 if i < changed else price_cents)
+                  for i, (product_id, sku_base, price_cents) in enumerate(products)]
+        wal_start = wal_position(cursor)
+        CountingCursor.round_trips = 0
+        start = time.perf_counter()
+        update(cursor, repeat)
+        conn.commit()
+        elapsed = time.perf_counter() - start
+        round_trips = CountingCursor.round_trips
+        written = wal_bytes_since(cursor, wal_start)
+
+    print(f"{label:<10} {round_trips:>8} round trips  {elapsed:8.3f}s  {written / 1024:8.0f} KiB WAL written")
+    return written
+
+
+def recreate(cursor, products):
+    """Delete-and-recreate, as the fix scripts did before reconciliation"""
+    teardown_variants(cursor, [product_id for product_id, _, _ in products])
+    rebuild_variants(cursor, products)
+
+
+def run_correction(conn, count, batch_size, sleep, workers):
+    """Time a price correction over count products: fixed batches vs the adaptive scheduler"""
+    with conn.cursor() as cursor:
+        products = reset(cursor, count)
+        rebuild_variants(cursor, products)
+        conn.commit()
+        cursor.execute("ANALYZE product_variant, product_variant_price_set, price_set, price, price_rule")
+
+        corrected = [(product_id, sku_base, price_cents + 500) for product_id, sku_base, price_cents in products]
+        start = time.perf_counter()
+        for i in range(0, count, batch_size):
+            reconcile_variants(cursor, corrected[i:i + batch_size])
+            conn.commit()
+            time.sleep(sleep)
+        batched = time.perf_counter() - start
+    print(f"{'batched':<10} {batched:8.2f}s  {count / batched:8.1f} products/s  "
+          f"(batches of {batch_size}, {sleep:g}s sleep)")
+
+    corrected = [(product_id, sku_base, price_cents + 1000) for product_id, sku_base, price_cents in products]
+
+    def correct(worker_conn, product):
+        with worker_conn.cursor() as cursor:
+            reconcile_variants(cursor, [product])
+        worker_conn.commit()
+
+    scheduler = AdaptiveScheduler(max_workers=workers)
+    scheduler.run(correct, corrected)
+    print(f"{'adaptive':<10} {scheduler.elapsed:8.2f}s  {count / scheduler.elapsed:8.1f} products/s")
+    for line in scheduler.report():
+        print(f"           {line}")
+    print(f"Speedup: {batched / scheduler.elapsed:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk variant rebuild")
+    parser.add_argument('--dsn', default='', help="libpq connection string (default: PG* env vars)")
+    parser.add_argument('--products', type=int, default=100)
+    parser.add_argument('--rtt-ms', type=float, default=0.0, help="simulated latency per round trip")
+    parser.add_argument('--correction', type=int, default=0, help="products in the price-correction run")
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    CountingCursor.rtt = args.rtt_ms / 1000
+    # The scheduler's workers connect through medusa_db; point them at the scratch schema
+    if args.dsn:
+        os.environ['MEDUSA_DATABASE_URL'] = args.dsn
+    os.environ['PGOPTIONS'] = f"-c search_path={SCHEMA}"
+    os.environ.setdefault('DB_POOL_SIZE', str(args.workers))
+    if CountingCursor.rtt:
+        medusa_db.add_timing_hook(lambda statement, seconds: time.sleep(CountingCursor.rtt))
+    conn = psycopg2.connect(args.dsn, cursor_factory=CountingCursor)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+            cursor.execute(f"SET search_path TO {SCHEMA}")
+            cursor.execute(TABLES)
+        conn.commit()
+
+        print(f"🧪 {args.products} products x {len(ALL_SUIT_SIZES)} sizes, simulated RTT {args.rtt_ms:g} ms")
+        print("-" * 80)
+        per_row = run(conn, "per-row", per_row_rebuild, args.products)
+        bulk = run(conn, "bulk", rebuild_variants, args.products)
+        print(f"Speedup: {per_row / bulk:.1f}x")
+        print("-" * 80)
+        per_product = run_teardown(conn, "per-table", per_product_teardown, args.products)
+        cte = run_teardown(conn, "cte", teardown_variants, args.products)
+        print(f"Teardown speedup: {per_product / cte:.1f}x")
+        print("-" * 80)
+        changed = args.products // 10
+        print(f"Repeat run, {changed} of {args.products} prices changed")
+        recreated = run_repeat(conn, "recreate", recreate, args.products, changed)
+        reconciled = run_repeat(conn, "reconcile", reconcile_variants, args.products, changed)
+        print(f"Write reduction: {recreated / max(reconciled, 1):.0f}x")
+        if args.correction:
+            print("-" * 80)
+            print(f"Price correction, {args.correction} products")
+            run_correction(conn, args.correction, 5, 0.5, args.workers)
+    finally:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
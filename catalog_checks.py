@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Single-pass catalog verification.
+
+load_catalog() streams the product -> variant -> price graph once through a
+server-side cursor into a compact in-memory Catalog, together with the
+price sets nothing links to. Every registered check is then evaluated
+against that Catalog, so adding a check never adds a query.
+
+Checks are declared with the @check decorator:
+
+  @check('inventory_flag', "variants must not track inventory", categories=SUIT_CATEGORIES)
+  def inventory_flag(product):
+      ...return None when the product passes, or a detail string
+
+Product checks run on every product whose category (from
+product_categories) is listed; catalog checks (scope='catalog') get the
+whole Catalog and yield (subject_id, detail) for each failure.
+
+Usage: python3 catalog_checks.py [--check NAME ...] [--json]
+"""
+import argparse
+import json
+from collections import Counter, namedtuple
+
+import medusa_db
+from product_categories import PRICE_TIERS, VIEW, refresh_categories
+from variant_rebuild import ALL_SUIT_SIZES
+
+SUIT_CATEGORIES = ('suit', 'tuxedo')
+
+# Tables whose price_set_id keeps a price set alive; ones missing from the
+# database are skipped
+PRICE_SET_LINKS = ['product_variant_price_set', 'shipping_option_price_set']
+
+GRAPH_SQL = f"""
+    SELECT p.id, p.title, c.category, COALESCE(p.metadata ->> 'color', '') <> '',
+           pv.id, pv.title, pv.manage_inventory, pvps.price_set_id, pr.currency_code, pr.amount
+    FROM product p
+    LEFT JOIN {VIEW} c ON c.product_id = p.id
+    LEFT JOIN product_variant pv ON pv.product_id = p.id AND pv.deleted_at IS NULL
+    LEFT JOIN product_variant_price_set pvps ON pvps.variant_id = pv.id AND pvps.deleted_at IS NULL
+    LEFT JOIN price pr ON pr.price_set_id = pvps.price_set_id AND pr.deleted_at IS NULL
+    WHERE p.deleted_at IS NULL
+    UNION ALL
+    SELECT NULL, NULL, NULL, NULL, NULL, NULL, NULL, ps.id, NULL, NULL
+    FROM price_set ps
+    WHERE ps.deleted_at IS NULL
+    {{orphan_filters}}
+"""
+ORPHAN_FILTER = "AND NOT EXISTS (SELECT 1 FROM {table} l WHERE l.price_set_id = ps.id AND l.deleted_at IS NULL)"
+
+
+class Variant:
+    __slots__ = ('id', 'size', 'manage_inventory', 'price_set_ids', 'amounts')
+
+    def __init__(self, variant_id, size, manage_inventory):
+        self.id = variant_id
+        self.size = size
+        self.manage_inventory = manage_inventory
+        self.price_set_ids = set()
+        self.amounts = {}  # currency_code -> set of amounts in cents
+
+
+class Product:
+    __slots__ = ('id', 'title', 'category', 'has_color', 'variants')
+
+    def __init__(self, product_id, title, category, has_color):
+        self.id = product_id
+        self.title = title
+        self.category = category
+        self.has_color = has_color
+        self.variants = {}
+
+    def usd_amounts(self):
+        """Distinct USD prices across the variants"""
+        return {amount for v in self.variants.values() for amount in v.amounts.get('usd', ())}
+
+
+class Catalog:
+    def __init__(self):
+        self.products = {}
+        self.orphan_price_sets = []
+
+    def add_row(self, row):
+        (product_id, title, category, has_color,
+         variant_id, size, manage_inventory, price_set_id, currency, amount) = row
+        if product_id is None:
+            self.orphan_price_sets.append(price_set_id)
+            return
+        product = self.products.get(product_id)
+        if product is None:
+            product = self.products[product_id] = Product(product_id, title, category, has_color)
+        if variant_id is None:
+            return
+        variant = product.variants.get(variant_id)
+        if variant is None:
+            variant = product.variants[variant_id] = Variant(variant_id, size, manage_inventory)
+        if price_set_id is not None:
+            variant.price_set_ids.add(price_set_id)
+        if amount is not None:
+            variant.amounts.setdefault(currency, set()).add(int(amount))
+
+    def in_categories(self, categories):
+        return [p for p in self.products.values() if p.category in categories]
+
+
+def load_catalog(conn, itersize=5000):
+    """Stream the whole product graph into a Catalog in one query"""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT name FROM unnest(%s::text[]) AS name WHERE to_regclass(name) IS NOT NULL",
+                       (PRICE_SET_LINKS,))
+        links = [row[0] for row in cursor.fetchall()]
+    query = GRAPH_SQL.format(orphan_filters="\n    ".join(ORPHAN_FILTER.format(table=t) for t in links))
+
+    catalog = Catalog()
+    for row in medusa_db.stream(conn, query, itersize=itersize, cursor_name='catalog_checks'):
+        catalog.add_row(row)
+    return catalog
+
+
+# --- Checks -----------------------------------------------------------------
+
+Check = namedtuple('Check', 'name description scope categories evaluate')
+Failure = namedtuple('Failure', 'check subject_id title detail')
+
+CHECKS = {}
+
+
+def check(name, description, scope='product', categories=None):
+    """Register a check; see the module docstring for the two scopes"""
+    def register(evaluate):
+        CHECKS[name] = Check(name, description, scope, categories, evaluate)
+        return evaluate
+    return register
+
+
+@check('size_coverage', f"exactly one variant per size ({len(ALL_SUIT_SIZES)} sizes)", categories=SUIT_CATEGORIES)
+def size_coverage(product):
+    sizes = Counter(v.size for v in product.variants.values())
+    missing = [s for s in ALL_SUIT_SIZES if s not in sizes]
+    duplicated = sorted(s for s, n in sizes.items() if n > 1)
+    extra = sorted(str(s) for s in sizes if s not in ALL_SUIT_SIZES)
+    problems = []
+    if missing:
+        problems.append(f"missing {', '.join(missing)}")
+    if duplicated:
+        problems.append(f"duplicate {', '.join(duplicated)}")
+    if extra:
+        problems.append(f"unexpected {', '.join(extra)}")
+    if problems:
+        return f"{len(product.variants)} variants: " + "; ".join(problems)
+
+
+@check('price_tier', "every variant has one USD price from the category's tiers", categories=SUIT_CATEGORIES)
+def price_tier(product):
+    unpriced = sum(1 for v in product.variants.values() if not v.amounts.get('usd'))
+    amounts = product.usd_amounts()
+    tiers = PRICE_TIERS[product.category]
+    problems = []
+    if unpriced:
+        problems.append(f"{unpriced} variants without a USD price")
+    if len(amounts) > 1:
+        problems.append("mixed prices " + ", ".join(f"${a/100:.2f}" for a in sorted(amounts)))
+    off_tier = sorted(a for a in amounts if a not in tiers)
+    if off_tier:
+        problems.append("off-tier " + ", ".join(f"${a/100:.2f}" for a in off_tier))
+    if problems:
+        return "; ".join(problems)
+
+
+@check('inventory_flag', "variants must not track inventory", categories=SUIT_CATEGORIES)
+def inventory_flag(product):
+    managed = sum(1 for v in product.variants.values() if v.manage_inventory)
+    if managed:
+        return f"{managed} variants have manage_inventory = true"
+
+
+@check('color_metadata', "product metadata has a color", categories=SUIT_CATEGORIES)
+def color_metadata(product):
+    if not product.has_color:
+        return "no color in metadata"
+
+
+@check('orphan_price_sets', "every price set is linked to a variant or shipping option", scope='catalog')
+def orphan_price_sets(catalog):
+    for price_set_id in catalog.orphan_price_sets:
+        yield price_set_id, "price set not linked to anything"
+
+
+class CheckReport:
+    """Failures plus, per check, how many subjects were checked and failed"""
+
+    def __init__(self):
+        self.checked = Counter()
+        self.failures = []
+
+    def failed(self, name):
+        return [f for f in self.failures if f.check == name]
+
+    def to_dict(self):
+        failed = Counter(f.check for f in self.failures)
+        return {
+            'summary': {name: {'checked': self.checked[name], 'failed': failed[name]} for name in self.checked},
+            'failures': [f._asdict() for f in self.failures],
+        }
+
+
+def run_checks(catalog, names=None):
+    """Evaluate the named checks (default: all) against a loaded Catalog"""
+    report = CheckReport()
+    for name in names or CHECKS:
+        spec = CHECKS[name]
+        if spec.scope == 'catalog':
+            report.checked[name] += 1
+            for subject_id, detail in spec.evaluate(catalog):
+                report.failures.append(Failure(name, subject_id, None, detail))
+            continue
+        products = catalog.in_categories(spec.categories) if spec.categories else catalog.products.values()
+        for product in products:
+            report.checked[name] += 1
+            detail = spec.evaluate(product)
+            if detail:
+                report.failures.append(Failure(name, product.id, product.title, detail))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify the catalog in one pass")
+    parser.add_argument('--check', action='append', choices=sorted(CHECKS), help="run only these checks")
+    parser.add_argument('--json', action='store_true', help="print machine-readable results")
+    args = parser.parse_args()
+
+    conn = medusa_db.connect()
+    try:
+        with conn.cursor() as cursor:
+            refresh_categories(cursor)
+        conn.commit()
+        catalog = load_catalog(conn)
+    finally:
+        medusa_db.release(conn)
+
+    report = run_checks(catalog, args.check)
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2, default=str))
+        return
+    for name, counts in report.to_dict()['summary'].items():
+        status = '✅' if not counts['failed'] else '⚠️ '
+        print(f"{status} {name}: {counts['failed']} of {counts['checked']} failed — {CHECKS[name].description}")
+        for failure in report.failed(name):
+            print(f"    - {failure.title or failure.subject_id}: {failure.detail}")
+
+
+if __name__ == "__main__":
+    main()
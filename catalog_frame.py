@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Columnar view of a vendor catalog for analytics.
+
+CatalogFrame.from_products() walks the products once, collecting every
+variant's stock and price into flat arrays alongside the index of the
+product it belongs to. The per-product columns (total stock, average and
+minimum price, variant count) are then reduced with bincount / reduceat,
+and vendors and product types are dictionary-encoded, so every group-by is
+a bincount over small integer codes rather than a loop over dicts.
+
+Products without a positive variant price have NaN prices; the analyses
+skip them, as analyze_current_vendor always has.
+"""
+import numpy as np
+
+from sku_parser import parse_many
+
+# Price tier upper bounds on the minimum variant price
+TIER_NAMES = ['under_150', '150_to_200', '200_to_250', 'over_250']
+TIER_EDGES = np.array([150.0, 200.0, 250.0])
+
+
+def _encode(value, codes):
+    """Dictionary-encode value, assigning codes in first-seen order"""
+    code = codes.get(value)
+    if code is None:
+        code = codes[value] = len(codes)
+    return code
+
+
+class CatalogFrame:
+    """One row per product, one NumPy array per column"""
+
+    def __init__(self, ids, titles, sku_bases, vendors, vendor_codes, types, type_codes,
+                 total_stock, avg_price, min_price, variants_count):
+        self.ids = ids
+        self.titles = titles
+        self.sku_bases = sku_bases
+        self.vendors = vendors            # code -> vendor
+        self.vendor_codes = vendor_codes
+        self.types = types                # code -> product type
+        self.type_codes = type_codes
+        self.total_stock = total_stock
+        self.avg_price = avg_price
+        self.min_price = min_price
+        self.variants_count = variants_count
+        self.priced = ~np.isnan(min_price)
+
+    @classmethod
+    def from_products(cls, products):
+        """Flatten Shopify products (dicts with variants) into a frame"""
+        ids, titles, first_skus = [], [], []
+        vendor_codes, type_codes, counts = [], [], []
+        stocks, prices = [], []
+        vendors, types = {}, {}
+
+        for product in products:
+            variants = product.get('variants', [])
+            ids.append(product.get('id'))
+            titles.append(product.get('title'))
+            vendor_codes.append(_encode(product.get('vendor', 'Unknown'), vendors))
+            type_codes.append(_encode(product.get('product_type', 'Unknown'), types))
+            counts.append(len(variants))
+            first_skus.append(variants[0].get('sku', '') if variants else '')
+            stocks.extend([variant.get('inventory_quantity') or 0 for variant in variants])
+            prices.extend([variant.get('price') or 0 for variant in variants])
+
+        count = len(ids)
+        counts = np.array(counts, dtype=np.int64)
+        stock = np.array(stocks, dtype=np.int64)
+        price = np.array(prices, dtype=np.float64)
+        owner = np.repeat(np.arange(count), counts)  # product index of each variant
+
+        total_stock = np.bincount(owner, weights=stock, minlength=count).astype(np.int64)
+
+        priced = price > 0
+        priced_owner = owner[priced]
+        priced_price = price[priced]
+        priced_count = np.bincount(priced_owner, minlength=count)
+        avg_price = np.full(count, np.nan)
+        min_price = np.full(count, np.nan)
+        if priced_owner.size:
+            has_price = priced_count > 0
+            avg_price[has_price] = (np.bincount(priced_owner, weights=priced_price, minlength=count)[has_price]
+                                    / priced_count[has_price])
+            # Variants are stored product by product, so each product's priced
+            # variants form one contiguous run
+            starts = np.flatnonzero(np.r_[True, priced_owner[1:] != priced_owner[:-1]])
+            min_price[priced_owner[starts]] = np.minimum.reduceat(priced_price, starts)
+
+        bases = np.array(parse_many(first_skus)['base'], dtype=object)
+        bases[counts == 0] = 'N/A'
+
+        return cls(np.array(ids, dtype=object), np.array(titles, dtype=object), bases,
+                   list(vendors), np.array(vendor_codes, dtype=np.int64),
+                   list(types), np.array(type_codes, dtype=np.int64),
+                   total_stock, avg_price, min_price, counts)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def price_tiers(self):
+        """Tier index (into TIER_NAMES) of every product's minimum price; -1 if unpriced"""
+        tiers = np.digitize(self.min_price, TIER_EDGES)
+        tiers[~self.priced] = -1
+        return tiers
+
+    def tier_counts(self):
+        """{tier name: priced products in it}"""
+        tiers = self.price_tiers()
+        counts = np.bincount(tiers[self.priced], minlength=len(TIER_NAMES))
+        return dict(zip(TIER_NAMES, counts.tolist()))
+
+    def category_summary(self):
+        """[(product type, priced products, total stock, mean of average prices)], in first-seen order"""
+        codes = self.type_codes[self.priced]
+        size = len(self.types)
+        products = np.bincount(codes, minlength=size)
+        stock = np.bincount(codes, weights=self.total_stock[self.priced], minlength=size)
+        price = np.bincount(codes, weights=self.avg_price[self.priced], minlength=size)
+        return [(self.types[code], int(products[code]), int(stock[code]), price[code] / products[code])
+                for code in np.flatnonzero(products)]
+
+    def vendor_counts(self):
+        """{vendor: products}, every product counted"""
+        counts = np.bincount(self.vendor_codes, minlength=len(self.vendors))
+        return dict(zip(self.vendors, counts.tolist()))
+
+    def row(self, index):
+        """One product as the dict analyze_current_vendor prints"""
+        return {
+            'id': self.ids[index],
+            'title': self.titles[index],
+            'vendor': self.vendors[self.vendor_codes[index]],
+            'type': self.types[self.type_codes[index]],
+            'total_stock': int(self.total_stock[index]),
+            'avg_price': float(self.avg_price[index]),
+            'min_price': float(self.min_price[index]),
+            'variants_count': int(self.variants_count[index]),
+            'sku_base': self.sku_bases[index],
+        }
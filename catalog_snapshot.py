@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Local SQLite snapshot of the Shopify vendor catalog.
+
+Products and variants are persisted on disk, and refresh() only asks Shopify
+for products changed since the stored high-water mark (updated_at_min), so
+repeated analysis runs read from disk and make a handful of API calls.
+
+Set CATALOG_SNAPSHOT to choose the snapshot file, or to "off" to always
+stream the live catalog.
+"""
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from shopify_catalog import iter_pages
+
+DEFAULT_PATH = 'vendor_catalog.sqlite3'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    handle TEXT,
+    title TEXT,
+    updated_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS variants (
+    id INTEGER PRIMARY KEY,
+    product_id INTEGER NOT NULL,
+    sku TEXT,
+    price TEXT,
+    inventory_quantity INTEGER
+);
+CREATE INDEX IF NOT EXISTS variants_product_id ON variants (product_id);
+CREATE INDEX IF NOT EXISTS variants_sku ON variants (sku);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def snapshot_path():
+    """Return the configured snapshot path, or None when snapshots are off"""
+    path = os.getenv('CATALOG_SNAPSHOT', DEFAULT_PATH)
+    return None if path.lower() == 'off' else path
+
+
+class CatalogSnapshot:
+    """On-disk product/variant store refreshed incrementally by updated_at"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    @property
+    def high_water_mark(self):
+        """Latest product updated_at stored, or None for an empty snapshot"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'high_water_mark'").fetchone()
+        return row[0] if row else None
+
+    def refresh(self, access_token=None, full=False, **fetch_kwargs):
+        """Pull products changed since the high-water mark; return how many were stored
+
+        updated_at_min is inclusive, so the product at the mark is fetched
+        again and simply overwritten. Products deleted upstream are not seen
+        by an incremental pull; full=True rebuilds the snapshot from scratch.
+        """
+        if full:
+            with self.conn:
+                self.conn.execute("DELETE FROM variants")
+                self.conn.execute("DELETE FROM products")
+                self.conn.execute("DELETE FROM meta WHERE key = 'high_water_mark'")
+
+        mark = self.high_water_mark
+        params = dict(fetch_kwargs.pop('params', None) or {})
+        if mark:
+            params['updated_at_min'] = mark
+
+        # Pages come in id order, not updated_at order, so the mark only
+        # moves once the whole pull is in: an interrupted pull keeps the
+        # pages it stored but leaves the previous mark, and the next refresh
+        # asks for everything since that mark again.
+        stored = 0
+        pending = None
+        try:
+            for products in iter_pages(access_token, params=params, **fetch_kwargs):
+                if pending:
+                    with self.conn:
+                        self._store_page(pending)
+                mark = _latest(products, mark)
+                pending = products
+                stored += len(products)
+        except BaseException:
+            if pending:
+                with self.conn:
+                    self._store_page(pending)
+            raise
+
+        with self.conn:
+            if pending:
+                self._store_page(pending)
+            if mark:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('high_water_mark', ?)", (mark,)
+                )
+        return stored
+
+    def _store_page(self, products):
+        """Upsert one page of products"""
+        product_ids = [(p['id'],) for p in products]
+        self.conn.executemany("DELETE FROM variants WHERE product_id = ?", product_ids)
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO products (id, handle, title, updated_at, data) VALUES (?, ?, ?, ?, ?)",
+            [(p['id'], p.get('handle'), p.get('title'), p.get('updated_at'), json.dumps(p))
+             for p in products]
+        )
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO variants (id, product_id, sku, price, inventory_quantity) VALUES (?, ?, ?, ?, ?)",
+            [(v['id'], p['id'], v.get('sku'), v.get('price'), v.get('inventory_quantity', 0))
+             for p in products for v in p.get('variants', [])]
+        )
+
+    def iter_products(self):
+        """Yield every stored product, one at a time, like a live fetch"""
+        cursor = self.conn.execute("SELECT data FROM products ORDER BY id")
+        for (data,) in cursor:
+            yield json.loads(data)
+
+
+def _latest(products, mark):
+    """The later of mark and every product's updated_at"""
+    for product in products:
+        updated_at = product.get('updated_at')
+        if updated_at and (not mark or _parse_time(updated_at) > _parse_time(mark)):
+            mark = updated_at
+    return mark
+
+
+def _parse_time(value):
+    """Parse a Shopify ISO-8601 timestamp for ordering"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def iter_catalog(access_token, on_page=None, path=None):
+    """Refresh the local snapshot and stream products from it
+
+    Falls back to a live stream when CATALOG_SNAPSHOT=off.
+    """
+    path = path or snapshot_path()
+    if not path:
+        for page in iter_pages(access_token, on_page=on_page):
+            yield from page
+        return
+
+    with CatalogSnapshot(path) as snapshot:
+        changed = snapshot.refresh(access_token, on_page=on_page)
+        print(f"💾 Snapshot {path}: {changed} changed products pulled, {len(snapshot)} cached")
+        yield from snapshot.iter_products()
@@ -2,82 +2,23 @@
 """
 Fetch ALL products from Shopify vendor to get complete picture
 """
-import requests
 import json
 import os
 
-SHOPIFY_DOMAIN = "suits-inventory.myshopify.com"
+from catalog_snapshot import iter_catalog
+from shopify_catalog import ShopifyAPIError
+from sku_index import SkuIndex
+from sku_parser import parse_sku
+
 target_skus = [
     "MJ425S", "SMJ830H1", "MJ430S", "MJ428S", "MJ427S", "MJ426S",
     "SMJ831H1", "SMJ832H1", "SMJ833H1", "SM164H1", "SM179H1", "SM197H1"
 ]
 
-def fetch_all_products(access_token):
-    """Fetch all products from Shopify using pagination"""
-    base_url = f"https://{SHOPIFY_DOMAIN}/admin/api/2024-01/products.json"
-    headers = {
-        'X-Shopify-Access-Token': access_token,
-        'Content-Type': 'application/json'
-    }
-    
-    all_products = []
-    next_link = None
-    page = 1
-    
-    try:
-        while True:
-            print(f"Fetching page {page}...")
-            
-            if next_link:
-                response = requests.get(next_link, headers=headers)
-            else:
-                params = {'limit': 250}
-                response = requests.get(base_url, headers=headers, params=params)
-            
-            if response.status_code != 200:
-                print(f"❌ API Error: {response.status_code} - {response.text}")
-                break
-                
-            data = response.json()
-            products = data.get('products', [])
-            
-            if not products:
-                break
-                
-            all_products.extend(products)
-            print(f"   Got {len(products)} products (total: {len(all_products)})")
-            
-            # Check for pagination link in headers
-            link_header = response.headers.get('Link', '')
-            next_link = None
-            
-            if 'rel="next"' in link_header:
-                # Extract next URL from Link header
-                for link in link_header.split(','):
-                    if 'rel="next"' in link:
-                        next_link = link.split('<')[1].split('>')[0]
-                        break
-            
-            if not next_link:
-                break
-                
-            page += 1
-            
-            # Safety break to avoid infinite loops
-            if page > 20:  # Max 5000 products
-                print("⚠️ Stopping at page 20 for safety")
-                break
-        
-        return all_products
-        
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        return []
-
-def analyze_sku_patterns(products):
+def analyze_sku_patterns(products, sku_patterns=None, sku_prefixes=None):
     """Analyze SKU patterns to understand naming conventions"""
-    sku_patterns = {}
-    sku_prefixes = {}
+    sku_patterns = {} if sku_patterns is None else sku_patterns
+    sku_prefixes = {} if sku_prefixes is None else sku_prefixes
     
     for product in products:
         for variant in product.get('variants', []):
@@ -85,8 +26,7 @@ def analyze_sku_patterns(products):
             if sku:
                 # Count SKU patterns
                 if '-' in sku:
-                    parts = sku.split('-')
-                    pattern = f"{parts[0]}-XX-XX"
+                    pattern = f"{parse_sku(sku).base}-XX-XX"
                     if pattern not in sku_patterns:
                         sku_patterns[pattern] = []
                     sku_patterns[pattern].append(sku)
@@ -98,6 +38,36 @@ def analyze_sku_patterns(products):
     
     return sku_patterns, sku_prefixes
 
+def find_target_matches(index):
+    """Return exact and prefix target SKU matches from a SKU index"""
+    found_matches = []
+    
+    def describe(entry, match_type, target=None):
+        product = index.products[entry.product_id]
+        match = {
+            'product_title': product.get('title'),
+            'sku': entry.sku,
+            'match_type': match_type,
+            'price': entry.variant.get('price'),
+            'inventory': entry.variant.get('inventory_quantity', 0),
+            'shopify_id': entry.product_id
+        }
+        if target:
+            match['target'] = target
+        return match
+    
+    # Exact matches
+    for target_sku, entries in index.batch(target_skus, mode='exact').items():
+        found_matches.extend(describe(entry, 'exact') for entry in entries)
+    
+    # Partial matches: variant SKUs built on a target (e.g. MJ425S-01-36R)
+    for target_sku, entries in index.batch(target_skus, mode='prefix').items():
+        found_matches.extend(
+            describe(entry, 'contains', target_sku) for entry in entries if entry.sku != target_sku
+        )
+    
+    return found_matches
+
 def main():
     print("🔍 Fetching ALL products from Shopify vendor catalog...")
     print()
@@ -107,18 +77,31 @@ def main():
         print("❌ No access token provided.")
         return
     
-    all_products = fetch_all_products(access_token)
+    # Collect SKU patterns and target matches in a single streaming pass
+    def report_page(page, products):
+        print(f"Fetching page {page}...")
+        print(f"   Got {len(products)} products")
+    
+    total_products = 0
+    sku_patterns, sku_prefixes = {}, {}
+    index = SkuIndex()
+    
+    try:
+        for product in iter_catalog(access_token, on_page=report_page):
+            total_products += 1
+            analyze_sku_patterns([product], sku_patterns, sku_prefixes)
+            index.add_product(product)
+    except ShopifyAPIError as e:
+        print(f"❌ {e}")
+        return
     
-    if not all_products:
+    if not total_products:
         print("❌ No products fetched")
         return
     
-    print(f"✅ Total products fetched: {len(all_products)}")
+    print(f"✅ Total products fetched: {total_products}")
     print()
     
-    # Analyze SKU patterns
-    sku_patterns, sku_prefixes = analyze_sku_patterns(all_products)
-    
     print("📊 SKU Pattern Analysis:")
     print("Top 10 SKU patterns:")
     for pattern, examples in list(sku_patterns.items())[:10]:
@@ -131,35 +114,8 @@ def main():
     
     print()
     
-    # Search for target SKUs in all products
-    found_matches = []
-    for product in all_products:
-        for variant in product.get('variants', []):
-            variant_sku = variant.get('sku', '').upper()
-            
-            # Exact match
-            if variant_sku in target_skus:
-                found_matches.append({
-                    'product_title': product.get('title'),
-                    'sku': variant_sku,
-                    'match_type': 'exact',
-                    'price': variant.get('price'),
-                    'inventory': variant.get('inventory_quantity', 0),
-                    'shopify_id': product.get('id')
-                })
-            
-            # Partial matches
-            for target_sku in target_skus:
-                if target_sku in variant_sku or variant_sku in target_sku:
-                    found_matches.append({
-                        'product_title': product.get('title'),
-                        'sku': variant_sku,
-                        'target': target_sku,
-                        'match_type': 'contains',
-                        'price': variant.get('price'),
-                        'inventory': variant.get('inventory_quantity', 0),
-                        'shopify_id': product.get('id')
-                    })
+    # Search for target SKUs with batch index lookups instead of rescanning
+    found_matches = find_target_matches(index)
     
     if found_matches:
         print(f"✅ Found {len(found_matches)} SKU matches:")
@@ -1,18 +1,20 @@
 #!/usr/bin/env python3
-import psycopg2
+import medusa_db
 import json
-import re
 
-# Database connection
-conn = psycopg2.connect(
-    host="centerbeam.proxy.rlwy.net",
-    port=20197,
-    user="postgres",
-    password="MvLLUHcwsDWjPCiWciFTYjQxAlwpxPds",
-    database="railway"
-)
+from product_resolver import ProductIndex, describe_miss
+from title_attributes import extract_color
+
+# Database connection (settings come from DATABASE_URL)
+conn = medusa_db.connect()
 cursor = conn.cursor()
 
+GET_METADATA = """
+    SELECT id, metadata
+    FROM product
+    WHERE id = ANY(%s)
+"""
+
 # Products I fixed in Instance 1
 my_products = [
     "2 PC Double Breasted Solid Suit",
@@ -74,66 +76,6 @@ my_products = [
     "Vivid Purple Tuxedo Tone Trim Tuxedo"
 ]
 
-def extract_color_from_title(title):
-    """Extract color from product title"""
-    title_lower = title.lower()
-    
-    # Define color mappings
-    colors = {
-        'black': 'Black',
-        'navy': 'Navy',
-        'blue': 'Blue',
-        'grey': 'Grey',
-        'gray': 'Grey',
-        'brown': 'Brown',
-        'burgundy': 'Burgundy',
-        'ivory': 'Ivory',
-        'white': 'White',
-        'pink': 'Pink',
-        'blush': 'Blush Pink',
-        'burnt orange': 'Burnt Orange',
-        'orange': 'Orange',
-        'hunter green': 'Hunter Green',
-        'forest green': 'Forest Green',
-        'green': 'Green',
-        'teal': 'Teal',
-        'mint': 'Mint',
-        'sand': 'Sand',
-        'tan': 'Tan',
-        'wine': 'Wine',
-        'red': 'Red',
-        'gold': 'Gold',
-        'purple': 'Purple',
-        'rust': 'Rust',
-        'mocha': 'Mocha Brown',
-        'smoked blue': 'Smoky Blue',
-        'estate blue': 'Estate Blue',
-        'canyon clay': 'Canyon Clay',
-        'brick': 'Brick Red'
-    }
-    
-    # Check for multiple colors (e.g., "Black Gold Design")
-    found_colors = []
-    for color_key, color_value in colors.items():
-        if color_key in title_lower:
-            found_colors.append(color_value)
-    
-    # Return primary color or combination
-    if len(found_colors) > 1:
-        # For patterns like "Black Gold", keep both
-        if 'gold' in title_lower and ('design' in title_lower or 'paisley' in title_lower):
-            return ' & '.join(found_colors[:2])
-        else:
-            return found_colors[0]  # Return primary color
-    elif found_colors:
-        return found_colors[0]
-    
-    # Default color for suits without specific color
-    if 'suit' in title_lower or 'tuxedo' in title_lower:
-        return 'Classic'
-    
-    return None
-
 print("ANALYZING COLOR METADATA FOR SUITS & TUXEDOS")
 print("=" * 60)
 
@@ -141,16 +83,16 @@ print("=" * 60)
 products_missing_color = []
 products_with_color = []
 
-for product_title in my_products:
-    cursor.execute("""
-        SELECT id, title, metadata
-        FROM product
-        WHERE title = %s AND deleted_at IS NULL
-    """, (product_title,))
-    
-    result = cursor.fetchone()
-    if result:
-        product_id, title, metadata = result
+# Resolve every title in memory, then fetch all their metadata in one query
+resolutions = ProductIndex.load(cursor).resolve_all(my_products)
+found = [r.product for r in resolutions.values() if r.product]
+cursor.execute(GET_METADATA, ([p.id for p in found],))
+metadata_by_id = dict(cursor.fetchall())
+
+for resolution in resolutions.values():
+    if resolution.product:
+        product_id, title, _ = resolution.product
+        metadata = metadata_by_id.get(product_id)
         
         # Check if color exists in metadata
         has_color = False
@@ -171,8 +113,10 @@ for product_title in my_products:
             products_with_color.append((product_id, title, current_color))
         else:
             # Extract color from title
-            suggested_color = extract_color_from_title(title)
+            suggested_color = extract_color(title)
             products_missing_color.append((product_id, title, suggested_color))
+    else:
+        print(f"❌ Product not found: {resolution.query} - {describe_miss(resolution)}")
 
 print(f"\nProducts WITH color metadata: {len(products_with_color)}")
 if products_with_color:
@@ -197,13 +141,15 @@ print("\n" + "=" * 60)
 print("CHECKING OTHER SEO METADATA")
 print("=" * 60)
 
+# Only this script's titles (idx_product_title_live); keys are tested with @?, the
+# form the metadata GIN index (jsonb_path_ops) supports, unlike ?
 cursor.execute("""
     SELECT 
         COUNT(*) as total,
-        COUNT(CASE WHEN metadata::text LIKE '%color%' THEN 1 END) as has_color,
-        COUNT(CASE WHEN metadata::text LIKE '%material%' THEN 1 END) as has_material,
-        COUNT(CASE WHEN metadata::text LIKE '%fit%' THEN 1 END) as has_fit,
-        COUNT(CASE WHEN metadata::text LIKE '%occasion%' THEN 1 END) as has_occasion
+        COUNT(*) FILTER (WHERE metadata @? '$.color') as has_color,
+        COUNT(*) FILTER (WHERE metadata @? '$.material') as has_material,
+        COUNT(*) FILTER (WHERE metadata @? '$.fit') as has_fit,
+        COUNT(*) FILTER (WHERE metadata @? '$.occasion') as has_occasion
     FROM product
     WHERE title = ANY(%s) AND deleted_at IS NULL
 """, (my_products,))
@@ -218,7 +164,7 @@ if result:
     print(f"Has occasion metadata: {has_occasion} ({has_occasion*100//total if total > 0 else 0}%)")
 
 cursor.close()
-conn.close()
+medusa_db.release(conn)
 
 print("\n" + "=" * 60)
 print(f"TOTAL PRODUCTS NEEDING COLOR METADATA: {len(products_missing_color)}")
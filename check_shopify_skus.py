@@ -2,13 +2,14 @@
 """
 Check Shopify vendor products for specific SKUs
 """
-import requests
 import json
 import os
+import re
 
-# Shopify API configuration
-SHOPIFY_DOMAIN = "suits-inventory.myshopify.com"
-# Note: In production, this would come from environment variables
+from shopify_catalog import ShopifyAPIError, iter_products
+from sku_index import SkuIndex
+
+# Note: In production, the access token comes from environment variables
 # SHOPIFY_ACCESS_TOKEN = os.getenv('SHOPIFY_ACCESS_TOKEN')
 
 # Target SKUs to search for
@@ -17,134 +18,111 @@ target_skus = [
     "SMJ831H1", "SMJ832H1", "SMJ833H1", "SM164H1", "SM179H1", "SM197H1"
 ]
 
+# Title mentions of any target SKU, checked with one compiled pattern
+TARGET_TITLE_RE = re.compile('|'.join(re.escape(sku) for sku in target_skus), re.IGNORECASE)
+
+def series_prefix(target_sku):
+    """Return the series prefix used for partial matches (MJ425, SMJ830, SM164)"""
+    if target_sku.startswith('MJ'):
+        return target_sku[:4]
+    if target_sku.startswith('SMJ'):
+        return target_sku[:6]
+    if target_sku.startswith('SM'):
+        return target_sku[:5]
+    return None
+
+def variant_match(entry, match_type, target=None):
+    """Describe one matching variant"""
+    variant = entry.variant
+    match = {
+        'sku': entry.sku,
+        'match_type': match_type,
+        'price': variant.get('price'),
+        'inventory': variant.get('inventory_quantity', 0),
+        'id': variant.get('id')
+    }
+    if target:
+        match['target'] = target
+    return match
+
 def search_products_by_sku(access_token):
     """Search Shopify products for target SKUs"""
-    url = f"https://{SHOPIFY_DOMAIN}/admin/api/2024-01/products.json"
-    headers = {
-        'X-Shopify-Access-Token': access_token,
-        'Content-Type': 'application/json'
-    }
-    
-    params = {'limit': 250}
     found_products = []
     sample_products = []
+    title_matches = set()
+    index = SkuIndex()
     
     try:
-        response = requests.get(url, headers=headers, params=params)
-        
-        if response.status_code == 401:
-            print("❌ Authentication failed. Need valid SHOPIFY_ACCESS_TOKEN.")
-            return None, None
-            
-        if response.status_code != 200:
-            print(f"❌ API Error: {response.status_code} - {response.text}")
-            return None, None
-            
-        data = response.json()
-        products = data.get('products', [])
-        
-        print(f"✅ Found {len(products)} total products in Shopify vendor catalog")
-        
-        # Get sample products to understand SKU patterns
-        for i, product in enumerate(products[:10]):  # First 10 products
-            variants_info = []
-            for variant in product.get('variants', [])[:3]:  # First 3 variants
-                variants_info.append({
-                    'sku': variant.get('sku', 'No SKU'),
-                    'title': variant.get('title'),
-                    'price': variant.get('price'),
-                    'inventory': variant.get('inventory_quantity', 0)
-                })
+        # Stream the whole catalog once, indexing variant SKUs as we go
+        for product in iter_products(access_token):
+            index.add_product(product)
             
-            sample_products.append({
-                'title': product.get('title'),
-                'variants': variants_info,
-                'created_at': product.get('created_at')
-            })
-        
-        # Search for target SKUs and similar patterns
-        for product in products:
-            # Check product title and variants for SKUs
-            product_match = False
-            variant_matches = []
-            
-            # Check if SKU is in product title
-            for sku in target_skus:
-                if sku.lower() in product.get('title', '').lower():
-                    product_match = True
-                    break
-            
-            # Check variants for SKU matches (exact and partial)
-            for variant in product.get('variants', []):
-                variant_sku = variant.get('sku', '').upper()
-                
-                # Exact match
-                if variant_sku in target_skus:
-                    variant_matches.append({
-                        'sku': variant_sku,
-                        'match_type': 'exact',
+            # Keep the first 10 products as samples to understand SKU patterns
+            if len(sample_products) < 10:
+                variants_info = []
+                for variant in product.get('variants', [])[:3]:  # First 3 variants
+                    variants_info.append({
+                        'sku': variant.get('sku', 'No SKU'),
+                        'title': variant.get('title'),
                         'price': variant.get('price'),
-                        'inventory': variant.get('inventory_quantity', 0),
-                        'id': variant.get('id')
+                        'inventory': variant.get('inventory_quantity', 0)
                     })
-                    product_match = True
                 
-                # Partial match for similar patterns (MJ, SMJ, SM series)
-                else:
-                    for target_sku in target_skus:
-                        # Check if the variant SKU contains the base pattern
-                        if target_sku.startswith('MJ') and variant_sku.startswith('MJ'):
-                            if target_sku[:4] in variant_sku:  # Match MJ425, etc.
-                                variant_matches.append({
-                                    'sku': variant_sku,
-                                    'match_type': 'partial',
-                                    'target': target_sku,
-                                    'price': variant.get('price'),
-                                    'inventory': variant.get('inventory_quantity', 0),
-                                    'id': variant.get('id')
-                                })
-                                product_match = True
-                        elif target_sku.startswith('SMJ') and variant_sku.startswith('SMJ'):
-                            if target_sku[:6] in variant_sku:  # Match SMJ830, etc.
-                                variant_matches.append({
-                                    'sku': variant_sku,
-                                    'match_type': 'partial',
-                                    'target': target_sku,
-                                    'price': variant.get('price'),
-                                    'inventory': variant.get('inventory_quantity', 0),
-                                    'id': variant.get('id')
-                                })
-                                product_match = True
-                        elif target_sku.startswith('SM') and variant_sku.startswith('SM'):
-                            if target_sku[:5] in variant_sku:  # Match SM164, etc.
-                                variant_matches.append({
-                                    'sku': variant_sku,
-                                    'match_type': 'partial',
-                                    'target': target_sku,
-                                    'price': variant.get('price'),
-                                    'inventory': variant.get('inventory_quantity', 0),
-                                    'id': variant.get('id')
-                                })
-                                product_match = True
-            
-            if product_match:
-                found_products.append({
-                    'shopify_id': product.get('id'),
+                sample_products.append({
                     'title': product.get('title'),
-                    'handle': product.get('handle'),
-                    'vendor': product.get('vendor'),
-                    'product_type': product.get('product_type'),
-                    'variants_count': len(product.get('variants', [])),
-                    'matching_variants': variant_matches,
-                    'created_at': product.get('created_at'),
-                    'image': product.get('images', [{}])[0].get('src') if product.get('images') else None
+                    'variants': variants_info,
+                    'created_at': product.get('created_at')
                 })
+            
+            # Check if SKU is in product title
+            if TARGET_TITLE_RE.search(product.get('title', '')):
+                title_matches.add(product.get('id'))
         
-        return found_products, sample_products
+        print(f"✅ Found {len(index.products)} total products in Shopify vendor catalog")
         
+    except ShopifyAPIError as e:
+        if e.status_code == 401:
+            print("❌ Authentication failed. Need valid SHOPIFY_ACCESS_TOKEN.")
+        else:
+            print(f"❌ {e}")
+        return None, None
     except Exception as e:
         print(f"❌ Error: {e}")
-        return None
+        return None, None
+    
+    # Resolve exact and partial (MJ, SMJ, SM series) matches in two batch lookups
+    variant_matches = {}
+    exact_skus = set()
+    for target_sku, entries in index.batch(target_skus, mode='exact').items():
+        for entry in entries:
+            exact_skus.add(entry.sku)
+            variant_matches.setdefault(entry.product_id, []).append(variant_match(entry, 'exact'))
+    
+    prefixes = {target_sku: series_prefix(target_sku) for target_sku in target_skus}
+    prefix_hits = index.batch([p for p in set(prefixes.values()) if p], mode='prefix')
+    for target_sku, prefix in prefixes.items():
+        for entry in prefix_hits.get(prefix, []):
+            if entry.sku not in exact_skus:
+                variant_matches.setdefault(entry.product_id, []).append(
+                    variant_match(entry, 'partial', target_sku)
+                )
+    
+    for product_id, product in index.products.items():
+        if product_id not in variant_matches and product_id not in title_matches:
+            continue
+        found_products.append({
+            'shopify_id': product_id,
+            'title': product.get('title'),
+            'handle': product.get('handle'),
+            'vendor': product.get('vendor'),
+            'product_type': product.get('product_type'),
+            'variants_count': product['variants_count'],
+            'matching_variants': variant_matches.get(product_id, []),
+            'created_at': product.get('created_at'),
+            'image': product.get('images', [{}])[0].get('src') if product.get('images') else None
+        })
+    
+    return found_products, sample_products
 
 def main():
     print("🔍 Searching Shopify vendor catalog for target SKUs...")
@@ -166,7 +144,7 @@ def main():
         print()
         print("📋 Summary of what this script would do:")
         print("   1. Connect to suits-inventory.myshopify.com")
-        print("   2. Fetch all products (limit 250)")
+        print("   2. Stream all products, following pagination")
         print("   3. Search product titles and variant SKUs for matches")
         print("   4. Return matching products with pricing and inventory")
         return
@@ -192,7 +170,6 @@ def main():
         print("   This could mean:")
         print("   - SKUs don't exist in this vendor catalog")  
         print("   - SKUs use different naming pattern")
-        print("   - Products are in a different page (limit=250)")
         return
     
     print(f"✅ Found {len(found_products)} matching products:")
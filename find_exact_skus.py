@@ -3,11 +3,12 @@
 Find exact SKUs understanding the pattern:
 Base SKU (e.g., MJ428S) + Color Code (e.g., -01) + Size (e.g., -34R)
 """
-import requests
 import json
 import os
 
-SHOPIFY_DOMAIN = "suits-inventory.myshopify.com"
+from catalog_snapshot import iter_catalog
+from shopify_catalog import ShopifyAPIError
+from sku_index import SkuIndex
 
 # Target base SKUs from suitsamerica.com
 target_base_skus = [
@@ -16,98 +17,33 @@ target_base_skus = [
     "SM164H1", "SM179H1", "SM197H1"
 ]
 
-def fetch_all_products(access_token):
-    """Fetch all products from Shopify using pagination"""
-    base_url = f"https://{SHOPIFY_DOMAIN}/admin/api/2024-01/products.json"
-    headers = {
-        'X-Shopify-Access-Token': access_token,
-        'Content-Type': 'application/json'
-    }
-    
-    all_products = []
-    next_link = None
-    page = 1
-    
-    try:
-        while True:
-            print(f"Fetching page {page}...", end=" ")
-            
-            if next_link:
-                response = requests.get(next_link, headers=headers)
-            else:
-                params = {'limit': 250}
-                response = requests.get(base_url, headers=headers, params=params)
-            
-            if response.status_code != 200:
-                print(f"❌ API Error: {response.status_code}")
-                break
-                
-            data = response.json()
-            products = data.get('products', [])
-            
-            if not products:
-                break
-                
-            all_products.extend(products)
-            print(f"✓ ({len(all_products)} total)")
-            
-            # Check for pagination link in headers
-            link_header = response.headers.get('Link', '')
-            next_link = None
-            
-            if 'rel="next"' in link_header:
-                for link in link_header.split(','):
-                    if 'rel="next"' in link:
-                        next_link = link.split('<')[1].split('>')[0]
-                        break
-            
-            if not next_link:
-                break
-                
-            page += 1
-            
-            if page > 20:
-                break
-        
-        return all_products
-        
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        return []
-
 def find_matching_products(products, target_base_skus):
     """Find products matching our target base SKUs"""
+    index = SkuIndex.from_products(products)
     matches = {}
     
-    for product in products:
-        for variant in product.get('variants', []):
-            variant_sku = variant.get('sku', '')
-            
-            # Check if variant SKU starts with any of our target base SKUs
-            for base_sku in target_base_skus:
-                if variant_sku.startswith(base_sku + '-') or variant_sku == base_sku:
-                    # Found a match!
-                    if base_sku not in matches:
-                        matches[base_sku] = {
-                            'product': product,
-                            'variants': []
-                        }
-                    
-                    # Parse the variant details
-                    sku_parts = variant_sku.split('-')
-                    color_code = sku_parts[1] if len(sku_parts) > 1 else 'N/A'
-                    size_code = sku_parts[2] if len(sku_parts) > 2 else 'N/A'
-                    
-                    matches[base_sku]['variants'].append({
-                        'full_sku': variant_sku,
-                        'color_code': color_code,
-                        'size': size_code,
-                        'title': variant.get('title', ''),
-                        'price': variant.get('price'),
-                        'compare_price': variant.get('compare_at_price'),
-                        'inventory': variant.get('inventory_quantity', 0),
-                        'variant_id': variant.get('id')
-                    })
+    for base_sku, entries in index.batch(target_base_skus, mode='base').items():
+        if not entries:
+            continue
+        
+        # Found a match!
+        matches[base_sku] = {
+            'product': index.products[entries[0].product_id],
+            'variants': []
+        }
+        
+        for entry in entries:
+            variant = entry.variant
+            matches[base_sku]['variants'].append({
+                'full_sku': variant.get('sku', ''),
+                'color_code': entry.color_code,
+                'size': entry.size,
+                'title': variant.get('title', ''),
+                'price': variant.get('price'),
+                'compare_price': variant.get('compare_at_price'),
+                'inventory': variant.get('inventory_quantity', 0),
+                'variant_id': variant.get('id')
+            })
     
     return matches
 
@@ -154,18 +90,18 @@ def main():
         print("❌ No access token provided.")
         return
     
-    all_products = fetch_all_products(access_token)
-    
-    if not all_products:
-        print("❌ No products fetched")
+    # Find matching products while the catalog streams in
+    try:
+        products = iter_catalog(
+            access_token,
+            on_page=lambda page, batch: print(f"Fetching page {page}... ✓ ({len(batch)} products)")
+        )
+        matches = find_matching_products(products, target_base_skus)
+    except ShopifyAPIError as e:
+        print(f"❌ {e}")
         return
-    
-    print(f"✅ Total products fetched: {len(all_products)}")
     print()
     
-    # Find matching products
-    matches = find_matching_products(all_products, target_base_skus)
-    
     if not matches:
         print("❌ No matches found for target base SKUs")
         return
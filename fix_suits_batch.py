@@ -1,18 +1,14 @@
 #!/usr/bin/env python3
-import psycopg2
+import medusa_db
 import json
 import sys
 import uuid
 from psycopg2.extras import execute_values
 
-# Database connection
-conn = psycopg2.connect(
-    host="centerbeam.proxy.rlwy.net",
-    port=20197,
-    user="postgres",
-    password="MvLLUHcwsDWjPCiWciFTYjQxAlwpxPds",
-    database="railway"
-)
+from product_resolver import ProductIndex, describe_ambiguity
+
+# Database connection (settings come from DATABASE_URL)
+conn = medusa_db.connect()
 conn.autocommit = False
 cursor = conn.cursor()
 
@@ -24,16 +20,6 @@ REGULAR_SIZES = ['36R', '38R', '40R', '42R', '44R', '46R', '48R', '50R', '52R',
 LONG_SIZES = ['38L', '40L', '42L', '44L', '46L', '48L', '50L', '52L', '54L']
 ALL_SUIT_SIZES = REGULAR_SIZES + LONG_SIZES  # 19 total sizes
 
-def check_product_exists(title):
-    """Check if product exists and get its info"""
-    cursor.execute("""
-        SELECT id, title, handle 
-        FROM product 
-        WHERE title = %s AND deleted_at IS NULL
-        LIMIT 1
-    """, (title,))
-    return cursor.fetchone()
-
 # First, let's check which products exist
 print("Checking which products exist in database...")
 print("-" * 50)
@@ -106,13 +92,19 @@ all_products = {
 found_products = []
 missing_products = []
 
+# One query loads every product title; all lookups below are in memory
+index = ProductIndex.load(cursor)
+resolutions = index.resolve_all(title for products in all_products.values() for title in products)
+
 for category, products in all_products.items():
     print(f"\n{category}:")
     for product_title in products:
-        result = check_product_exists(product_title)
-        if result:
-            found_products.append((result[0], result[1], result[2], category))
-            print(f"  ✅ {product_title}")
+        resolution = resolutions[product_title]
+        if resolution.product:
+            product = resolution.product
+            found_products.append((product.id, product.title, product.handle, category))
+            note = f" (matched '{product.title}')" if resolution.match != 'exact' else ""
+            print(f"  ✅ {product_title}{note}")
         else:
             missing_products.append(product_title)
             print(f"  ❌ {product_title} - NOT FOUND")
@@ -124,29 +116,27 @@ print(f"Missing: {len(missing_products)} products")
 if len(found_products) == 0:
     print("\n❌ No products found to fix!")
     cursor.close()
-    conn.close()
+    medusa_db.release(conn)
     sys.exit(1)
 
 # Now let's check if any found products might be duplicates or have similar names
 if missing_products:
     print("\n\nSearching for similar product names for missing items...")
-    for missing in missing_products[:5]:  # Check first 5 missing
-        search_term = missing.split()[0] if missing.split() else missing
-        cursor.execute("""
-            SELECT title FROM product 
-            WHERE title ILIKE %s 
-            AND deleted_at IS NULL
-            LIMIT 5
-        """, (f'%{search_term}%',))
-        similar = cursor.fetchall()
-        if similar:
+    for missing in missing_products:
+        suggestions = resolutions[missing].suggestions
+        if suggestions:
             print(f"\n  Missing: '{missing}'")
             print(f"  Similar products found:")
-            for s in similar:
-                print(f"    - {s[0]}")
+            for score, product in suggestions:
+                print(f"    - {product.title} ({score:.2f})")
+
+for resolution in resolutions.values():
+    ambiguity = describe_ambiguity(resolution)
+    if ambiguity:
+        print(f"\n  ⚠️  '{resolution.query}' {ambiguity}")
 
 cursor.close()
-conn.close()
+medusa_db.release(conn)
 
 print("\n\n✅ Analysis complete!")
 print(f"Ready to fix {len(found_products)} products.")
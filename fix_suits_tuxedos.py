@@ -1,124 +1,43 @@
 #!/usr/bin/env python3
-import psycopg2
-import json
-from datetime import datetime
-import uuid
+import medusa_db
 
-# Database connection
-conn = psycopg2.connect(
-    host="centerbeam.proxy.rlwy.net",
-    port=20197,
-    user="postgres",
-    password="MvLLUHcwsDWjPCiWciFTYjQxAlwpxPds",
-    database="railway"
-)
-cursor = conn.cursor()
-
-# Region ID for US
-REGION_ID = 'reg_01K3S6NDGAC1DSWH9MCZCWBWWD'
-
-# Define size arrays
-REGULAR_SIZES = ['36R', '38R', '40R', '42R', '44R', '46R', '48R', '50R', '52R', '54R']
-LONG_SIZES = ['38L', '40L', '42L', '44L', '46L', '48L', '50L', '52L', '54L']
-ALL_SUIT_SIZES = REGULAR_SIZES + LONG_SIZES  # 19 total sizes
+from product_resolver import ProductIndex, describe_ambiguity, describe_miss
+from variant_rebuild import ALL_SUIT_SIZES, rebuild_variants, teardown_variants
 
-def generate_id(prefix=''):
-    """Generate a unique ID with optional prefix"""
-    return f"{prefix}{uuid.uuid4().hex[:24]}"
+# Database connection (settings come from DATABASE_URL)
+conn = medusa_db.connect()
+cursor = conn.cursor()
 
-def delete_old_variants(product_id, product_name):
-    """Delete existing variants for a product"""
-    print(f"  Deleting old variants for: {product_name}")
-    
-    # First get all variant IDs to clean up related data
-    cursor.execute("""
-        SELECT id FROM product_variant 
-        WHERE product_id = %s
-    """, (product_id,))
-    variant_ids = [row[0] for row in cursor.fetchall()]
-    
-    if variant_ids:
-        # Delete from product_variant_price_set
-        cursor.execute("""
-            DELETE FROM product_variant_price_set 
-            WHERE variant_id = ANY(%s)
-        """, (variant_ids,))
-        
-        # Delete variants
-        cursor.execute("""
-            DELETE FROM product_variant 
-            WHERE product_id = %s
-        """, (product_id,))
-        
-        print(f"    Deleted {len(variant_ids)} old variants")
-    
-    conn.commit()
-
-def create_variant_with_price(product_id, size, sku_base, price_cents):
-    """Create a variant with proper pricing structure"""
-    variant_id = generate_id('variant_')
-    price_set_id = generate_id('pset_')
-    price_id = generate_id('price_')
-    pvps_id = generate_id('pvps_')
-    price_rule_id = generate_id('prule_')
-    
-    # Create variant
-    cursor.execute("""
-        INSERT INTO product_variant (id, product_id, title, sku, manage_inventory, created_at, updated_at)
-        VALUES (%s, %s, %s, %s, false, NOW(), NOW())
-    """, (variant_id, product_id, size, f"{sku_base}-{size}", ))
-    
-    # Create price set
-    cursor.execute("""
-        INSERT INTO price_set (id, created_at, updated_at)
-        VALUES (%s, NOW(), NOW())
-    """, (price_set_id,))
-    
-    # Link variant to price set
-    cursor.execute("""
-        INSERT INTO product_variant_price_set (id, variant_id, price_set_id, created_at, updated_at)
-        VALUES (%s, %s, %s, NOW(), NOW())
-    """, (pvps_id, variant_id, price_set_id))
-    
-    # Create price
-    raw_amount = json.dumps({"value": str(price_cents), "precision": 20})
-    cursor.execute("""
-        INSERT INTO price (id, price_set_id, currency_code, amount, raw_amount, created_at, updated_at)
-        VALUES (%s, %s, 'usd', %s, %s::jsonb, NOW(), NOW())
-    """, (price_id, price_set_id, price_cents, raw_amount))
-    
-    # Add region rule
-    cursor.execute("""
-        INSERT INTO price_rule (id, value, priority, price_id, attribute, operator, created_at, updated_at)
-        VALUES (%s, %s, 0, %s, 'region_id', 'eq', NOW(), NOW())
-    """, (price_rule_id, REGION_ID, price_id))
+# Every product title, loaded once; lookups below are in memory
+index = ProductIndex.load(cursor)
 
 def fix_product(product_title, price_cents):
-    """Fix a single product by title"""
+    """Find a product by title and queue it for the bulk rebuild"""
     # Find product
-    cursor.execute("""
-        SELECT id, title, handle FROM product 
-        WHERE title = %s AND deleted_at IS NULL
-    """, (product_title,))
-    
-    result = cursor.fetchone()
-    if not result:
-        print(f"  ❌ Product not found: {product_title}")
+    resolution = index.resolve(product_title)
+    if not resolution.product:
+        print(f"  ❌ Product not found: {product_title} - {describe_miss(resolution)}")
+        return False
+    ambiguity = describe_ambiguity(resolution)
+    if ambiguity:
+        # Rebuilding an arbitrary one of them could wipe the wrong product
+        print(f"  ❌ Ambiguous title, skipped: {product_title} {ambiguity}")
         return False
     
-    product_id, title, handle = result
+    product_id, title, handle = resolution.product
+    if product_id in queued_titles:
+        # Another title already resolved to this product; rebuilding it twice
+        # would tear down the variants the first rebuild creates
+        print(f"  ⚠️  {product_title} is the same product as {queued_titles[product_id]} - already queued")
+        duplicate_titles.append((product_title, queued_titles[product_id]))
+        return True
     print(f"  ✅ Found product: {title}")
     
-    # Delete old variants
-    delete_old_variants(product_id, title)
-    
-    # Create new variants
+    # Queue the product; old variants are torn down and rebuilt for every product at once below
     sku_base = handle.upper().replace('-', '_')
-    for size in ALL_SUIT_SIZES:
-        create_variant_with_price(product_id, size, sku_base, price_cents)
-    
-    conn.commit()
-    print(f"    Created {len(ALL_SUIT_SIZES)} new variants at ${price_cents/100:.2f}")
+    pending_rebuilds.append((product_id, sku_base, price_cents))
+    queued_titles[product_id] = product_title
+    print(f"    Queued {len(ALL_SUIT_SIZES)} new variants at ${price_cents/100:.2f}")
     return True
 
 print("=" * 80)
@@ -126,8 +45,10 @@ print("FIXING SUITS & TUXEDOS - INSTANCE 1")
 print("=" * 80)
 
 # Track progress
-fixed_count = 0
 failed_products = []
+pending_rebuilds = []
+queued_titles = {}      # product id -> the input title that queued it
+duplicate_titles = []   # (input title, title that already queued the same product)
 
 print("\n📦 PROCESSING REGULAR SUITS ($229.99)")
 print("-" * 40)
@@ -164,9 +85,7 @@ regular_suits = [
 ]
 
 for suit in regular_suits:
-    if fix_product(suit, 22999):  # $229.99
-        fixed_count += 1
-    else:
+    if not fix_product(suit, 22999):  # $229.99
         failed_products.append(suit)
 
 print("\n🎩 PROCESSING $199.99 TUXEDOS")
@@ -187,9 +106,7 @@ tuxedos_199 = [
 ]
 
 for tux in tuxedos_199:
-    if fix_product(tux, 19999):  # $199.99
-        fixed_count += 1
-    else:
+    if not fix_product(tux, 19999):  # $199.99
         failed_products.append(tux)
 
 print("\n🎩 PROCESSING $229.99 TUXEDOS")
@@ -203,9 +120,7 @@ tuxedos_229 = [
 ]
 
 for tux in tuxedos_229:
-    if fix_product(tux, 22999):  # $229.99
-        fixed_count += 1
-    else:
+    if not fix_product(tux, 22999):  # $229.99
         failed_products.append(tux)
 
 print("\n💎 PROCESSING $249.99 TUXEDOS")
@@ -226,19 +141,29 @@ tuxedos_249 = [
 ]
 
 for tux in tuxedos_249:
-    if fix_product(tux, 24999):  # $249.99
-        fixed_count += 1
-    else:
+    if not fix_product(tux, 24999):  # $249.99
         failed_products.append(tux)
 
+print("\n🛠  REBUILDING VARIANTS AND PRICING")
+print("-" * 40)
+deleted = teardown_variants(cursor, [product_id for product_id, _, _ in pending_rebuilds])
+created = rebuild_variants(cursor, pending_rebuilds)
+conn.commit()
+for table, count in created.items():
+    print(f"  {table}: {deleted[table]} deleted, {count} created")
+
 print("\n" + "=" * 80)
 print("SUMMARY")
 print("=" * 80)
-print(f"✅ Successfully fixed: {fixed_count} products")
+print(f"✅ Successfully fixed: {len(pending_rebuilds)} products")
 print(f"❌ Failed/Not found: {len(failed_products)} products")
+if duplicate_titles:
+    print(f"⚠️  Titles matching an already queued product: {len(duplicate_titles)}")
+    for product_title, queued_title in duplicate_titles:
+        print(f"  - {product_title} (same product as {queued_title})")
 
 if failed_products:
-    print("\nProducts that couldn't be found:")
+    print("\nProducts that couldn't be found or matched several products:")
     for product in failed_products:
         print(f"  - {product}")
 
@@ -257,7 +182,7 @@ if result:
     print(f"  {result[0]}: {result[1]} variants")
 
 cursor.close()
-conn.close()
+medusa_db.release(conn)
 
 print("\n✅ SCRIPT COMPLETE!")
 print("Please test checkout with a few products to ensure everything works correctly.")
\ No newline at end of file
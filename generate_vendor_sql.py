@@ -1,268 +1,61 @@
 #!/usr/bin/env python3
 """
 Generate SQL import scripts for vendor products
+
+The feed is read one color at a time (vendor_feed) and each product is
+written to the script as soon as it is generated, as multi-row INSERTs
+(or COPY blocks with --copy, for psql), so memory use does not grow with
+the size of the feed. An output name ending in .gz is gzip-compressed.
+
+Repeated image URLs are dropped. With --check-images every image is
+HEAD-checked first (image_checker), and broken or duplicate files are left
+out; a color with no working image falls back to a placeholder. Images that
+could not be reached are kept, so an outage does not cause placeholders.
+
+Usage: python3 generate_vendor_sql.py [--input vendor_import_data.json]
+                                      [--output import.sql[.gz]] [--copy] [--check-images]
 """
-import json
+import argparse
+import time
 import uuid
-from datetime import datetime
-
-def generate_product_id():
-    """Generate a unique product ID"""
-    return f"prod_{uuid.uuid4().hex[:16]}"
-
-def generate_variant_id():
-    """Generate a unique variant ID"""
-    return f"var_{uuid.uuid4().hex[:16]}"
-
-def generate_price_id():
-    """Generate a unique price ID"""
-    return f"price_{uuid.uuid4().hex[:16]}"
-
-def generate_sql_for_product(base_sku, color, product_data):
-    """Generate SQL for a single product with all its variants"""
-    
-    product_id = generate_product_id()
-    handle = product_data['handle']
-    title = product_data['title'].replace("'", "''")  # Escape quotes
-    description = product_data['description'].replace("'", "''")
-    retail_price = product_data['retail_price']
-    vendor = product_data['vendor'].replace("'", "''")  # Escape quotes
-    images = product_data['images']
-    variants = product_data['variants']
-    
-    # Escape quotes in color name
-    color_escaped = color.replace("'", "''")
-    
-    # Start SQL script  
-    sql = f"""
--- ============================================
--- Product: {title.replace("''", "'")}
--- SKU Base: {base_sku} | Color: {color}
--- Total Variants: {len(variants)} | Stock: {product_data['total_stock']}
--- ============================================
-
--- Insert base product
-INSERT INTO product (
-    id, handle, title, subtitle, description, 
-    status, thumbnail, metadata, created_at, updated_at
-) VALUES (
-    '{product_id}',
-    '{handle}',
-    '{title}',
-    '{base_sku} - {color_escaped}',
-    '{description}',
-    'published',
-    '{images[0] if images else 'https://placehold.co/600x800?text=' + color.replace(' ', '+')}',
-    '{{"vendor": "{vendor}", "base_sku": "{base_sku}", "color": "{color_escaped}", "source": "shopify_vendor", "import_date": "{datetime.now().isoformat()}"}}',
-    NOW(), NOW()
-) ON CONFLICT (id) DO NOTHING;
-
--- Add product to store
+from datetime import datetime, timezone
+
+from image_checker import ImageChecker, dedupe, image_url, tally, unique_urls
+from sql_emitter import Raw, SqlEmitter, quote_literal
+from vendor_feed import iter_colors
+
+# Define retail prices
+RETAIL_PRICES = {
+    'M390SK': 229.99,
+    'M301H': 179.99,
+    'M341SK': 229.99,
+    'M392SK': 229.99
+}
+
+SIZE_SUFFIXES = ('/28W', '/30W', '/32W', '/34W', '/36W', '/38W')
+
+PRODUCT_COLUMNS = ['id', 'handle', 'title', 'subtitle', 'description',
+                   'status', 'thumbnail', 'metadata', 'created_at', 'updated_at']
+TAG_COLUMNS = ['product_id', 'value']
+VARIANT_COLUMNS = ['id', 'product_id', 'title', 'sku', 'barcode', 'manage_inventory',
+                   'allow_backorder', 'weight', 'metadata', 'created_at', 'updated_at']
+PRICE_SET_COLUMNS = ['id']
+VARIANT_PRICE_SET_COLUMNS = ['id', 'variant_id', 'price_set_id']
+PRICE_COLUMNS = ['id', 'currency_code', 'amount', 'raw_amount', 'price_set_id',
+                 'min_quantity', 'max_quantity', 'created_at', 'updated_at']
+IMAGE_COLUMNS = ['id', 'product_id', 'url', 'rank', 'metadata', 'created_at', 'updated_at']
+
+ADD_TO_STORE = """
 INSERT INTO product_sales_channel (product_id, sales_channel_id)
-SELECT '{product_id}', store.id
+SELECT {product_id}, store.id
 FROM store
 WHERE store.name = 'KCT Store'
-ON CONFLICT DO NOTHING;
-
--- Add product tags for SEO
-INSERT INTO product_tags (product_id, value)
-VALUES 
-    ('{product_id}', '{color.lower()}'),
-    ('{product_id}', 'suit'),
-    ('{product_id}', 'formal wear'),
-    ('{product_id}', 'wedding'),
-    ('{product_id}', 'prom'),
-    ('{product_id}', '{vendor.lower()}'),
-    ('{product_id}', '{base_sku.lower()}')
-ON CONFLICT DO NOTHING;
-
--- Create product variants
-DO $$
-DECLARE
-    v_variant_id TEXT;
-    v_price_id TEXT;
-    v_variant RECORD;
-    v_counter INT := 0;
-BEGIN
-    FOR v_variant IN 
-        SELECT * FROM (VALUES
-"""
-    
-    # Add variant data
-    for i, variant in enumerate(variants):
-        sku = variant['sku']
-        size = variant['size']
-        stock = variant['inventory']
-        weight = variant.get('weight', 1800)
-        barcode = variant.get('barcode', '')
-        
-        # Clean size for display
-        size_display = size.replace('/28W', '').replace('/30W', '').replace('/32W', '').replace('/34W', '').replace('/36W', '').replace('/38W', '')
-        
-        sql += f"        ('{sku}', '{size_display}', {stock}, {weight}, '{barcode}')"
-        if i < len(variants) - 1:
-            sql += ","
-        sql += "\n"
-    
-    sql += """    ) AS t(sku, size, stock, weight, barcode)
-    LOOP
-        v_variant_id := 'var_' || substr(gen_random_uuid()::text, 1, 16);
-        v_price_id := gen_random_uuid()::text;
-        v_counter := v_counter + 1;
-        
-        -- Insert variant
-        INSERT INTO product_variant (
-            id, product_id, title, sku, barcode,
-            manage_inventory, allow_backorder, 
-            weight, metadata, created_at, updated_at
-        ) VALUES (
-            v_variant_id,
-            '""" + product_id + """',
-            v_variant.size,
-            v_variant.sku,
-            v_variant.barcode,
-            false,  -- Don't manage inventory
-            true,   -- Allow backorder
-            v_variant.weight,
-            jsonb_build_object(
-                'size', v_variant.size,
-                'color', '""" + color_escaped + """',
-                'shopify_stock', v_variant.stock
-            ),
-            NOW(), NOW()
-        );
-        
-        -- Create price for variant
-        INSERT INTO price_set (id) VALUES (v_price_id);
-        
-        -- Link variant to price set
-        INSERT INTO product_variant_price_set (variant_id, price_set_id)
-        VALUES (v_variant_id, v_price_id);
-        
-        -- Add actual price
-        INSERT INTO price (
-            id, currency_code, amount, price_set_id,
-            min_quantity, max_quantity, created_at, updated_at
-        ) VALUES (
-            'price_' || substr(gen_random_uuid()::text, 1, 16),
-            'usd',
-            """ + str(int(retail_price * 100)) + """,  -- Convert to cents
-            v_price_id,
-            1, null,
-            NOW(), NOW()
-        );
-        
-    END LOOP;
-    
-    RAISE NOTICE 'Created % variants for product', v_counter;
-END $$;
-
--- Add product images
-"""
-    
-    # Add images
-    for i, image_url in enumerate(images[:5]):  # Limit to 5 images
-        sql += f"""
-INSERT INTO product_image (
-    id, product_id, url, rank, metadata, created_at, updated_at
-) VALUES (
-    'img_{uuid.uuid4().hex[:16]}',
-    '{product_id}',
-    '{image_url}',
-    {i},
-    '{{"color": "{color_escaped}"}}',
-    NOW(), NOW()
-) ON CONFLICT DO NOTHING;
+ON CONFLICT DO NOTHING
 """
-    
-    sql += f"""
--- Add to US region pricing
-INSERT INTO product_variant_price_set pvps
-SELECT 
-    pv.id as variant_id,
-    ps.id as price_set_id
-FROM product_variant pv
-CROSS JOIN (SELECT gen_random_uuid()::text as id) ps
-WHERE pv.product_id = '{product_id}'
-ON CONFLICT DO NOTHING;
-
-COMMIT;
-"""
-    
-    return sql
-
-def main():
-    print("📝 Generating SQL Import Scripts")
-    print("=" * 70)
-    
-    # Load the vendor data
-    with open('vendor_import_data.json', 'r') as f:
-        import_data = json.load(f)
-    
-    # Process each product
-    all_sql = """-- ============================================
--- VENDOR PRODUCT IMPORT SQL
--- Generated: """ + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + """
--- Products: M390SK, M301H, M341SK, M392SK
--- ============================================
-
-BEGIN;
-
-"""
-    
-    product_count = 0
-    variant_count = 0
-    
-    # Define retail prices
-    retail_prices = {
-        'M390SK': 229.99,
-        'M301H': 179.99,
-        'M341SK': 229.99,
-        'M392SK': 229.99
-    }
-    
-    for base_sku, sku_data in import_data['products'].items():
-        print(f"\n📦 Processing {base_sku}:")
-        
-        for color, color_data in sku_data['colors'].items():
-            # Skip colors with no stock (optional - remove this if you want all colors)
-            if color_data['total_stock'] == 0 and base_sku == 'M301H':
-                print(f"   ⚠️ Skipping {color} (no stock)")
-                continue
-            
-            print(f"   🎨 {color}: {len(color_data['variants'])} variants, {color_data['total_stock']} stock")
-            
-            # Prepare product data
-            product_data = {
-                'handle': color_data['handle'],
-                'title': color_data['title'],
-                'description': color_data['description'],
-                'retail_price': retail_prices[base_sku],
-                'vendor': color_data['vendor'],
-                'images': color_data['images'],
-                'variants': color_data['variants'],
-                'total_stock': color_data['total_stock']
-            }
-            
-            # Generate SQL for this product
-            product_sql = generate_sql_for_product(base_sku, color, product_data)
-            all_sql += product_sql + "\n\n"
-            
-            product_count += 1
-            variant_count += len(color_data['variants'])
-    
-    # Add final commit
-    all_sql += """
--- ============================================
--- IMPORT COMPLETE
--- Products Created: """ + str(product_count) + """
--- Variants Created: """ + str(variant_count) + """
--- ============================================
-
-COMMIT;
 
+VERIFY_SQL = """
 -- Verify import
-SELECT 
+SELECT
     p.handle,
     p.title,
     COUNT(DISTINCT pv.id) as variant_count,
@@ -273,23 +66,197 @@ FROM product p
 LEFT JOIN product_variant pv ON pv.product_id = p.id
 LEFT JOIN product_variant_price_set pvps ON pvps.variant_id = pv.id
 LEFT JOIN price pr ON pr.price_set_id = pvps.price_set_id
-WHERE p.metadata->>'source' = 'shopify_vendor'
+WHERE p.metadata @> '{"source": "shopify_vendor"}'
 GROUP BY p.id, p.handle, p.title, p.metadata
 ORDER BY p.metadata->>'base_sku', p.metadata->>'color';
 """
-    
-    # Save SQL file
-    filename = f"import_vendor_products_{datetime.now().strftime('%Y%m%d_%H%M%S')}.sql"
-    with open(filename, 'w') as f:
-        f.write(all_sql)
-    
+
+
+def generate_id(prefix):
+    """Generate a unique ID with the given prefix"""
+    return f"{prefix}{uuid.uuid4().hex[:16]}"
+
+
+def display_size(size):
+    """Clean size for display ("38R/32W" -> "38R")"""
+    for suffix in SIZE_SUFFIXES:
+        size = size.replace(suffix, '')
+    return size
+
+
+def emit_product(sql, base_sku, color, product_data, now, import_date):
+    """Write one product with its tags, variants, prices and images
+
+    now is the value of every created_at/updated_at column (see write_script).
+    """
+    product_id = generate_id('prod_')
+    title = product_data['title']
+    vendor = product_data['vendor']
+    images = product_data['images']
+    variants = product_data['variants']
+    amount = int(product_data['retail_price'] * 100)  # Convert to cents
+
+    sql.write("\n")
+    sql.comment("=" * 44)
+    sql.comment(f"Product: {title}")
+    sql.comment(f"SKU Base: {base_sku} | Color: {color}")
+    sql.comment(f"Total Variants: {len(variants)} | Stock: {product_data['total_stock']}")
+    sql.comment("=" * 44)
+
+    metadata = {"vendor": vendor, "base_sku": base_sku, "color": color,
+                "source": "shopify_vendor", "import_date": import_date}
+    thumbnail = images[0] if images else 'https://placehold.co/600x800?text=' + color.replace(' ', '+')
+    sql.rows('product', PRODUCT_COLUMNS, [(
+        product_id, product_data['handle'], title, f"{base_sku} - {color}",
+        product_data['description'], 'published', thumbnail, metadata, now, now,
+    )], on_conflict='ON CONFLICT (id) DO NOTHING')
+
+    # Add product to store
+    sql.statement(ADD_TO_STORE.format(product_id=quote_literal(product_id)))
+
+    # Add product tags for SEO
+    tags = [color.lower(), 'suit', 'formal wear', 'wedding', 'prom', vendor.lower(), base_sku.lower()]
+    sql.rows('product_tags', TAG_COLUMNS, [(product_id, tag) for tag in tags],
+             on_conflict='ON CONFLICT DO NOTHING')
+
+    # Variants, one price set and one USD price each
+    variant_rows, price_set_rows, link_rows, price_rows = [], [], [], []
+    for variant in variants:
+        variant_id = generate_id('var_')
+        price_set_id = generate_id('pset_')
+        size = display_size(variant['size'])
+        variant_rows.append((
+            variant_id, product_id, size, variant['sku'], variant.get('barcode', ''),
+            False,  # Don't manage inventory
+            True,   # Allow backorder
+            variant.get('weight', 1800),
+            {"size": size, "color": color, "shopify_stock": variant['inventory']},
+            now, now,
+        ))
+        price_set_rows.append((price_set_id,))
+        link_rows.append((generate_id('pvps_'), variant_id, price_set_id))
+        price_rows.append((
+            generate_id('price_'), 'usd', amount, {"value": str(amount), "precision": 20},
+            price_set_id, 1, None, now, now,
+        ))
+    sql.rows('product_variant', VARIANT_COLUMNS, variant_rows)
+    sql.rows('price_set', PRICE_SET_COLUMNS, price_set_rows)
+    sql.rows('product_variant_price_set', VARIANT_PRICE_SET_COLUMNS, link_rows)
+    sql.rows('price', PRICE_COLUMNS, price_rows)
+
+    # Add product images (limit to 5)
+    sql.rows('product_image', IMAGE_COLUMNS, [
+        (generate_id('img_'), product_id, url, rank, {"color": color}, now, now)
+        for rank, url in enumerate(images[:5])
+    ], on_conflict='ON CONFLICT DO NOTHING')
+
+    return len(variants)
+
+
+def check_feed_images(path):
+    """{url: ImageCheck} for every image in the feed"""
+    start = time.perf_counter()
+    with ImageChecker() as checker:
+        checks = checker.check(image_url(image) for _, _, color_data in iter_colors(path)
+                               for image in color_data['images'])
+    checked, broken, unreachable = tally(checks)
+    print(f"🔗 Checked {checked} image URLs in {time.perf_counter() - start:.2f}s "
+          f"({checker.cached} cached): {broken} broken, {unreachable} unreachable")
+    if unreachable:
+        print(f"⚠️  {unreachable} unreachable images were kept unchecked; re-run to verify them")
+    return checks
+
+
+def vendor_products(records, image_checks=None):
+    """Yield (base_sku, color, product_data) for every feed record that should be imported
+
+    records are (base_sku, color, color_data), as vendor_feed.iter_colors() yields them.
+    With image_checks (from check_feed_images) broken images are left out.
+    """
+    current_sku = None
+    for base_sku, color, color_data in records:
+        if base_sku != current_sku:
+            print(f"\n📦 Processing {base_sku}:")
+            current_sku = base_sku
+
+        # Skip colors with no stock (optional - remove this if you want all colors)
+        if color_data['total_stock'] == 0 and base_sku == 'M301H':
+            print(f"   ⚠️ Skipping {color} (no stock)")
+            continue
+
+        print(f"   🎨 {color}: {len(color_data['variants'])} variants, {color_data['total_stock']} stock")
+
+        yield base_sku, color, {
+            'handle': color_data['handle'],
+            'title': color_data['title'],
+            'description': color_data['description'],
+            'retail_price': RETAIL_PRICES[base_sku],
+            'vendor': color_data['vendor'],
+            'images': (dedupe(color_data['images'], image_checks) if image_checks is not None
+                       else unique_urls(color_data['images'])),
+            'variants': color_data['variants'],
+            'total_stock': color_data['total_stock']
+        }
+
+
+def write_script(sql, products):
+    """Write the whole import as one transaction; returns (product_count, variant_count)"""
+    # Row timestamps are the importing transaction's NOW(), as in vendor_loader.
+    # COPY data cannot hold an expression, so COPY scripts carry the generation
+    # time instead, in UTC so the importing session's TimeZone cannot shift it.
+    generated = datetime.now(timezone.utc)
+    now = generated if sql.copy else Raw('NOW()')
+    sql.comment("=" * 44)
+    sql.comment("VENDOR PRODUCT IMPORT SQL")
+    sql.comment("Generated: " + generated.strftime("%Y-%m-%d %H:%M:%S UTC"))
+    sql.comment("Products: " + ", ".join(RETAIL_PRICES))
+    sql.comment("=" * 44)
+    sql.write("\nSET standard_conforming_strings = on;\n\nBEGIN;\n")
+
+    product_count = 0
+    variant_count = 0
+    for base_sku, color, product_data in products:
+        variant_count += emit_product(sql, base_sku, color, product_data, now, generated.isoformat())
+        product_count += 1
+
+    sql.write("\n")
+    sql.comment("=" * 44)
+    sql.comment("IMPORT COMPLETE")
+    sql.comment(f"Products Created: {product_count}")
+    sql.comment(f"Variants Created: {variant_count}")
+    sql.comment("=" * 44)
+    sql.write("\nCOMMIT;\n")
+    sql.write(VERIFY_SQL)
+    return product_count, variant_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the vendor product import SQL")
+    parser.add_argument('--input', default='vendor_import_data.json', help="vendor import JSON")
+    parser.add_argument('--output', help="output file; .gz is compressed "
+                                         "(default import_vendor_products_<timestamp>.sql)")
+    parser.add_argument('--copy', action='store_true', help="emit COPY blocks (psql only) instead of INSERTs")
+    parser.add_argument('--check-images', action='store_true', help="HEAD-check image URLs and skip broken ones")
+    args = parser.parse_args()
+
+    print("📝 Generating SQL Import Scripts")
+    print("=" * 70)
+
+    image_checks = check_feed_images(args.input) if args.check_images else None
+
+    filename = args.output or f"import_vendor_products_{datetime.now().strftime('%Y%m%d_%H%M%S')}.sql"
+    with SqlEmitter.open(filename, copy=args.copy) as sql:
+        product_count, variant_count = write_script(sql, vendor_products(iter_colors(args.input), image_checks))
+
     print(f"\n✅ SQL script generated: {filename}")
     print(f"📊 Summary:")
     print(f"   • Products: {product_count}")
     print(f"   • Variants: {variant_count}")
     print(f"   • Average variants per product: {variant_count // product_count if product_count > 0 else 0}")
-    
+    print(f"   • Statements: {sql.statements} ({sql.row_count} rows)")
+
     return filename
 
+
 if __name__ == "__main__":
-    filename = main()
\ No newline at end of file
+    filename = main()
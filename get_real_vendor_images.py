@@ -1,45 +1,51 @@
 #!/usr/bin/env python3
 """
 Get actual image URLs from Shopify vendor for our products
+
+Every image URL is HEAD-checked (image_checker) before it is used: broken
+and duplicate images are dropped, and each color keeps its best image.
+Images that could not be reached are kept unchecked rather than dropped.
+Pass --no-check to use the URLs exactly as Shopify lists them, and --apply
+to update the thumbnails in place instead of writing an SQL script.
 """
-import requests
+import argparse
 import json
 import os
+import time
+
+from psycopg2.extras import execute_values
 
-SHOPIFY_DOMAIN = "suits-inventory.myshopify.com"
+import medusa_db
+from image_checker import ImageChecker, best_image, dedupe, tally
+from product_metadata import jsonb_literal
+from shopify_catalog import ShopifyAPIError, iter_products
+from sku_parser import parse_sku
 TARGET_SKUS = ['M390SK', 'M301H', 'M341SK', 'M392SK']
 
+# One statement for every thumbnail; a color-specific image (rank 1) wins over
+# the base SKU's default (rank 0), as it does in the generated script
+APPLY_THUMBNAILS = """
+    UPDATE product p
+    SET thumbnail = best.thumbnail, updated_at = NOW()
+    FROM (
+        SELECT DISTINCT ON (p.id) p.id, u.thumbnail
+        FROM product p
+        JOIN (VALUES %s) AS u (filter, thumbnail, rank) ON p.metadata @> u.filter::jsonb
+        ORDER BY p.id, u.rank DESC
+    ) best
+    WHERE p.id = best.id AND p.thumbnail IS DISTINCT FROM best.thumbnail
+"""
+
 def get_product_images(access_token):
     """Fetch actual product images from Shopify"""
-    base_url = f"https://{SHOPIFY_DOMAIN}/admin/api/2024-01/products.json"
-    headers = {
-        'X-Shopify-Access-Token': access_token,
-        'Content-Type': 'application/json'
-    }
-    
-    all_products = []
-    params = {'limit': 250}
-    
-    # Fetch products
-    for page in range(1, 5):
-        response = requests.get(base_url, headers=headers, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            products = data.get('products', [])
-            all_products.extend(products)
-            if len(products) < 250:
-                break
-        else:
-            break
-    
     # Find our target products and extract real image URLs
     image_mapping = {}
     
-    for product in all_products:
+    for product in iter_products(access_token):
         # Check if this is one of our target products
         for variant in product.get('variants', []):
             sku = variant.get('sku', '')
-            base_sku = sku.split('-')[0] if '-' in sku else sku
+            base_sku = parse_sku(sku).base
             
             if base_sku in TARGET_SKUS:
                 if base_sku not in image_mapping:
@@ -70,6 +76,22 @@ def get_product_images(access_token):
     
     return image_mapping
 
+def validate_images(image_mapping, checker):
+    """Drop broken images and repeats of the same file; keep the best per color
+
+    Returns (distinct URLs, broken, unreachable), as image_checker.tally() counts them.
+    """
+    urls = [url for data in image_mapping.values()
+            for url in data['images'] + [u for imgs in data['colors'].values() for u in imgs]]
+    checks = checker.check(urls)
+
+    for data in image_mapping.values():
+        data['images'] = dedupe(data['images'], checks)
+        for color, color_images in data['colors'].items():
+            best = best_image(color_images, checks)
+            data['colors'][color] = [best] if best else []
+    return tally(checks)
+
 def generate_update_sql(image_mapping):
     """Generate SQL to update product images with real URLs"""
     sql = """-- Update vendor products with actual Shopify image URLs
@@ -86,22 +108,17 @@ BEGIN;
 -- Update {base_sku} products with real images
 UPDATE product 
 SET thumbnail = '{default_image}'
-WHERE metadata->>'base_sku' = '{base_sku}'
-AND metadata->>'source' = 'shopify_vendor';
+WHERE metadata @> {jsonb_literal({'source': 'shopify_vendor', 'base_sku': base_sku})};
 """
             
             # Add color-specific images if available
             for color, color_images in data['colors'].items():
                 if color_images:
-                    # Escape single quotes in color name
-                    color_escaped = color.replace("'", "''")
                     sql += f"""
 -- Update {base_sku} {color} variant
 UPDATE product 
 SET thumbnail = '{color_images[0]}'
-WHERE metadata->>'base_sku' = '{base_sku}'
-AND metadata->>'color' = '{color_escaped}'
-AND metadata->>'source' = 'shopify_vendor';
+WHERE metadata @> {jsonb_literal({'source': 'shopify_vendor', 'base_sku': base_sku, 'color': color})};
 """
     
     sql += """
@@ -120,7 +137,27 @@ ORDER BY metadata->>'base_sku', metadata->>'color';
     
     return sql
 
+def thumbnail_updates(image_mapping):
+    """Yield (metadata filter, thumbnail url, rank) for every thumbnail to set"""
+    for base_sku, data in image_mapping.items():
+        if data['images']:
+            yield (json.dumps({'source': 'shopify_vendor', 'base_sku': base_sku}), data['images'][0], 0)
+            for color, color_images in data['colors'].items():
+                if color_images:
+                    yield (json.dumps({'source': 'shopify_vendor', 'base_sku': base_sku, 'color': color}),
+                           color_images[0], 1)
+
+def apply_updates(cursor, image_mapping):
+    """Set the thumbnails in place, in one statement; returns products changed"""
+    execute_values(cursor, APPLY_THUMBNAILS, list(thumbnail_updates(image_mapping)), page_size=10000)
+    return cursor.rowcount
+
 def main():
+    parser = argparse.ArgumentParser(description="Point vendor product thumbnails at their Shopify images")
+    parser.add_argument('--no-check', action='store_true', help="use the image URLs without HEAD-checking them")
+    parser.add_argument('--apply', action='store_true', help="update the database instead of writing an SQL script")
+    args = parser.parse_args()
+
     print("🔍 Fetching actual vendor product images...")
     
     access_token = os.getenv('SHOPIFY_ACCESS_TOKEN')
@@ -128,13 +165,26 @@ def main():
         print("❌ No access token provided.")
         return
     
-    image_mapping = get_product_images(access_token)
+    try:
+        image_mapping = get_product_images(access_token)
+    except ShopifyAPIError as e:
+        print(f"❌ {e}")
+        return
     
     if not image_mapping:
         print("❌ No images found for target products")
         return
     
     print(f"✅ Found images for {len(image_mapping)} products")
+    
+    if not args.no_check:
+        start = time.perf_counter()
+        with ImageChecker() as checker:
+            checked, broken, unreachable = validate_images(image_mapping, checker)
+        print(f"🔗 Checked {checked} image URLs in {time.perf_counter() - start:.2f}s "
+              f"({checker.cached} cached): {broken} broken, {unreachable} unreachable")
+        if unreachable:
+            print(f"⚠️  {unreachable} unreachable images were kept unchecked; re-run to verify them")
     print()
     
     # Display found images
@@ -149,6 +199,13 @@ def main():
                 print(f"     • {color}: {len(imgs)} images")
         print()
     
+    if args.apply:
+        # Update the database directly instead of writing a script
+        with medusa_db.connection() as conn, conn.cursor() as cursor:
+            changed = apply_updates(cursor, image_mapping)
+        print(f"✅ Updated thumbnails on {changed} products")
+        return
+
     # Generate SQL
     sql = generate_update_sql(image_mapping)
     
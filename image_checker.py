@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Concurrent validation of product image URLs.
+
+ImageChecker.check() HEADs every distinct URL on a thread pool that shares
+one keep-alive session, so checking thousands of images costs a few round
+trips per connection rather than one per image. URLs are normalised first
+(scheme and host case, default ports, fragments, Shopify's ?v= cache
+buster), so the same file listed several ways is only requested once.
+
+Results are cached in a SQLite file and reused for MAX_AGE. Set
+IMAGE_CHECK_CACHE to choose the file, or to "off" to always check.
+Connection errors and timeouts are never cached.
+
+unique_urls() drops repeats by normalised URL without any requests.
+dedupe() drops the images the server answered as broken (a 404, or not an
+image) and repeats of the same file, by normalised URL and by strong ETag,
+which the CDN derives from the file's bytes. ETags are only compared within
+one host, and an image with no strong ETag is only a repeat of the same
+URL. An image that could not be reached (timeout, connection error) is
+kept as listed, so an outage or throttling does not strip working images.
+best_image() picks the first survivor of a preference-ordered candidate
+list.
+
+  python3 image_checker.py https://cdn.shopify.com/s/files/.../M341SK-03.jpg ...
+"""
+import argparse
+import os
+import sqlite3
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_CACHE = 'image_checks.sqlite3'
+DEFAULT_WORKERS = 32
+DEFAULT_TIMEOUT = 10
+MAX_AGE = 7 * 24 * 3600  # seconds a cached result is trusted
+
+CACHE_BUSTING_PARAMS = {'v'}
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+HEAD_UNSUPPORTED = {405, 501}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS image_checks (
+    url TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    content_type TEXT,
+    content_length INTEGER,
+    etag TEXT,
+    checked_at REAL NOT NULL
+);
+"""
+
+
+class ImageCheck(namedtuple('ImageCheck', 'url status content_type content_length etag')):
+    """Outcome of one HEAD; status is None when the server could not be reached"""
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        """The URL answers 200 with an image"""
+        return self.status == 200 and (self.content_type or '').startswith('image/')
+
+    @property
+    def broken(self):
+        """The server answered, and not with an image"""
+        return self.status is not None and not self.ok
+
+    @property
+    def content_key(self):
+        """Identifies the file behind the URL, for spotting the same image under two URLs
+
+        A weak ETag (W/) does not promise identical bytes, so it is not used.
+        """
+        if self.etag and not self.etag.startswith('W/'):
+            return ('etag', urlsplit(self.url).netloc, self.etag)
+        return ('url', self.url)
+
+
+def image_cache_path():
+    """Return the configured cache path, or None when caching is off"""
+    path = os.getenv('IMAGE_CHECK_CACHE', DEFAULT_CACHE)
+    return None if path.lower() == 'off' else path
+
+
+def image_url(image):
+    """URL of a feed image, which is either the URL itself or a Shopify image object"""
+    return image.get('src', '') if isinstance(image, dict) else (image or '')
+
+
+def normalize_url(url):
+    """Canonical form of an image URL, for deduplication"""
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or 'https').lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if key not in CACHE_BUSTING_PARAMS)
+    return urlunsplit((scheme, host, parts.path or '/', urlencode(query), ''))
+
+
+def create_session(pool_size=DEFAULT_WORKERS):
+    """Keep-alive session whose connection pool fits pool_size concurrent checks"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class ImageChecker:
+    """HEAD-checks image URLs concurrently, with an on-disk result cache"""
+
+    def __init__(self, cache_path=None, workers=DEFAULT_WORKERS, timeout=DEFAULT_TIMEOUT, max_age=MAX_AGE):
+        self.cache_path = cache_path if cache_path is not None else image_cache_path()
+        self.workers = workers
+        self.timeout = timeout
+        self.max_age = max_age
+        self.session = create_session(workers)
+        self.conn = None
+        if self.cache_path:
+            self.conn = sqlite3.connect(self.cache_path)
+            self.conn.executescript(SCHEMA)
+        self.requested = 0
+        self.cached = 0
+        self.unreachable = 0
+
+    def close(self):
+        self.session.close()
+        if self.conn:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _head(self, url):
+        """Check one normalised URL"""
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+            if response.status_code in HEAD_UNSUPPORTED:
+                response = self.session.get(url, stream=True, timeout=self.timeout)
+                response.close()
+        except requests.RequestException:
+            return ImageCheck(url, None, None, None, None)
+        headers = response.headers
+        length = headers.get('Content-Length')
+        return ImageCheck(url, response.status_code, headers.get('Content-Type'),
+                          int(length) if length and length.isdigit() else None, headers.get('ETag'))
+
+    def _load(self, urls):
+        """Fresh cached checks for urls, keyed by URL"""
+        if not self.conn or not urls:
+            return {}
+        oldest = time.time() - self.max_age
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (url TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM wanted")
+        self.conn.executemany("INSERT OR IGNORE INTO wanted VALUES (?)", ((url,) for url in urls))
+        rows = self.conn.execute("""
+            SELECT c.url, c.status, c.content_type, c.content_length, c.etag
+            FROM image_checks c JOIN wanted w ON w.url = c.url
+            WHERE c.checked_at >= ?
+        """, (oldest,))
+        return {row[0]: ImageCheck(*row) for row in rows}
+
+    def _store(self, checks):
+        """Cache every check that reached the server"""
+        if not self.conn:
+            return
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO image_checks VALUES (?, ?, ?, ?, ?, ?)",
+                [(*check, now) for check in checks if check.status is not None])
+
+    def check(self, urls):
+        """{url: ImageCheck} for every url given; each distinct file is requested at most once"""
+        urls = {url for url in map(image_url, urls) if url}
+        normalized = {url: normalize_url(url) for url in urls}
+        distinct = set(normalized.values())
+
+        checks = self._load(distinct)
+        self.cached += len(checks)
+        pending = sorted(distinct - checks.keys())
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(pending))) as pool:
+                fetched = list(pool.map(self._head, pending))
+            self.requested += len(fetched)
+            self.unreachable += sum(1 for check in fetched if check.status is None)
+            self._store(fetched)
+            checks.update((check.url, check) for check in fetched)
+
+        return {url: checks[normal] for url, normal in normalized.items()}
+
+
+def tally(checks):
+    """(distinct URLs, broken, unreachable) in a check() result"""
+    distinct = {check.url: check for check in checks.values()}.values()
+    unreachable = sum(1 for check in distinct if check.status is None)
+    broken = sum(1 for check in distinct if check.broken)
+    return len(distinct), broken, unreachable
+
+
+def unique_urls(images):
+    """URLs of the images, in order, each normalised URL once"""
+    kept, seen = [], set()
+    for image in images:
+        url = image_url(image)
+        if url and normalize_url(url) not in seen:
+            seen.add(normalize_url(url))
+            kept.append(url)
+    return kept
+
+
+def dedupe(images, checks):
+    """URLs of the images that are not broken, in order, each file once
+
+    Unreachable images are kept; with no response they only match their own URL.
+    """
+    kept, seen = [], set()
+    for image in images:
+        check = checks.get(image_url(image))
+        if check is None or check.broken:
+            continue
+        keys = {check.url, check.content_key}
+        if seen.isdisjoint(keys):
+            kept.append(image_url(image))
+        seen.update(keys)
+    return kept
+
+
+def best_image(candidates, checks):
+    """The most preferred candidate that is not broken, or None"""
+    kept = dedupe(candidates, checks)
+    return kept[0] if kept else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that image URLs resolve")
+    parser.add_argument('urls', nargs='+', help="image URLs")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="concurrent requests")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with ImageChecker(workers=args.workers) as checker:
+        checks = checker.check(args.urls)
+    for url in args.urls:
+        check = checks[url]
+        mark = '✅' if check.ok else '❌'
+        print(f"{mark} {check.status or 'unreachable'} {check.content_type or '-'} "
+              f"{check.content_length or '-'} {url}")
+    print(f"\n{checker.requested} requested, {checker.cached} cached, "
+          f"{time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
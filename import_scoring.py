@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Import priority scoring for the vendor catalog.
+
+A ScoringModel is built from a JSON config (import_scoring.json by default,
+or the file named by IMPORT_SCORING_CONFIG):
+
+  features        name -> {"column", "weight", "above" or "from", "points"}
+                  column is a CatalogFrame column (total_stock, min_price,
+                  avg_price, variants_count). Its edges split values into
+                  len(edges) + 1 bands, and each band is worth the matching
+                  points times weight. With "above", a value must be greater
+                  than an edge to reach the next band (stock > 50). With
+                  "from", the edge itself is the lower bound of the next
+                  band (150 <= price < 200).
+  vendor_boosts   vendor -> points added to every product of that vendor
+
+Scores are computed for a whole CatalogFrame at once: each feature is one
+np.digitize plus a lookup into its points. top_k() takes the best products
+with np.partition instead of sorting the catalog. explain() breaks one
+product's score down by feature.
+
+Run it on its own to re-rank the catalog with other weights or boosts:
+
+  python3 import_scoring.py --top 50 --weight stock=2 --boost Statement=15
+  python3 import_scoring.py --config my_scoring.json --explain
+"""
+import argparse
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from catalog_frame import CatalogFrame
+from catalog_snapshot import iter_catalog
+from shopify_catalog import ShopifyAPIError
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'import_scoring.json')
+
+FEATURE_COLUMNS = ('total_stock', 'min_price', 'avg_price', 'variants_count')
+
+# One line of explain(): what the product has, which band that falls in, points earned
+Contribution = namedtuple('Contribution', 'feature value band points')
+
+
+class ScoringConfigError(ValueError):
+    """Raised when a scoring config is malformed"""
+
+
+def config_path():
+    """Return the configured scoring config path"""
+    return os.getenv('IMPORT_SCORING_CONFIG', DEFAULT_CONFIG)
+
+
+def _band_labels(edges, above):
+    """Human-readable range of each band"""
+    edges = [f"{edge:g}" for edge in edges]
+    if above:
+        first, middle, last = "<= {}", "({}, {}]", "> {}"
+    else:
+        first, middle, last = "< {}", "[{}, {})", ">= {}"
+    return ([first.format(edges[0])] + [middle.format(low, high) for low, high in zip(edges, edges[1:])]
+            + [last.format(edges[-1])])
+
+
+class Feature:
+    """One banded feature: column value -> band -> weighted points"""
+
+    def __init__(self, name, spec):
+        self.name = name
+        if not isinstance(spec, dict):
+            raise ScoringConfigError(f"{name}: expected an object")
+        self.column = spec.get('column')
+        if self.column not in FEATURE_COLUMNS:
+            raise ScoringConfigError(f"{name}: column must be one of {', '.join(FEATURE_COLUMNS)}")
+        if ('above' in spec) == ('from' in spec):
+            raise ScoringConfigError(f"{name}: give exactly one of 'above' or 'from' edges")
+        self.above = 'above' in spec
+        try:
+            self.edges = np.array(spec['above' if self.above else 'from'], dtype=np.float64)
+            self.weight = float(spec.get('weight', 1))
+            self.points = np.array(spec['points'], dtype=np.float64) * self.weight
+        except (KeyError, TypeError, ValueError) as e:
+            raise ScoringConfigError(f"{name}: edges, points and weight must be numbers ({e})")
+        if self.edges.ndim != 1 or not self.edges.size or np.any(np.diff(self.edges) <= 0):
+            raise ScoringConfigError(f"{name}: edges must be a non-empty, strictly increasing list")
+        if self.points.shape != (self.edges.size + 1,):
+            raise ScoringConfigError(f"{name}: {self.edges.size} edges need {self.edges.size + 1} points")
+        self.labels = _band_labels(self.edges, self.above)
+
+    def bands(self, values):
+        """Band index of each value"""
+        return np.digitize(values, self.edges, right=self.above)
+
+
+class ScoringModel:
+    """Weighted banded features plus per-vendor boosts"""
+
+    def __init__(self, config):
+        features = config.get('features') if isinstance(config, dict) else None
+        if not isinstance(features, dict) or not features:
+            raise ScoringConfigError("config needs a non-empty 'features' object")
+        if 'vendor' in features:
+            raise ScoringConfigError("'vendor' is reserved for vendor_boosts")
+        self.features = [Feature(name, spec) for name, spec in features.items()]
+        boosts = config.get('vendor_boosts', {})
+        try:
+            self.vendor_boosts = {vendor: float(points) for vendor, points in boosts.items()}
+        except (AttributeError, TypeError, ValueError) as e:
+            raise ScoringConfigError(f"vendor_boosts must map vendors to numbers ({e})")
+
+    @classmethod
+    def load(cls, path=None):
+        """Model from a JSON config file (default: config_path())"""
+        path = path or config_path()
+        try:
+            with open(path) as f:
+                config = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ScoringConfigError(f"{path}: {e}")
+        return cls(config)
+
+    def _vendor_points(self, frame):
+        """Boost of every product's vendor"""
+        by_code = np.array([self.vendor_boosts.get(vendor, 0.0) for vendor in frame.vendors])
+        return by_code[frame.vendor_codes] if by_code.size else np.zeros(len(frame))
+
+    def contributions(self, frame):
+        """{feature: points array} for every product, vendor boost included"""
+        points = {feature.name: feature.points[feature.bands(getattr(frame, feature.column))]
+                  for feature in self.features}
+        points['vendor'] = self._vendor_points(frame)
+        return points
+
+    def score(self, frame):
+        """Import priority score of every product in the frame"""
+        return sum(self.contributions(frame).values())
+
+    def top_k(self, frame, k, scores=None):
+        """Indices of the k best priced products, best first
+
+        Ties are ordered by category (first-seen), then catalog order. Every
+        product tied with the k-th best score is kept until that tiebreak
+        has picked which ones make the cut.
+        """
+        if scores is None:
+            scores = self.score(frame)
+        candidates = np.flatnonzero(frame.priced)
+        if 0 < k < candidates.size:
+            cut = candidates.size - k
+            kth = np.partition(scores[candidates], cut)[cut]
+            candidates = candidates[scores[candidates] >= kth]
+        order = np.lexsort((candidates, frame.type_codes[candidates], -scores[candidates]))
+        return candidates[order[:max(k, 0)]]
+
+    def explain(self, frame, index):
+        """[Contribution] making up one product's score"""
+        lines = []
+        for feature in self.features:
+            value = getattr(frame, feature.column)[index].item()
+            band = feature.bands(value)
+            lines.append(Contribution(feature.name, value, feature.labels[band], feature.points[band]))
+        vendor = frame.vendors[frame.vendor_codes[index]]
+        boosted = vendor in self.vendor_boosts
+        lines.append(Contribution('vendor', vendor, 'boosted' if boosted else 'no boost',
+                                  self.vendor_boosts.get(vendor, 0.0)))
+        return lines
+
+
+def format_explanation(contributions):
+    """One-line summary of explain()"""
+    return ' | '.join(f"{c.feature} {c.band} {c.points:+g}" for c in contributions)
+
+
+def _override(config, option, values):
+    """Apply NAME=NUMBER command-line overrides to config"""
+    for value in values:
+        name, _, number = value.partition('=')
+        try:
+            number = float(number)
+        except ValueError:
+            raise ScoringConfigError(f"--{option} {value}: expected NAME=NUMBER")
+        if option == 'weight':
+            if name not in config['features']:
+                raise ScoringConfigError(f"--weight {value}: no feature named {name}")
+            config['features'][name]['weight'] = number
+        else:
+            config.setdefault('vendor_boosts', {})[name] = number
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank vendor products by import priority")
+    parser.add_argument('--config', help="scoring config JSON (default: IMPORT_SCORING_CONFIG or import_scoring.json)")
+    parser.add_argument('--top', type=int, default=20, help="products to list")
+    parser.add_argument('--weight', action='append', default=[], metavar='FEATURE=W', help="override a feature weight")
+    parser.add_argument('--boost', action='append', default=[], metavar='VENDOR=POINTS', help="override a vendor boost")
+    parser.add_argument('--explain', action='store_true', help="show how each listed score is made up")
+    args = parser.parse_args()
+
+    access_token = os.getenv('SHOPIFY_ACCESS_TOKEN')
+    if not access_token:
+        print("❌ No access token provided.")
+        return
+
+    try:
+        with open(args.config or config_path()) as f:
+            config = json.load(f)
+        _override(config, 'weight', args.weight)
+        _override(config, 'boost', args.boost)
+        model = ScoringModel(config)
+    except (OSError, json.JSONDecodeError, ScoringConfigError) as e:
+        print(f"❌ Scoring config: {e}")
+        return
+
+    try:
+        frame = CatalogFrame.from_products(iter_catalog(access_token))
+    except ShopifyAPIError as e:
+        print(f"❌ {e}")
+        return
+
+    scores = model.score(frame)
+    print(f"🎯 TOP {args.top} of {np.count_nonzero(frame.priced)} priced products")
+    print("-" * 70)
+    for rank, index in enumerate(model.top_k(frame, args.top, scores), 1):
+        product = frame.row(index)
+        print(f"{rank}. {product['sku_base']}: {product['title'][:40]} | Score: {scores[index]:g} | "
+              f"Stock: {product['total_stock']} | ${product['min_price']:.2f} | {product['vendor']}")
+        if args.explain:
+            print(f"   {format_explanation(model.explain(frame, index))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,12 @@
 """
 Import specific vendor products with SEO-optimized titles and separate color variants
 """
-import requests
 import json
 import os
 from datetime import datetime
 
-SHOPIFY_DOMAIN = "suits-inventory.myshopify.com"
+from shopify_catalog import ShopifyAPIError, iter_products
+from sku_parser import parse_sku
 
 # Target products with retail pricing
 TARGET_PRODUCTS = {
@@ -17,34 +17,6 @@ TARGET_PRODUCTS = {
     'M392SK': {'retail_price': 229.99, 'name': 'Adjustable Shawl Collar'}
 }
 
-def fetch_products(access_token):
-    """Fetch all products and filter for our targets"""
-    base_url = f"https://{SHOPIFY_DOMAIN}/admin/api/2024-01/products.json"
-    headers = {
-        'X-Shopify-Access-Token': access_token,
-        'Content-Type': 'application/json'
-    }
-    
-    all_products = []
-    params = {'limit': 250}
-    
-    # Fetch multiple pages to ensure we get all products
-    for page in range(1, 5):
-        response = requests.get(base_url, headers=headers, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            products = data.get('products', [])
-            all_products.extend(products)
-            
-            # Check for next page
-            if len(products) < 250:
-                break
-        else:
-            print(f"Error fetching page {page}: {response.status_code}")
-            break
-    
-    return all_products
-
 def extract_target_products(all_products):
     """Extract only our target products with all details"""
     target_data = {}
@@ -53,7 +25,7 @@ def extract_target_products(all_products):
         # Check each variant to see if it matches our target SKUs
         for variant in product.get('variants', []):
             sku = variant.get('sku', '')
-            base_sku = sku.split('-')[0] if '-' in sku else sku
+            base_sku = parse_sku(sku).base
             
             if base_sku in TARGET_PRODUCTS:
                 if base_sku not in target_data:
@@ -227,12 +199,15 @@ def main():
         print(f"  • {sku}: {info['name']} - Retail ${info['retail_price']}")
     print()
     
-    print("Fetching products from Shopify...")
-    all_products = fetch_products(access_token)
-    print(f"✅ Fetched {len(all_products)} total products")
-    
-    print("\nExtracting target products...")
-    target_data = extract_target_products(all_products)
+    print("Fetching products from Shopify and extracting target products...")
+    try:
+        target_data = extract_target_products(iter_products(
+            access_token,
+            on_page=lambda page, products: print(f"  Page {page}: {len(products)} products")
+        ))
+    except ShopifyAPIError as e:
+        print(f"❌ Error fetching products: {e}")
+        return
     
     if not target_data:
         print("❌ No target products found")
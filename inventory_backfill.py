@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Inventory backfill for new product variants.
+
+Every variant with a SKU needs an inventory_item with that SKU, an
+inventory_level at the stock location, and a product_variant_inventory_item
+link. backfill_inventory() creates whichever of the three are missing, for
+the given variant ids only, so its cost follows the number of new variants
+rather than the size of the catalog. Each existence check is an anti-join
+probing one of Medusa's unique indexes:
+
+  inventory_item (sku)                                            WHERE deleted_at IS NULL
+  inventory_level (inventory_item_id, location_id)                WHERE deleted_at IS NULL
+  product_variant_inventory_item (variant_id, inventory_item_id)  WHERE deleted_at IS NULL
+
+migrate-supabase.py runs it on the variants each run creates. Run on its own
+it picks the variants by creation time, or covers the whole catalog:
+
+  python3 inventory_backfill.py --since '2025-09-01 00:00'
+  python3 inventory_backfill.py --all
+"""
+import argparse
+
+import medusa_db
+
+STOCK_LOCATION_ID = 'sloc_01K3RYPKMN8VRRHMZ890XXVWP5'
+DEFAULT_STOCK = 10
+
+# (table, columns) that each anti-join relies on being uniquely indexed
+UNIQUE_KEYS = [
+    ('inventory_item', ['sku']),
+    ('inventory_level', ['inventory_item_id', 'location_id']),
+    ('product_variant_inventory_item', ['variant_id', 'inventory_item_id']),
+]
+
+# The variants to backfill, looked up once by primary key into a temp table
+# the three steps join against
+SCOPE_TABLE = 'inventory_backfill_scope'
+
+CREATE_SCOPE = f"""
+    CREATE TEMP TABLE {SCOPE_TABLE} (id text PRIMARY KEY, sku text NOT NULL) ON COMMIT DROP
+"""
+
+FILL_SCOPE = f"""
+    INSERT INTO {SCOPE_TABLE} (id, sku)
+    SELECT pv.id, pv.sku
+    FROM (SELECT DISTINCT unnest(%(variant_ids)s::text[]) AS id) v
+    CROSS JOIN LATERAL (
+        SELECT id, sku FROM product_variant
+        WHERE id = v.id AND sku IS NOT NULL AND deleted_at IS NULL
+        LIMIT 1
+    ) pv
+"""
+
+# Each lookup and existence check is a LATERAL ... LIMIT 1 probe, which the
+# planner cannot turn into a hash or merge join: it stays one index lookup
+# per scoped row however stale the statistics are. (They usually are: the
+# migration and the earlier steps have just written these tables.)
+STEPS = [
+    ('inventory_items', "📦 Creating inventory items...", f"""
+        INSERT INTO inventory_item (id, sku, created_at, updated_at)
+        SELECT 'invitem_' || substr(gen_random_uuid()::text, 1, 16), s.sku, NOW(), NOW()
+        FROM (SELECT DISTINCT sku FROM {SCOPE_TABLE}) s
+        LEFT JOIN LATERAL (
+            SELECT 1 AS found FROM inventory_item ii
+            WHERE ii.sku = s.sku AND ii.deleted_at IS NULL
+            LIMIT 1
+        ) existing ON true
+        WHERE existing.found IS NULL
+    """),
+    ('inventory_levels', "📊 Setting inventory levels...", f"""
+        INSERT INTO inventory_level (
+            id, inventory_item_id, location_id, stocked_quantity,
+            reserved_quantity, incoming_quantity, created_at, updated_at
+        )
+        SELECT 'invlvl_' || substr(gen_random_uuid()::text, 1, 16),
+               ii.id, %(location_id)s, %(stock)s, 0, 0, NOW(), NOW()
+        FROM (SELECT DISTINCT sku FROM {SCOPE_TABLE}) s
+        CROSS JOIN LATERAL (
+            SELECT id FROM inventory_item
+            WHERE sku = s.sku AND deleted_at IS NULL
+            LIMIT 1
+        ) ii
+        LEFT JOIN LATERAL (
+            SELECT 1 AS found FROM inventory_level il
+            WHERE il.inventory_item_id = ii.id AND il.location_id = %(location_id)s
+            AND il.deleted_at IS NULL
+            LIMIT 1
+        ) existing ON true
+        WHERE existing.found IS NULL
+    """),
+    ('variant_links', "🔗 Linking variants to inventory...", f"""
+        INSERT INTO product_variant_inventory_item (
+            id, variant_id, inventory_item_id, required_quantity,
+            created_at, updated_at
+        )
+        SELECT 'pvii_' || substr(gen_random_uuid()::text, 1, 16), s.id, ii.id, 1, NOW(), NOW()
+        FROM {SCOPE_TABLE} s
+        CROSS JOIN LATERAL (
+            SELECT id FROM inventory_item
+            WHERE sku = s.sku AND deleted_at IS NULL
+            LIMIT 1
+        ) ii
+        LEFT JOIN LATERAL (
+            SELECT 1 AS found FROM product_variant_inventory_item pvii
+            WHERE pvii.variant_id = s.id AND pvii.inventory_item_id = ii.id
+            AND pvii.deleted_at IS NULL
+            LIMIT 1
+        ) existing ON true
+        WHERE existing.found IS NULL
+    """),
+]
+
+VARIANTS_SINCE = """
+    SELECT id FROM product_variant
+    WHERE created_at >= %s AND sku IS NOT NULL AND deleted_at IS NULL
+"""
+
+ALL_VARIANTS = """
+    SELECT id FROM product_variant
+    WHERE sku IS NOT NULL AND deleted_at IS NULL
+"""
+
+MISSING_UNIQUE_KEYS = """
+    SELECT k.relname, k.columns
+    FROM unnest(%s::text[], %s::text[]) AS k (relname, columns)
+    WHERE NOT EXISTS (
+        SELECT 1
+        FROM pg_index i
+        WHERE i.indrelid = to_regclass(k.relname) AND i.indisunique
+        AND (
+            SELECT string_agg(a.attname, ',' ORDER BY key.position)
+            FROM unnest(i.indkey) WITH ORDINALITY AS key (attnum, position)
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = key.attnum
+        ) = k.columns
+    )
+"""
+
+
+def missing_unique_keys(cursor):
+    """[(table, 'col1,col2')] from UNIQUE_KEYS that have no unique index"""
+    cursor.execute(MISSING_UNIQUE_KEYS, ([table for table, _ in UNIQUE_KEYS],
+                                         [','.join(columns) for _, columns in UNIQUE_KEYS]))
+    return cursor.fetchall()
+
+
+def backfill_inventory(cursor, variant_ids, location_id=STOCK_LOCATION_ID, stock=DEFAULT_STOCK, verbose=True):
+    """Create missing inventory rows for variant_ids; returns {step: rows inserted}
+
+    The caller owns the transaction.
+    """
+    variant_ids = list(variant_ids)
+    if variant_ids:
+        cursor.execute(f"DROP TABLE IF EXISTS {SCOPE_TABLE}")
+        cursor.execute(CREATE_SCOPE)
+        cursor.execute(FILL_SCOPE, {'variant_ids': variant_ids})
+        cursor.execute(f"ANALYZE {SCOPE_TABLE}")  # temp tables are never auto-analyzed
+
+    counts = {}
+    for name, message, sql in STEPS:
+        if verbose:
+            print(message)
+        if variant_ids:
+            cursor.execute(sql, {'location_id': location_id, 'stock': stock})
+            counts[name] = cursor.rowcount
+        else:
+            counts[name] = 0
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create missing inventory items, levels and variant links")
+    scope = parser.add_mutually_exclusive_group(required=True)
+    scope.add_argument('--since', help="variants created at or after this timestamp")
+    scope.add_argument('--all', action='store_true', help="every variant in the catalog")
+    parser.add_argument('--location', default=STOCK_LOCATION_ID, help="stock location id")
+    args = parser.parse_args()
+
+    with medusa_db.connection() as conn, conn.cursor() as cursor:
+        for table, columns in missing_unique_keys(cursor):
+            print(f"⚠️  No unique index on {table} ({columns}); each existence check will scan it")
+
+        if args.all:
+            cursor.execute(ALL_VARIANTS)
+        else:
+            cursor.execute(VARIANTS_SINCE, (args.since,))
+        variant_ids = [row[0] for row in cursor.fetchall()]
+        print(f"🔎 {len(variant_ids)} variants in scope")
+
+        counts = backfill_inventory(cursor, variant_ids, args.location)
+
+    print("\n✅ Inventory backfill complete:")
+    for name, count in counts.items():
+        print(f"   • {name}: {count}")
+
+
+if __name__ == "__main__":
+    main()
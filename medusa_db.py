@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Shared Postgres session layer for the Medusa maintenance scripts.
+
+Connections are handed out from a small per-database pool configured from
+the environment instead of hard-coded credentials:
+
+  MEDUSA_DATABASE_URL or DATABASE_URL   the Medusa database (falls back to PG* vars)
+  SUPABASE_DATABASE_URL                 the legacy Supabase catalog
+  DB_POOL_SIZE                          connections per database (default 4)
+  DB_STATEMENT_TIMEOUT_MS               statement_timeout for every session (default: none)
+  DB_TIMINGS=1                          print the per-statement latency histogram at exit
+
+Every cursor is timed: hooks registered with add_timing_hook() receive
+(statement, seconds) for each query, and latency_report() summarises the
+latencies per statement. Queries a script repeats in a loop can be declared
+as a Statement, which is PREPAREd once per connection and then EXECUTEd.
+"""
+import atexit
+import math
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import ThreadedConnectionPool
+
+DATABASES = {
+    'medusa': ('MEDUSA_DATABASE_URL', 'DATABASE_URL'),
+    'supabase': ('SUPABASE_DATABASE_URL',),
+}
+
+DEFAULT_POOL_SIZE = 4
+
+PLACEHOLDER_RE = re.compile(r"%(s|%)")
+VALUES_TAIL_RE = re.compile(r"\bVALUES\s*\(.*", re.IGNORECASE | re.DOTALL)
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+class DatabaseConfigError(RuntimeError):
+    """Raised when no connection settings are configured for a database"""
+
+
+def database_url(name='medusa'):
+    """Return the connection string for a named database from the environment"""
+    env_vars = DATABASES[name]
+    for var in env_vars:
+        if os.getenv(var):
+            return os.getenv(var)
+    if name == 'medusa' and os.getenv('PGHOST'):
+        return ''  # libpq reads PGHOST, PGPORT, PGUSER, ... itself
+    raise DatabaseConfigError(f"Set {' or '.join(env_vars)} to the {name} database connection string")
+
+
+# --- Timing -----------------------------------------------------------------
+
+class LatencyHistogram:
+    """Latency samples for one statement, bucketed by powers of two milliseconds
+
+    Only the bucket counts, the running total and the extremes are kept, so
+    memory stays constant however many statements a job runs. Percentiles
+    are interpolated within their bucket.
+    """
+
+    def __init__(self):
+        self.counts = {}  # upper bound in ms -> samples in (bound / 2, bound]
+        self.count = 0
+        self.total = 0.0
+        self.min = 0.0
+        self.max = 0.0
+
+    @staticmethod
+    def bucket(seconds):
+        """Upper bound in ms of the power-of-two bucket holding seconds"""
+        mantissa, exponent = math.frexp(seconds * 1000)
+        if mantissa == 0.5:
+            exponent -= 1  # an exact power of two is the top of its own bucket
+        return 1 << max(exponent, 0)
+
+    def record(self, seconds):
+        bound = self.bucket(seconds)
+        self.counts[bound] = self.counts.get(bound, 0) + 1
+        self.min = seconds if not self.count else min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, p):
+        """Latency in seconds at percentile p (0-100)"""
+        if not self.count:
+            return 0.0
+        rank = min(self.count, int(self.count * p / 100) + 1)
+        seen = 0
+        for bound, count in sorted(self.counts.items()):
+            if seen + count >= rank:
+                low = bound / 2000 if bound > 1 else 0.0
+                estimate = low + (bound / 1000 - low) * (rank - seen) / count
+                return min(max(estimate, self.min), self.max)
+            seen += count
+        return self.max
+
+    def buckets(self):
+        """Return [(upper_bound_ms, count)] for the non-empty power-of-two buckets"""
+        return sorted(self.counts.items())
+
+
+_timings = {}
+_timing_hooks = []
+_timing_lock = threading.Lock()
+
+
+def statement_label(query):
+    """Stable label for a query: whitespace collapsed, VALUES lists elided"""
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    query = VALUES_TAIL_RE.sub('VALUES ...', str(query))
+    label = WHITESPACE_RE.sub(' ', query).strip()
+    return label if len(label) <= 90 else label[:87] + '...'
+
+
+def add_timing_hook(hook):
+    """Call hook(statement_label, seconds) after every query"""
+    _timing_hooks.append(hook)
+
+
+def remove_timing_hook(hook):
+    _timing_hooks.remove(hook)
+
+
+def _record(query, seconds):
+    label = statement_label(query)
+    with _timing_lock:
+        _timings.setdefault(label, LatencyHistogram()).record(seconds)
+    for hook in list(_timing_hooks):
+        hook(label, seconds)
+
+
+def timings():
+    """Return {statement_label: LatencyHistogram} for every query run so far"""
+    with _timing_lock:
+        return dict(_timings)
+
+
+def latency_report(top=15):
+    """Per-statement latency summary, slowest total first, as printable lines"""
+    stats = sorted(timings().items(), key=lambda item: item[1].total, reverse=True)
+    if not stats:
+        return []
+    lines = [f"{'calls':>7} {'total s':>9} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}  statement"]
+    for label, histogram in stats[:top]:
+        lines.append(f"{histogram.count:>7} {histogram.total:>9.3f} {histogram.percentile(50) * 1000:>8.1f} "
+                     f"{histogram.percentile(95) * 1000:>8.1f} {histogram.max * 1000:>8.1f}  {label}")
+        lines.append("        " + "  ".join(f"≤{bound}ms:{count}" for bound, count in histogram.buckets()))
+    return lines
+
+
+def print_latency_report(top=15):
+    lines = latency_report(top)
+    if lines:
+        print("\n⏱  DATABASE LATENCY BY STATEMENT")
+        print("\n".join(lines))
+
+
+class TimedCursor(psycopg2.extensions.cursor):
+    """Cursor that reports the latency of every statement"""
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            _record(query, time.perf_counter() - start)
+
+    def executemany(self, query, vars_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            _record(query, time.perf_counter() - start)
+
+
+class MedusaConnection(psycopg2.extensions.connection):
+    """Connection that remembers which Statements it has prepared"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self.pool_name = None
+        self.timeout_overridden = False
+
+
+# --- Prepared statements ----------------------------------------------------
+
+class Statement:
+    """A query PREPAREd once per connection, then run with EXECUTE
+
+    sql uses the usual %s placeholders; they become $1, $2, ... on the server.
+    """
+
+    def __init__(self, name, sql):
+        self.name = name
+        self.sql = sql
+        self.param_count = 0
+
+        def placeholder(match):
+            if match.group(1) == '%':
+                return '%'
+            self.param_count += 1
+            return f"${self.param_count}"
+
+        self.prepare_sql = f"PREPARE {name} AS {PLACEHOLDER_RE.sub(placeholder, sql)}"
+        args = ', '.join(['%s'] * self.param_count)
+        self.execute_sql = f"EXECUTE {name} ({args})" if self.param_count else f"EXECUTE {name}"
+
+    def execute(self, cursor, params=()):
+        """Run the statement on cursor, preparing it on first use of the connection"""
+        conn = cursor.connection
+        prepared = getattr(conn, 'prepared', None)
+        if prepared is None:
+            cursor.execute(self.sql, params or None)
+            return cursor
+        if self.name not in prepared:
+            cursor.execute(self.prepare_sql)
+            prepared.add(self.name)
+        cursor.execute(self.execute_sql, params or None)
+        return cursor
+
+
+# --- Pools ------------------------------------------------------------------
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name='medusa'):
+    """Return the connection pool for a named database, creating it on first use"""
+    with _pools_lock:
+        if name not in _pools:
+            options = {
+                'connection_factory': MedusaConnection,
+                'cursor_factory': TimedCursor,
+                'application_name': os.path.basename(sys.argv[0] or 'python')[:60],
+            }
+            timeout_ms = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '0'))
+            if timeout_ms:
+                options['options'] = f"-c statement_timeout={timeout_ms}"
+            size = int(os.getenv('DB_POOL_SIZE', DEFAULT_POOL_SIZE))
+            _pools[name] = ThreadedConnectionPool(1, size, database_url(name), **options)
+        return _pools[name]
+
+
+def connect(name='medusa', autocommit=False, statement_timeout_ms=None):
+    """Borrow a connection from the pool; hand it back with release()"""
+    conn = get_pool(name).getconn()
+    conn.pool_name = name
+    conn.autocommit = autocommit
+    if statement_timeout_ms is not None:
+        with conn.cursor() as cursor:
+            cursor.execute("SET statement_timeout = %s", (int(statement_timeout_ms),))
+        if not autocommit:
+            conn.commit()
+        conn.timeout_overridden = True
+    return conn
+
+
+def release(conn):
+    """Return a connection to its pool, rolling back anything uncommitted
+
+    A connection that is closed, or cannot be rolled back or reset, is
+    discarded so its pool slot is freed for a fresh one.
+    """
+    pool = _pools.get(getattr(conn, 'pool_name', None))
+    if pool is None:
+        return
+    if conn.closed:
+        pool.putconn(conn, close=True)
+        return
+    try:
+        if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+        if conn.timeout_overridden:
+            # Back to the pool-wide default for the next borrower
+            with conn.cursor() as cursor:
+                cursor.execute("RESET statement_timeout")
+            if not conn.autocommit:
+                conn.commit()
+            conn.timeout_overridden = False
+    except psycopg2.Error:
+        pool.putconn(conn, close=True)
+        return
+    pool.putconn(conn)
+
+
+@contextmanager
+def connection(name='medusa', **kwargs):
+    """Borrow a connection for a block: commit on success, roll back on error"""
+    conn = connect(name, **kwargs)
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release(conn)
+
+
+def stream(conn, query, params=None, itersize=2000, cursor_name='medusa_db_stream'):
+    """Yield rows from a server-side (named) cursor, itersize rows per round trip"""
+    with conn.cursor(name=cursor_name) as cursor:
+        cursor.itersize = itersize
+        cursor.execute(query, params)
+        yield from cursor
+
+
+def close_all():
+    """Close every pooled connection"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.closeall()
+        _pools.clear()
+
+
+@atexit.register
+def _shutdown():
+    if os.getenv('DB_TIMINGS', '').lower() in ('1', 'true', 'yes'):
+        print_latency_report()
+    close_all()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Managed indexes for product metadata and title lookups.
+
+Medusa only indexes product.metadata as an opaque jsonb column, so every
+script filter on metadata or title was a sequential scan. This migration
+owns the indexes those scripts rely on:
+
+  idx_product_metadata_path    GIN (metadata jsonb_path_ops), for metadata @> '{...}'
+  idx_product_metadata_vendor  btree on metadata->>'source', 'base_sku', 'color',
+                               for the vendor listings ordered by SKU and color
+  idx_product_title_live       btree on title for live products, for the
+                               title lookups in the fix and verify scripts
+  idx_product_supabase_id      btree on metadata->>'supabase_id' for live products,
+                               for matching re-migrated Supabase rows
+
+Indexes are built CONCURRENTLY so the storefront keeps writing while they
+build; an index left invalid by an interrupted build is dropped and rebuilt.
+
+Usage: python3 metadata_indexes.py [--status | --drop]
+"""
+import argparse
+
+import medusa_db
+
+INDEXES = [
+    ('idx_product_metadata_path',
+     "ON product USING gin (metadata jsonb_path_ops)"),
+    ('idx_product_metadata_vendor',
+     "ON product ((metadata->>'source'), (metadata->>'base_sku'), (metadata->>'color'))"),
+    ('idx_product_title_live',
+     "ON product (title) WHERE deleted_at IS NULL"),
+    ('idx_product_supabase_id',
+     "ON product ((metadata->>'supabase_id')) WHERE deleted_at IS NULL"),
+]
+
+INDEX_STATE_SQL = """
+    SELECT c.relname, i.indisvalid
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE i.indrelid = 'product'::regclass AND c.relname = ANY(%s)
+"""
+
+
+def index_state(cursor):
+    """Return {index_name: 'valid' | 'invalid' | 'missing'} for the managed indexes"""
+    cursor.execute(INDEX_STATE_SQL, ([name for name, _ in INDEXES],))
+    found = {name: 'valid' if valid else 'invalid' for name, valid in cursor.fetchall()}
+    return {name: found.get(name, 'missing') for name, _ in INDEXES}
+
+
+def create_indexes(cursor, concurrently=True):
+    """Create any missing managed index; return the names built
+
+    CONCURRENTLY can't run inside a transaction block, so the cursor's
+    connection must be in autocommit mode unless concurrently=False.
+    """
+    mode = 'CONCURRENTLY ' if concurrently else ''
+    built = []
+    state = index_state(cursor)
+    for name, definition in INDEXES:
+        if state[name] == 'valid':
+            continue
+        if state[name] == 'invalid':
+            cursor.execute(f"DROP INDEX {mode}IF EXISTS {name}")
+        cursor.execute(f"CREATE INDEX {mode}IF NOT EXISTS {name} {definition}")
+        built.append(name)
+    if built:
+        # Expression indexes get their own statistics only from ANALYZE
+        cursor.execute("ANALYZE product")
+    return built
+
+
+def drop_indexes(cursor, concurrently=True):
+    mode = 'CONCURRENTLY ' if concurrently else ''
+    for name, _ in INDEXES:
+        cursor.execute(f"DROP INDEX {mode}IF EXISTS {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create the product metadata and title indexes")
+    parser.add_argument('--status', action='store_true', help="only show which indexes exist")
+    parser.add_argument('--drop', action='store_true', help="drop the managed indexes")
+    args = parser.parse_args()
+
+    conn = medusa_db.connect(autocommit=True)
+    try:
+        with conn.cursor() as cursor:
+            if args.drop:
+                drop_indexes(cursor)
+                print("🗑  Dropped product metadata indexes")
+            elif not args.status:
+                built = create_indexes(cursor)
+                print(f"✅ Built: {', '.join(built)}" if built else "✅ All indexes already present")
+            for name, state in index_state(cursor).items():
+                print(f"  {name}: {state}")
+    finally:
+        medusa_db.release(conn)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,152 +1,55 @@
 #!/usr/bin/env python3
-import psycopg2
-import json
-import uuid
-import time
+import medusa_db
+import argparse
 
-# Database connection
-conn = psycopg2.connect(
-    host="centerbeam.proxy.rlwy.net",
-    port=20197,
-    user="postgres",
-    password="MvLLUHcwsDWjPCiWciFTYjQxAlwpxPds",
-    database="railway"
-)
-conn.autocommit = False
-cursor = conn.cursor()
-
-# Region ID for US
-REGION_ID = 'reg_01K3S6NDGAC1DSWH9MCZCWBWWD'
+from adaptive_scheduler import AdaptiveScheduler
+from product_resolver import ProductIndex, describe_ambiguity, describe_miss
+from variant_rebuild import ALL_SUIT_SIZES, count_teardown, rebuild_variants, reconcile_variants, teardown_variants
 
-# Define size arrays
-REGULAR_SIZES = ['36R', '38R', '40R', '42R', '44R', '46R', '48R', '50R', '52R', '54R']
-LONG_SIZES = ['38L', '40L', '42L', '44L', '46L', '48L', '50L', '52L', '54L']
-ALL_SUIT_SIZES = REGULAR_SIZES + LONG_SIZES  # 19 total sizes
+parser = argparse.ArgumentParser(description="Rebuild suit and tuxedo variants and pricing")
+parser.add_argument('--recreate', action='store_true',
+                    help="wipe and rebuild every variant instead of writing only the differences")
+parser.add_argument('--dry-run', action='store_true', help="report the planned changes without writing")
+parser.add_argument('--workers', type=int, default=4, help="maximum concurrent connections")
+parser.add_argument('--target-latency', type=float, default=1.0,
+                    help="per-product seconds above which concurrency backs off")
+args = parser.parse_args()
 
-def generate_id(prefix=''):
-    """Generate a unique ID with optional prefix"""
-    return f"{prefix}{uuid.uuid4().hex[:24]}"
+def process_product(conn, item):
+    """Process a single resolved product in its own transaction; return (success, message)
 
-def process_product(product_title, price_cents):
-    """Process a single product"""
-    try:
-        # Find product
-        cursor.execute("""
-            SELECT id, title, handle 
-            FROM product 
-            WHERE title = %s AND deleted_at IS NULL
-            LIMIT 1
-        """, (product_title,))
-        
-        result = cursor.fetchone()
-        if not result:
-            return False, f"Product not found: {product_title}"
-        
-        product_id, title, handle = result
-        
-        # Step 1: Get existing variant IDs
-        cursor.execute("""
-            SELECT id FROM product_variant 
-            WHERE product_id = %s
-        """, (product_id,))
-        old_variant_ids = [row[0] for row in cursor.fetchall()]
-        
-        # Step 2: Delete related price data first
-        if old_variant_ids:
-            # Get price_set_ids from product_variant_price_set
-            cursor.execute("""
-                SELECT price_set_id FROM product_variant_price_set 
-                WHERE variant_id = ANY(%s)
-            """, (old_variant_ids,))
-            price_set_ids = [row[0] for row in cursor.fetchall() if row[0]]
-            
-            if price_set_ids:
-                # Get price_ids from price table
-                cursor.execute("""
-                    SELECT id FROM price 
-                    WHERE price_set_id = ANY(%s)
-                """, (price_set_ids,))
-                price_ids = [row[0] for row in cursor.fetchall()]
-                
-                if price_ids:
-                    # Delete price rules
-                    cursor.execute("""
-                        DELETE FROM price_rule 
-                        WHERE price_id = ANY(%s)
-                    """, (price_ids,))
-                
-                # Delete prices
-                cursor.execute("""
-                    DELETE FROM price 
-                    WHERE price_set_id = ANY(%s)
-                """, (price_set_ids,))
-            
-            # Delete product_variant_price_set entries
-            cursor.execute("""
-                DELETE FROM product_variant_price_set 
-                WHERE variant_id = ANY(%s)
-            """, (old_variant_ids,))
-            
-            # Delete price_sets
-            if price_set_ids:
-                cursor.execute("""
-                    DELETE FROM price_set 
-                    WHERE id = ANY(%s)
-                """, (price_set_ids,))
-            
-            # Delete variants
-            cursor.execute("""
-                DELETE FROM product_variant 
-                WHERE product_id = %s
-            """, (product_id,))
-        
-        # Step 3: Create new variants with pricing
-        sku_base = handle.upper().replace('-', '_')[:20]  # Limit SKU base length
-        
-        for size in ALL_SUIT_SIZES:
-            variant_id = generate_id('variant_')
-            price_set_id = generate_id('pset_')
-            price_id = generate_id('price_')
-            pvps_id = generate_id('pvps_')
-            price_rule_id = generate_id('prule_')
-            
-            # Create variant
-            cursor.execute("""
-                INSERT INTO product_variant (id, product_id, title, sku, manage_inventory, created_at, updated_at)
-                VALUES (%s, %s, %s, %s, false, NOW(), NOW())
-            """, (variant_id, product_id, size, f"{sku_base}-{size}"))
-            
-            # Create price set
-            cursor.execute("""
-                INSERT INTO price_set (id, created_at, updated_at)
-                VALUES (%s, NOW(), NOW())
-            """, (price_set_id,))
-            
-            # Link variant to price set
-            cursor.execute("""
-                INSERT INTO product_variant_price_set (id, variant_id, price_set_id, created_at, updated_at)
-                VALUES (%s, %s, %s, NOW(), NOW())
-            """, (pvps_id, variant_id, price_set_id))
-            
-            # Create price
-            raw_amount = json.dumps({"value": str(price_cents), "precision": 20})
-            cursor.execute("""
-                INSERT INTO price (id, price_set_id, currency_code, amount, raw_amount, created_at, updated_at)
-                VALUES (%s, %s, 'usd', %s, %s::jsonb, NOW(), NOW())
-            """, (price_id, price_set_id, price_cents, raw_amount))
-            
-            # Add region rule
-            cursor.execute("""
-                INSERT INTO price_rule (id, value, priority, price_id, attribute, operator, created_at, updated_at)
-                VALUES (%s, %s, 0, %s, 'region_id', 'eq', NOW(), NOW())
-            """, (price_rule_id, REGION_ID, price_id))
-        
+    The product's variants are diffed against the target sizes and price and
+    only the changes are written. With --recreate, old variants and pricing
+    are removed with one teardown statement and rebuilt with one statement
+    per table. A dry run only reads: recreate reports the rows it would
+    replace, reconcile the changes it would write.
+    """
+    product, price_cents = item
+    product_id, title, handle = product
+    cursor = conn.cursor()
+    
+    sku_base = handle.upper().replace('-', '_')[:20]  # Limit SKU base length
+    
+    if args.recreate and args.dry_run:
+        # Only count what would be replaced; no rows are written or locked
+        planned = count_teardown(cursor, [product_id])
+        conn.rollback()
+        return True, (f"🔎 {title}: would delete {planned['product_variant']} variants and "
+                      f"{planned['price']} prices, then create {len(ALL_SUIT_SIZES)} variants "
+                      f"at ${price_cents/100:.2f}")
+    
+    if args.recreate:
+        teardown_variants(cursor, [product_id])
+        rebuild_variants(cursor, [(product_id, sku_base, price_cents)])
         conn.commit()
         return True, f"✅ Fixed {title} with {len(ALL_SUIT_SIZES)} variants at ${price_cents/100:.2f}"
-        
-    except Exception as e:
+    
+    plan = reconcile_variants(cursor, [(product_id, sku_base, price_cents)], dry_run=args.dry_run)
+    if args.dry_run:
         conn.rollback()
-        return False, f"❌ Error processing {product_title}: {str(e)}"
+        return True, f"🔎 {title}: would apply {plan.describe(product_id)}"
+    conn.commit()
+    return True, f"✅ Fixed {title} at ${price_cents/100:.2f}: {plan.describe(product_id)}"
 
 # Product lists with prices
 products_to_fix = [
@@ -217,42 +120,69 @@ print("=" * 80)
 print("PROCESSING SUITS & TUXEDOS IN BATCHES")
 print("=" * 80)
 print(f"Total products to process: {len(products_to_fix)}")
+print(f"Mode: {'recreate' if args.recreate else 'reconcile'}{' (dry run)' if args.dry_run else ''}, "
+      f"up to {args.workers} workers")
 print("-" * 80)
 
 success_count = 0
 failed_count = 0
-batch_size = 5
 
-for i in range(0, len(products_to_fix), batch_size):
-    batch = products_to_fix[i:i+batch_size]
-    print(f"\nProcessing batch {i//batch_size + 1} ({i+1}-{min(i+batch_size, len(products_to_fix))} of {len(products_to_fix)}):")
-    
-    for product_title, price_cents in batch:
-        success, message = process_product(product_title, price_cents)
-        print(f"  {message}")
-        
-        if success:
-            success_count += 1
-        else:
-            failed_count += 1
-        
-        # Small delay between products
-        time.sleep(0.5)
+def report_result(item, result, error):
+    global success_count, failed_count
+    if error is not None:
+        success, message = False, f"❌ Error processing {item[0].title}: {str(error)}"
+    else:
+        success, message = result
+    print(f"  {message}")
     
-    print(f"  Batch complete. Success: {success_count}, Failed: {failed_count}")
+    if success:
+        success_count += 1
+    else:
+        failed_count += 1
+
+# Resolve every title in one query before any work starts
+conn = medusa_db.connect()
+resolutions = ProductIndex.load(conn.cursor()).resolve_all(title for title, _ in products_to_fix)
+medusa_db.release(conn)
+
+resolved = []
+queued_titles = {}      # product id -> the title that scheduled it
+duplicate_titles = []   # (title, title that already scheduled the same product)
+for product_title, price_cents in products_to_fix:
+    resolution = resolutions[product_title]
+    ambiguity = describe_ambiguity(resolution)
+    if not resolution.product:
+        report_result(None, (False, f"Product not found: {product_title} - {describe_miss(resolution)}"), None)
+    elif ambiguity:
+        # Rebuilding an arbitrary one of them could wipe the wrong product
+        report_result(None, (False, f"Ambiguous title, skipped: {product_title} {ambiguity}"), None)
+    elif resolution.product.id in queued_titles:
+        # Scheduling it twice would rebuild it on two workers, or twice with different prices
+        queued_title = queued_titles[resolution.product.id]
+        print(f"  ⚠️  {product_title} is the same product as {queued_title} - already scheduled")
+        duplicate_titles.append((product_title, queued_title))
+    else:
+        queued_titles[resolution.product.id] = product_title
+        resolved.append((resolution.product, price_cents))
+
+# Products run concurrently; the scheduler backs off on slow queries and lock waits
+scheduler = AdaptiveScheduler(max_workers=args.workers, target_latency=args.target_latency)
+scheduler.run(process_product, resolved, on_result=report_result)
 
 print("\n" + "=" * 80)
 print("FINAL SUMMARY")
 print("=" * 80)
 print(f"✅ Successfully processed: {success_count} products")
 print(f"❌ Failed: {failed_count} products")
+if duplicate_titles:
+    print(f"⚠️  Titles matching an already scheduled product: {len(duplicate_titles)}")
+    for product_title, queued_title in duplicate_titles:
+        print(f"  - {product_title} (same product as {queued_title})")
+for line in scheduler.report():
+    print(f"⏱  {line}")
 
 # Verify sample products
-print("\n🔍 VERIFYING SAMPLE PRODUCTS...")
-sample_products = ["Black Suit", "Black Tuxedo", "Navy Suit"]
-
-for product_name in sample_products:
-    cursor.execute("""
+VERIFY_PRODUCT = medusa_db.Statement('verify_product', """
         SELECT 
             p.title,
             COUNT(DISTINCT pv.id) as variant_count,
@@ -267,7 +197,15 @@ for product_name in sample_products:
         WHERE p.title = %s
         AND p.deleted_at IS NULL
         GROUP BY p.title
-    """, (product_name,))
+    """)
+
+print("\n🔍 VERIFYING SAMPLE PRODUCTS...")
+conn = medusa_db.connect()
+cursor = conn.cursor()
+sample_products = ["Black Suit", "Black Tuxedo", "Navy Suit"]
+
+for product_name in sample_products:
+    VERIFY_PRODUCT.execute(cursor, (product_name,))
     
     result = cursor.fetchone()
     if result:
@@ -277,7 +215,7 @@ for product_name in sample_products:
         print(f"    - Price: ${result[3]:.2f}" if result[3] else "    - Price: Not set")
 
 cursor.close()
-conn.close()
+medusa_db.release(conn)
 
 print("\n✅ PROCESSING COMPLETE!")
 print("Next steps:")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Persisted suit/tuxedo classification for the verification scripts.
+
+Which products count as suits or tuxedos used to be decided by title LIKE
+lists repeated in every query. The rules now live here, in the
+kct_product_category materialized view (product_id -> category), indexed
+on product_id and category. refresh_categories() creates the view on first
+use and re-runs the classification afterwards; the refresh is CONCURRENTLY
+so readers never block.
+
+The view is stamped (COMMENT ON) with a hash of its rules - the SQL and
+SUIT_TITLES. A REFRESH only re-applies the rules the view was created
+with, so when the stamp differs refresh_categories() drops and recreates
+the view instead; readers wait for that transaction to commit.
+
+catalog_checks joins the view into its single pass over the product graph.
+metadata_coverage() counts, per category, how many live suits and tuxedos
+carry each metadata key; each key is one @? test, which the GIN
+jsonb_path_ops index on product.metadata (metadata_indexes) can answer.
+"""
+import hashlib
+import json
+
+VIEW = 'kct_product_category'
+
+# Suits whose titles don't say "Suit"
+SUIT_TITLES = ['Burnt Orange', 'Dark Teal', 'Estate Blue', 'Light Grey', 'Mint', 'Pink',
+               'Brown Gold Buttons', 'Black Strip Shawl Lapel', 'Fall Rust', 'Brick Fall Suit']
+
+# Prices each category is sold at, in cents
+PRICE_TIERS = {
+    'suit': [22999],
+    'tuxedo': [19999, 22999, 24999],
+}
+
+CREATE_VIEW_SQL = f"""
+    CREATE MATERIALIZED VIEW {VIEW} AS
+    SELECT id AS product_id,
+           CASE WHEN title LIKE '%%Tuxedo%%' THEN 'tuxedo' ELSE 'suit' END AS category
+    FROM product
+    WHERE deleted_at IS NULL
+    AND (title LIKE '%%Suit%%' OR title LIKE '%%Tuxedo%%' OR title = ANY(%s));
+    CREATE UNIQUE INDEX {VIEW}_product_id ON {VIEW} (product_id);
+    CREATE INDEX {VIEW}_category ON {VIEW} (category);
+"""
+
+
+def rules_version():
+    """Hash of the classification rules, stored as the view's comment"""
+    rules = json.dumps([CREATE_VIEW_SQL, SUIT_TITLES])
+    return hashlib.sha256(rules.encode()).hexdigest()[:16]
+
+
+def refresh_categories(cursor):
+    """Create the classification view, rebuild it if the rules changed, or refresh it"""
+    version = rules_version()
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL, obj_description(to_regclass(%s), 'pg_class')",
+                   (VIEW, VIEW))
+    exists, stamp = cursor.fetchone()
+    if exists and stamp == version:
+        cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {VIEW}")
+        return
+    if exists:
+        cursor.execute(f"DROP MATERIALIZED VIEW {VIEW}")
+    cursor.execute(CREATE_VIEW_SQL, (SUIT_TITLES,))
+    cursor.execute(f"COMMENT ON MATERIALIZED VIEW {VIEW} IS %s", (version,))
+
+
+
+COVERAGE_SQL = f"""
+    SELECT c.category, COUNT(*)
+    FROM {VIEW} c
+    JOIN product p ON p.id = c.product_id
+    WHERE p.deleted_at IS NULL {{}}
+    GROUP BY c.category
+"""
+
+
+def metadata_coverage(cursor, keys):
+    """{category: (products, {key: products with that metadata key})} across the catalog
+
+    Call refresh_categories() first so products added since the last run
+    are classified.
+    """
+    cursor.execute(COVERAGE_SQL.format(''))
+    coverage = {category: (total, dict.fromkeys(keys, 0)) for category, total in cursor.fetchall()}
+    for key in keys:
+        cursor.execute(COVERAGE_SQL.format('AND p.metadata @? %s::jsonpath'), (f"$.{json.dumps(key)}",))
+        for category, count in cursor.fetchall():
+            coverage[category][1][key] = count
+    return coverage
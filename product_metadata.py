@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Bulk jsonb metadata merge for Medusa products.
+
+merge_metadata() ships a whole title -> metadata mapping as one VALUES list
+and merges it into product.metadata with jsonb || on the server, so tagging
+thousands of products is a single statement. Rows can be skipped when a key
+is already set, and every input title gets an outcome back: updated,
+skipped, not_found or invalid.
+
+The statement either applies every update or none of them; the caller owns
+the transaction and decides whether to commit.
+
+Filter on metadata with containment (metadata @> '{...}'), which the GIN
+index from metadata_indexes.py serves, and test for keys with metadata ? 'key'
+rather than matching metadata::text with LIKE.
+"""
+import json
+from collections import namedtuple
+
+from psycopg2.extras import execute_values
+
+UPDATED = 'updated'
+SKIPPED = 'skipped'
+NOT_FOUND = 'not_found'
+INVALID = 'invalid'
+
+# Metadata that isn't a JSON object (NULL, or a scalar from an old import) is
+# treated as empty, the way the per-product script fell back to {}
+MERGE_SQL = """
+    WITH patch (ord, title, metadata, skip_key) AS (VALUES %s),
+    target AS (
+        SELECT patch.ord, patch.title, patch.metadata, patch.skip_key, p.id,
+               CASE WHEN jsonb_typeof(p.metadata) = 'object' THEN p.metadata ELSE '{}'::jsonb END AS current
+        FROM patch
+        LEFT JOIN product p ON p.title = patch.title AND p.deleted_at IS NULL
+    ),
+    merged AS (
+        UPDATE product p
+        SET metadata = t.current || t.metadata, updated_at = NOW()
+        FROM target t
+        WHERE p.id = t.id
+          AND (t.skip_key IS NULL OR COALESCE(t.current ->> t.skip_key, '') = '')
+        RETURNING p.id
+    )
+    SELECT t.ord, t.title, t.id,
+           CASE WHEN t.id IS NULL THEN 'not_found'
+                WHEN m.id IS NULL THEN 'skipped'
+                ELSE 'updated' END,
+           t.current ->> t.skip_key
+    FROM target t
+    LEFT JOIN merged m ON m.id = t.id
+    ORDER BY t.ord, t.id
+"""
+MERGE_TEMPLATE = "(%s, %s, %s::jsonb, %s::text)"
+
+# existing is the value already stored under the skip key, if any
+MetadataOutcome = namedtuple('MetadataOutcome', 'title product_id status existing')
+
+
+def jsonb_literal(value):
+    """SQL literal for value as jsonb, for the generated .sql scripts"""
+    return "'" + json.dumps(value).replace("'", "''") + "'::jsonb"
+
+
+def merge_metadata(cursor, metadata_by_title, skip_if_present=None):
+    """Merge {title: {key: value}} into product.metadata in one statement
+
+    With skip_if_present='color', products that already have a non-empty
+    color are left untouched. Returns a MetadataOutcome per product, in input
+    order; a title matching several products gets one outcome each. Patches
+    that aren't dicts are reported as invalid and never sent.
+    """
+    rows = []
+    invalid = []
+    for ord, (title, patch) in enumerate(metadata_by_title.items()):
+        if isinstance(patch, dict):
+            rows.append((ord, title, json.dumps(patch), skip_if_present))
+        else:
+            invalid.append((ord, MetadataOutcome(title, None, INVALID, None)))
+
+    results = []
+    if rows:
+        # One page, so the whole mapping is one round trip
+        fetched = execute_values(cursor, MERGE_SQL, rows, template=MERGE_TEMPLATE,
+                                 page_size=len(rows), fetch=True)
+        results = [(ord, MetadataOutcome(title, product_id, status, existing))
+                   for ord, title, product_id, status, existing in fetched]
+
+    return [outcome for ord, outcome in sorted(results + invalid, key=lambda entry: entry[0])]
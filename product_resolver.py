@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Batched title -> product resolution for the fix and check scripts.
+
+ProductIndex.load() reads every live product's (id, title, handle) in one
+query. Titles are then resolved in memory, in order of preference:
+
+  exact       the title as stored
+  normalized  case, accents, punctuation and spacing ignored
+              ("Black  suit" == "Black Suit", "Tuxedo-Tone" == "Tuxedo Tone")
+  fuzzy       best trigram match, only when a fuzzy_cutoff is given
+
+Misses come back with the closest titles as suggestions. A title shared by
+several live products resolves to the first of them; scripts that rewrite
+the product check describe_ambiguity() and skip such titles. Trigrams are built
+the way pg_trgm builds them, so scores read like similarity() in Postgres.
+"""
+import re
+import unicodedata
+from collections import Counter, defaultdict, namedtuple
+
+LOAD_SQL = """
+    SELECT id, title, handle
+    FROM product
+    WHERE deleted_at IS NULL
+    ORDER BY id
+"""
+
+NON_WORD_RE = re.compile(r"[^0-9a-z]+")
+
+ProductRef = namedtuple('ProductRef', 'id title handle')
+
+# match is 'exact', 'normalized', 'fuzzy' or None; suggestions are
+# (score, ProductRef) pairs, best first, filled in for misses
+Resolution = namedtuple('Resolution', 'query product match score candidates suggestions')
+
+
+def normalize_title(title):
+    """Lowercase, strip accents, and collapse punctuation and whitespace to single spaces"""
+    title = unicodedata.normalize('NFKD', title or '').encode('ascii', 'ignore').decode('ascii')
+    return NON_WORD_RE.sub(' ', title.lower()).strip()
+
+
+def trigrams(normalized):
+    """pg_trgm-style trigrams: each word padded with two leading spaces and one trailing"""
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class ProductIndex:
+    """In-memory index of live products by exact, normalized and trigram title"""
+
+    def __init__(self, rows):
+        self.products = [ProductRef(*row) for row in rows]
+        self.by_title = defaultdict(list)
+        self.by_normalized = defaultdict(list)
+        self.by_trigram = None  # built on the first fuzzy lookup
+        self.trigram_counts = []
+        for product in self.products:
+            self.by_title[product.title].append(product)
+            self.by_normalized[normalize_title(product.title)].append(product)
+
+    def _build_trigrams(self):
+        self.by_trigram = defaultdict(list)
+        for position, product in enumerate(self.products):
+            grams = trigrams(normalize_title(product.title))
+            self.trigram_counts.append(len(grams))
+            for gram in grams:
+                self.by_trigram[gram].append(position)
+
+    @classmethod
+    def load(cls, cursor):
+        cursor.execute(LOAD_SQL)
+        return cls(cursor.fetchall())
+
+    def __len__(self):
+        return len(self.products)
+
+    def similar(self, title, limit=5, min_score=0.3):
+        """Return up to limit (score, ProductRef) pairs with trigram similarity >= min_score"""
+        grams = trigrams(normalize_title(title))
+        if not grams:
+            return []
+        if self.by_trigram is None:
+            self._build_trigrams()
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.by_trigram.get(gram, ()))
+        scored = []
+        for position, common in shared.items():
+            score = common / (len(grams) + self.trigram_counts[position] - common)
+            if score >= min_score:
+                scored.append((round(score, 3), self.products[position]))
+        scored.sort(key=lambda pair: (-pair[0], pair[1].title))
+        return scored[:limit]
+
+    def resolve(self, title, fuzzy_cutoff=None, suggestions=3):
+        """Resolve one title; see the module docstring for the order of matches"""
+        candidates = self.by_title.get(title)
+        if candidates:
+            return Resolution(title, candidates[0], 'exact', 1.0, candidates, [])
+        candidates = self.by_normalized.get(normalize_title(title))
+        if candidates:
+            return Resolution(title, candidates[0], 'normalized', 1.0, candidates, [])
+
+        similar = self.similar(title, limit=max(suggestions, 1))
+        if similar and fuzzy_cutoff is not None and similar[0][0] >= fuzzy_cutoff:
+            score, product = similar[0]
+            return Resolution(title, product, 'fuzzy', score, [product], similar[1:suggestions + 1])
+        return Resolution(title, None, None, 0.0, [], similar[:suggestions])
+
+    def resolve_all(self, titles, fuzzy_cutoff=None, suggestions=3):
+        """Resolve every title; returns {title: Resolution} in input order"""
+        return {title: self.resolve(title, fuzzy_cutoff, suggestions) for title in titles}
+
+
+def describe_miss(resolution):
+    """One-line 'did you mean' hint for an unresolved title"""
+    if not resolution.suggestions:
+        return "no similar products"
+    return "did you mean " + ", ".join(f"'{p.title}' ({score:.2f})" for score, p in resolution.suggestions)
+
+
+def describe_ambiguity(resolution):
+    """Note for a title that matches several live products, or None when it is unambiguous"""
+    if len(resolution.candidates) < 2:
+        return None
+    return (f"matches {len(resolution.candidates)} products: "
+            f"{', '.join(p.id for p in resolution.candidates)}")
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Shared Shopify catalog client for the vendor store.
+
+Follows the Link header page_info cursor to the end of the catalog and yields
+products one at a time over a pooled keep-alive session, so callers never
+have to hold the whole catalog in memory.
+
+Pages are prefetched on a background thread while the caller works through
+the current one. Requests are paced from the X-Shopify-Shop-Api-Call-Limit
+header, 429s honour Retry-After, and transient errors are retried from the
+last good cursor instead of abandoning the partial catalog.
+"""
+import queue
+import random
+import re
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+SHOPIFY_DOMAIN = "suits-inventory.myshopify.com"
+API_VERSION = "2024-01"
+PAGE_LIMIT = 250
+
+NEXT_LINK_RE = re.compile(r'<([^>]+)>;\s*rel="next"')
+CALL_LIMIT_HEADER = 'X-Shopify-Shop-Api-Call-Limit'
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+_DONE = object()
+
+
+class ShopifyAPIError(Exception):
+    """Raised when the products endpoint answers with a non-200 status
+
+    resume_url is the last good cursor URL, so a caller can pick the pull
+    back up with iter_pages(base_url=e.resume_url) instead of starting over.
+    """
+
+    def __init__(self, status_code, body='', resume_url=None):
+        super().__init__(f"API Error: {status_code} - {body[:200]}")
+        self.status_code = status_code
+        self.body = body
+        self.resume_url = resume_url
+
+
+class RateLimiter:
+    """Adaptive pacing for Shopify's leaky-bucket REST rate limit
+
+    Shopify reports bucket usage as "used/size" and leaks leak_rate calls
+    per second. Once usage crosses threshold the limiter spaces requests out
+    just enough for the bucket to drain back below it.
+    """
+
+    def __init__(self, leak_rate=2.0, threshold=0.8, max_retries=5, backoff_base=0.5):
+        self.leak_rate = leak_rate
+        self.threshold = threshold
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.next_allowed = 0.0
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.waited = 0.0
+
+    def wait(self):
+        """Sleep until the next request is allowed"""
+        delay = self.next_allowed - time.monotonic()
+        if delay > 0:
+            self.waited += delay
+            time.sleep(delay)
+        self.requests += 1
+
+    def delay(self, seconds):
+        """Push the next allowed request at least seconds into the future"""
+        self.next_allowed = max(self.next_allowed, time.monotonic() + seconds)
+
+    def observe(self, response):
+        """Adjust pacing from a response's call-limit header"""
+        used, size = parse_call_limit(response.headers.get(CALL_LIMIT_HEADER))
+        if size and used >= size * self.threshold:
+            self.delay((used - size * self.threshold + 1) / self.leak_rate)
+
+    def backoff(self, attempt, retry_after=None):
+        """Schedule a retry, preferring the server's Retry-After when given"""
+        self.retries += 1
+        if retry_after is not None:
+            self.throttled += 1
+            self.delay(retry_after)
+        else:
+            self.delay(self.backoff_base * (2 ** attempt) * (1 + random.random() / 2))
+
+
+def products_url(domain=SHOPIFY_DOMAIN):
+    """Build the products.json endpoint URL for a shop domain"""
+    return f"https://{domain}/admin/api/{API_VERSION}/products.json"
+
+
+def create_session(access_token, pool_size=4):
+    """Create a keep-alive session with a connection pool and auth headers"""
+    session = requests.Session()
+    session.headers.update({
+        'X-Shopify-Access-Token': access_token,
+        'Content-Type': 'application/json'
+    })
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def parse_next_link(link_header):
+    """Return the rel="next" URL from a Link header, or None on the last page"""
+    if not link_header:
+        return None
+    match = NEXT_LINK_RE.search(link_header)
+    return match.group(1) if match else None
+
+
+def parse_call_limit(header):
+    """Parse an "used/size" call-limit header into a (used, size) tuple"""
+    try:
+        used, size = header.split('/')
+        return int(used), int(size)
+    except (AttributeError, ValueError):
+        return 0, 0
+
+
+def parse_retry_after(header):
+    """Parse a Retry-After header in seconds, or None if absent"""
+    try:
+        return max(float(header), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch_page(session, url, params, limiter):
+    """GET one page, retrying throttled and transient failures from the same cursor"""
+    for attempt in range(limiter.max_retries + 1):
+        limiter.wait()
+        try:
+            response = session.get(url, params=params, timeout=30)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == limiter.max_retries:
+                raise
+            limiter.backoff(attempt)
+            continue
+
+        if response.status_code == 200:
+            limiter.observe(response)
+            return response
+        if response.status_code not in RETRYABLE_STATUSES or attempt == limiter.max_retries:
+            raise ShopifyAPIError(response.status_code, response.text, resume_url=url)
+
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if response.status_code == 429 and retry_after is None:
+            retry_after = 1.0 / limiter.leak_rate
+        limiter.backoff(attempt, retry_after)
+
+
+def _iter_pages_serial(session, url, params, limiter):
+    """Fetch pages one after another, yielding each page's products"""
+    while url:
+        try:
+            response = fetch_page(session, url, params, limiter)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise ShopifyAPIError(0, str(e), resume_url=url) from e
+
+        products = response.json().get('products', [])
+        if not products:
+            break
+        yield products
+
+        # Shopify rejects filter params alongside page_info; the next link
+        # already carries everything needed, so only the first request sends them
+        url = parse_next_link(response.headers.get('Link'))
+        params = None
+
+
+def _iter_pages_prefetched(pages, prefetch):
+    """Run a page iterator on a background thread, buffering up to prefetch pages"""
+    buffer = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def produce():
+        try:
+            for page in pages:
+                put(page)
+                if stop.is_set():
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(e)
+
+    worker = threading.Thread(target=produce, name='shopify-prefetch', daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        worker.join()
+
+
+def iter_pages(access_token=None, base_url=None, params=None, session=None, on_page=None,
+               prefetch=1, limiter=None):
+    """Yield each page of products, following the page_info cursor
+
+    on_page, if given, is called as on_page(page_number, products) for every
+    page fetched, which is how the scripts report progress. prefetch is how
+    many pages may be fetched ahead of the caller; 0 fetches inline.
+    """
+    own_session = session is None
+    if own_session:
+        session = create_session(access_token)
+    limiter = limiter or RateLimiter()
+
+    url = base_url or products_url()
+    request_params = {'limit': PAGE_LIMIT, **(params or {})}
+    pages = _iter_pages_serial(session, url, request_params, limiter)
+    if prefetch > 0:
+        pages = _iter_pages_prefetched(pages, prefetch)
+
+    try:
+        for page_number, products in enumerate(pages, 1):
+            if on_page:
+                on_page(page_number, products)
+            yield products
+    finally:
+        pages.close()
+        if own_session:
+            session.close()
+
+
+def iter_products(access_token=None, base_url=None, params=None, session=None, on_page=None,
+                  prefetch=1, limiter=None):
+    """Yield every product in the catalog, one at a time"""
+    for page in iter_pages(access_token, base_url=base_url, params=params, session=session,
+                           on_page=on_page, prefetch=prefetch, limiter=limiter):
+        yield from page
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Local stub of the Shopify products.json endpoint for benchmarking the
+catalog client without touching the real vendor store.
+
+Serves a deterministic synthetic catalog with Link header page_info cursors.
+Product N has updated_at = EPOCH + N minutes, so updated_at_min filters to a
+suffix of the catalog just as an incremental pull would see it.
+Optionally enforces a leaky-bucket rate limit (429 + Retry-After, plus the
+X-Shopify-Shop-Api-Call-Limit header), injects 503s and adds latency.
+
+Usage: python3 shopify_stub_server.py [--port 8765] [--products 5000] [--variants 20]
+                                      [--bucket 40 --leak-rate 2] [--fail-every 0] [--latency 0]
+"""
+import argparse
+import base64
+import json
+import threading
+import time
+import math
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from shopify_catalog import API_VERSION, PAGE_LIMIT
+
+PRODUCTS_PATH = f"/admin/api/{API_VERSION}/products.json"
+SIZES = ['34R', '36R', '38R', '40R', '42R', '44R', '46R', '48R', '50R', '52R',
+         '54R', '38L', '40L', '42L', '44L', '46L', '48L', '50L', '52L', '54L']
+COLORS = ['Black', 'Navy', 'Charcoal', 'Burgundy', 'Ivory', 'Sky Blue', 'Rose', 'Silver']
+SKU_PREFIXES = ['M', 'MJ', 'SMJ', 'SM']
+SKU_SUFFIXES = ['SK', 'H', 'S', 'H1']
+VENDORS = ['Tazzio', 'Perry Ellis', 'Giorgio Inserti', 'Bryan Michaels', 'Statement']
+TYPES = ['Suits', 'Tuxedos', 'Vests', 'Blazers']
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone(timedelta(hours=-4)))
+
+
+def make_product(index, variants_per_product):
+    """Build one synthetic product in the Shopify products.json shape"""
+    prefix = SKU_PREFIXES[index % len(SKU_PREFIXES)]
+    suffix = SKU_SUFFIXES[(index // len(SKU_PREFIXES)) % len(SKU_SUFFIXES)]
+    base_sku = f"{prefix}{100 + index % 900}{suffix}{index // 900 or ''}"
+    color_index = index % len(COLORS)
+    color = COLORS[color_index]
+    product_id = 9000000000 + index
+    variants = []
+    for v in range(variants_per_product):
+        size = SIZES[v % len(SIZES)]
+        variants.append({
+            'id': product_id * 100 + v,
+            'product_id': product_id,
+            'title': f"{color} / {size}",
+            'sku': f"{base_sku}-{color_index + 1:02d}-{size}",
+            'price': f"{149.99 + (index % 5) * 25:.2f}",
+            'compare_at_price': None,
+            'option1': color,
+            'option2': size,
+            'inventory_quantity': (index * 7 + v) % 13,
+            'barcode': f"69{product_id:010d}{v:02d}",
+            'weight': 2.9983,
+            'image_id': product_id * 10
+        })
+    return {
+        'id': product_id,
+        'title': f"Men's {color} Formal Suit {base_sku}",
+        'handle': f"mens-{color.lower().replace(' ', '-')}-formal-suit-{base_sku.lower()}",
+        'vendor': VENDORS[index % len(VENDORS)],
+        'product_type': TYPES[index % len(TYPES)],
+        'updated_at': (EPOCH + timedelta(minutes=index)).isoformat(),
+        'variants': variants,
+        'images': [{'id': product_id * 10, 'src': f"https://cdn.example.com/{base_sku}.jpg"}]
+    }
+
+
+def encode_cursor(offset):
+    """Encode a catalog offset as an opaque page_info token"""
+    return base64.urlsafe_b64encode(str(offset).encode()).decode()
+
+
+def decode_cursor(page_info):
+    """Decode a page_info token back into a catalog offset"""
+    return int(base64.urlsafe_b64decode(page_info.encode()).decode())
+
+
+class LeakyBucket:
+    """Server-side model of Shopify's leaky-bucket rate limit"""
+
+    def __init__(self, size, leak_rate):
+        self.size = size
+        self.leak_rate = leak_rate
+        self.level = 0.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        """Try to spend one call; return (allowed, used, retry_after)"""
+        with self.lock:
+            now = time.monotonic()
+            self.level = max(0.0, self.level - (now - self.updated) * self.leak_rate)
+            self.updated = now
+            if self.level + 1 > self.size:
+                return False, self.size, (self.level + 1 - self.size) / self.leak_rate
+            self.level += 1
+            return True, int(self.level + 0.999), 0.0
+
+
+def first_updated_since(updated_at_min):
+    """Return the first catalog index with updated_at >= updated_at_min"""
+    since = datetime.fromisoformat(updated_at_min.replace('Z', '+00:00'))
+    return max(0, math.ceil((since - EPOCH) / timedelta(minutes=1)))
+
+
+def make_handler(total_products, variants_per_product, bucket=None, fail_every=0, latency=0.0):
+    """Create a request handler class bound to one synthetic catalog"""
+    counter = {'requests': 0}
+    counter_lock = threading.Lock()
+
+    class ProductsHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != PRODUCTS_PATH:
+                self.send_error(404)
+                return
+
+            with counter_lock:
+                counter['requests'] += 1
+                request_number = counter['requests']
+            if latency:
+                time.sleep(latency)
+
+            if fail_every and request_number % fail_every == 0:
+                self.send_json(503, {'errors': 'Service Unavailable'})
+                return
+
+            used = 0
+            if bucket:
+                allowed, used, retry_after = bucket.take()
+                if not allowed:
+                    self.send_json(429, {'errors': 'Exceeded 2 calls per second for api client.'},
+                                   {'Retry-After': f"{retry_after:.2f}",
+                                    'X-Shopify-Shop-Api-Call-Limit': f"{used}/{bucket.size}"})
+                    return
+
+            query = parse_qs(url.query)
+            limit = min(int(query.get('limit', [PAGE_LIMIT])[0]), PAGE_LIMIT)
+            if 'page_info' in query:
+                offset = decode_cursor(query['page_info'][0])
+            elif 'updated_at_min' in query:
+                offset = first_updated_since(query['updated_at_min'][0])
+            else:
+                offset = 0
+
+            end = min(offset + limit, total_products)
+            products = [make_product(i, variants_per_product) for i in range(offset, end)]
+            headers = {}
+            if bucket:
+                headers['X-Shopify-Shop-Api-Call-Limit'] = f"{used}/{bucket.size}"
+            if end < total_products:
+                host = self.headers.get('Host')
+                next_url = f"http://{host}{PRODUCTS_PATH}?limit={limit}&page_info={encode_cursor(end)}"
+                headers['Link'] = f'<{next_url}>; rel="next"'
+            self.send_json(200, {'products': products}, headers)
+
+        def send_json(self, status, payload, headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+    return ProductsHandler
+
+
+def create_server(port=0, total_products=5000, variants_per_product=20,
+                  bucket_size=0, leak_rate=2.0, fail_every=0, latency=0.0):
+    """Create (but do not start) a stub server; port 0 picks a free port
+
+    bucket_size > 0 enables the leaky-bucket limiter, fail_every=N answers
+    every Nth request with a 503, and latency adds a fixed delay per request.
+    """
+    bucket = LeakyBucket(bucket_size, leak_rate) if bucket_size else None
+    handler = make_handler(total_products, variants_per_product, bucket, fail_every, latency)
+    return ThreadingHTTPServer(('127.0.0.1', port), handler)
+
+
+def stub_url(server):
+    """Return the products.json URL a client should use for a stub server"""
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}{PRODUCTS_PATH}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic Shopify products.json catalog")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--variants', type=int, default=20)
+    parser.add_argument('--bucket', type=int, default=0, help="Leaky bucket size (0 disables 429s)")
+    parser.add_argument('--leak-rate', type=float, default=2.0, help="Calls per second leaked")
+    parser.add_argument('--fail-every', type=int, default=0, help="Answer every Nth request with 503")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds of delay per request")
+    args = parser.parse_args()
+
+    server = create_server(args.port, args.products, args.variants, args.bucket,
+                           args.leak_rate, args.fail_every, args.latency)
+    print(f"🧪 Serving {args.products} products at {stub_url(server)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Inverted SKU index over the vendor catalog.
+
+Variant SKUs are normalised and kept in a sorted array, so exact and prefix
+lookups are a pair of bisects, and a base SKU -> color code -> size map
+answers base-SKU lookups directly. Batch queries sort the targets once and
+sweep the array in a single pass.
+
+Only a slim summary of each product is retained (no variants list), so the
+index stays small even when it is built from a streamed catalog.
+"""
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+from sku_parser import normalise as normalise_sku
+from sku_parser import parse_sku
+
+SkuEntry = namedtuple('SkuEntry', ['sku', 'base', 'color_code', 'size', 'product_id', 'variant'])
+
+# Sorts after every character that appears in a SKU, closing a prefix range
+PREFIX_END = '\uffff'
+
+SUMMARY_SKIP_KEYS = {'variants', 'body_html', 'options'}
+
+
+class SkuIndex:
+    """Sorted-array SKU index with a base -> color -> size map"""
+
+    def __init__(self):
+        self.products = {}
+        self.by_base = {}
+        self._pending = []
+        self._entries = []
+        self._keys = []
+
+    @classmethod
+    def from_products(cls, products):
+        """Build an index from an iterable (or stream) of Shopify products"""
+        index = cls()
+        for product in products:
+            index.add_product(product)
+        return index
+
+    def __len__(self):
+        return len(self._entries) + len(self._pending)
+
+    def add_product(self, product):
+        """Index every variant SKU of one product"""
+        product_id = product.get('id')
+        summary = {k: v for k, v in product.items() if k not in SUMMARY_SKIP_KEYS}
+        summary['variants_count'] = len(product.get('variants', []))
+        self.products[product_id] = summary
+
+        for variant in product.get('variants', []):
+            sku = normalise_sku(variant.get('sku'))
+            if not sku:
+                continue
+            parsed = parse_sku(sku)
+            color_code = parsed.color_code or 'N/A'
+            size = parsed.size or 'N/A'
+            entry = SkuEntry(sku, parsed.base, color_code, size, product_id, variant)
+            self._pending.append(entry)
+            self.by_base.setdefault(parsed.base, {}).setdefault(color_code, {}).setdefault(size, []).append(entry)
+
+    def _sorted(self):
+        """Merge pending entries into the sorted array"""
+        if self._pending:
+            self._entries.extend(self._pending)
+            self._entries.sort(key=lambda e: e.sku)
+            self._keys = [e.sku for e in self._entries]
+            self._pending = []
+        return self._keys
+
+    def exact(self, sku):
+        """Return entries whose SKU equals sku"""
+        keys = self._sorted()
+        sku = normalise_sku(sku)
+        return self._entries[bisect_left(keys, sku):bisect_right(keys, sku)]
+
+    def prefix(self, prefix):
+        """Return entries whose SKU starts with prefix"""
+        keys = self._sorted()
+        prefix = normalise_sku(prefix)
+        return self._entries[bisect_left(keys, prefix):bisect_left(keys, prefix + PREFIX_END)]
+
+    def base(self, base_sku):
+        """Return the {color_code: {size: [entries]}} map for a base SKU"""
+        return self.by_base.get(normalise_sku(base_sku), {})
+
+    def base_entries(self, base_sku):
+        """Return every entry for a base SKU, grouped by color code"""
+        return [entry
+                for sizes in self.base(base_sku).values()
+                for entries in sizes.values()
+                for entry in entries]
+
+    def batch(self, targets, mode='exact'):
+        """Resolve many targets in one sorted sweep; return {target: [entries]}
+
+        mode is 'exact', 'prefix' or 'base'.
+        """
+        if mode == 'base':
+            return {target: self.base_entries(target) for target in targets}
+        if mode not in ('exact', 'prefix'):
+            raise ValueError(f"Unknown batch mode: {mode}")
+
+        keys = self._sorted()
+        results = {}
+        lo = 0
+        # Sorted targets only ever move the search window forward
+        for target in sorted(targets, key=normalise_sku):
+            key = normalise_sku(target)
+            lo = bisect_left(keys, key, lo)
+            if mode == 'exact':
+                hi = bisect_right(keys, key, lo)
+            else:
+                hi = bisect_left(keys, key + PREFIX_END, lo)
+            results[target] = self._entries[lo:hi]
+        return {target: results[target] for target in targets}
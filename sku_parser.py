@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Vendor SKU grammar.
+
+Vendor SKUs look like M396SK-02-36S: a base style code, a two-digit color
+code and a size made of the chest measurement plus a length letter
+(S/R/L/XL). Sizes taken from variant options may also carry a waist, as in
+34R/28W. parse_sku() decomposes one SKU with precompiled patterns and an
+LRU cache; parse_many() decomposes a whole column in one regex pass.
+
+The examples in parse_sku() double as regression checks:
+
+  python3 -m doctest sku_parser.py
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+ParsedSku = namedtuple('ParsedSku', ['base', 'color_code', 'size', 'length', 'waist'])
+
+SKU_GRAMMAR = r"""
+    (?P<base>[A-Z]+\d+[A-Z0-9]*)                      # style code, e.g. M396SK, SMJ830H1
+    (?:-(?!\d{2,3}(?:XL|S|R|L)$)                      # not a final size segment, e.g. SM164H1-36R
+       (?P<color_code>[A-Z0-9]{1,4}))?                # color code, e.g. 02
+    (?:-(?P<size>\d{2,3}(?P<length>XL|S|R|L)?)        # size, e.g. 36S
+       (?:/(?P<waist>\d{2})W)?)?                      # optional waist, e.g. /28W
+"""
+
+SKU_RE = re.compile(rf"^{SKU_GRAMMAR}$", re.VERBOSE)
+SIZE_RE = re.compile(r"^(?P<size>\d{2,3}(?P<length>XL|S|R|L)?)(?:/(?P<waist>\d{2})W)?$")
+
+# One alternation per line: the grammar, or a catch-all so every line yields
+# exactly one match and the output columns stay aligned with the input
+BULK_RE = re.compile(rf"^(?:{SKU_GRAMMAR}|(?P<unparsed>[^\n]*))$", re.VERBOSE | re.MULTILINE)
+
+EMPTY = ParsedSku('', None, None, None, None)
+
+
+def normalise(sku):
+    """Normalise a SKU for parsing: trimmed and upper-cased"""
+    return (sku or '').strip().upper()
+
+
+def _fallback(sku):
+    """Decompose a SKU that does not fit the grammar by splitting on dashes"""
+    parts = sku.split('-') + [None, None]
+    return ParsedSku(parts[0], parts[1] or None, parts[2] or None, None, None)
+
+
+@lru_cache(maxsize=65536)
+def parse_sku(sku):
+    """Parse a vendor SKU into (base, color_code, size, length, waist)
+
+    A lone segment after the base is a color code, unless it is a size with
+    a length letter:
+
+    >>> parse_sku('M396SK-02-36S')
+    ParsedSku(base='M396SK', color_code='02', size='36S', length='S', waist=None)
+    >>> parse_sku('M396SK-02')
+    ParsedSku(base='M396SK', color_code='02', size=None, length=None, waist=None)
+    >>> parse_sku('SM164H1-36R')
+    ParsedSku(base='SM164H1', color_code=None, size='36R', length='R', waist=None)
+    >>> parse_sku('M301H-50XL')
+    ParsedSku(base='M301H', color_code=None, size='50XL', length='XL', waist=None)
+    >>> parse_many(['SM164H1-36R', 'M396SK-02-36S'])['color_code']
+    [None, '02']
+    """
+    sku = normalise(sku)
+    if not sku:
+        return EMPTY
+    match = SKU_RE.match(sku)
+    if not match:
+        return _fallback(sku)
+    waist = match.group('waist')
+    return ParsedSku(match.group('base'), match.group('color_code'), match.group('size'),
+                     match.group('length'), int(waist) if waist else None)
+
+
+def base_sku(sku):
+    """Return just the base style code of a SKU"""
+    return parse_sku(sku).base
+
+
+@lru_cache(maxsize=1024)
+def parse_size(size):
+    """Parse a size option like 36R or 34R/28W into (size, length, waist)"""
+    match = SIZE_RE.match(normalise(size))
+    if not match:
+        return size, None, None
+    waist = match.group('waist')
+    return match.group('size'), match.group('length'), int(waist) if waist else None
+
+
+def parse_many(skus):
+    """Parse a column of SKUs in one pass; return a dict of aligned columns
+
+    The SKUs are joined into a single buffer and matched with one compiled
+    multiline pattern, so the per-SKU work happens inside the regex engine.
+    """
+    skus = [normalise(sku).replace('\n', ' ') for sku in skus]
+    columns = {field: [] for field in ParsedSku._fields}
+    if not skus:
+        return columns
+
+    rows = BULK_RE.findall('\n'.join(skus))
+    if len(rows) != len(skus):
+        # Only reachable with pathological input; fall back to row-at-a-time
+        rows = None
+
+    base, color_code, size, length, waist = (columns[f] for f in ParsedSku._fields)
+    if rows is None:
+        for sku in skus:
+            parsed = parse_sku(sku)
+            for field, value in zip(ParsedSku._fields, parsed):
+                columns[field].append(value)
+        return columns
+
+    for sku, (b, c, s, l, w, unparsed) in zip(skus, rows):
+        if unparsed or not b:
+            parsed = _fallback(sku) if sku else EMPTY
+            b, c, s, l, w = parsed
+        else:
+            c, s, l = c or None, s or None, l or None
+            w = int(w) if w else None
+        base.append(b)
+        color_code.append(c)
+        size.append(s)
+        length.append(l)
+        waist.append(w)
+    return columns
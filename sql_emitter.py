@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Streaming writer for generated .sql scripts.
+
+SqlEmitter writes straight to a file (gzip-compressed when the name ends in
+.gz) as each chunk is produced, so generating a script takes the same
+memory for ten products as for ten thousand. Values are quoted by
+quote_literal(), never by hand, and rows go out either as multi-row INSERTs
+or as COPY ... FROM stdin blocks for psql.
+
+  with SqlEmitter.open('import.sql.gz', copy=True) as sql:
+      sql.comment("Product: Navy Suit")
+      sql.rows('product', ['id', 'title'], [('prod_1', "Men's Navy Suit")])
+"""
+import datetime
+import decimal
+import gzip
+import json
+import re
+
+INSERT_BATCH = 500
+
+
+class Raw(str):
+    """SQL text emitted as-is, e.g. Raw('NOW()'); not allowed in COPY rows"""
+
+
+def quote_literal(value):
+    """Render a Python value as a SQL literal (standard_conforming_strings on)"""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, Raw):
+        return value
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float, decimal.Decimal)):
+        return str(value)
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    elif isinstance(value, (datetime.date, datetime.datetime)):
+        value = value.isoformat()
+    value = str(value)
+    if '\x00' in value:
+        raise ValueError("SQL literals cannot contain NUL characters")
+    return "'" + value.replace("'", "''") + "'"
+
+
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+COPY_SPECIAL_RE = re.compile(r"[\\\t\n\r]")
+
+
+def copy_field(value):
+    """Render a Python value as one field of COPY text format"""
+    if type(value) is str:
+        # Most fields need no escaping, and translate() is slow even when nothing changes
+        return value.translate(COPY_ESCAPES) if COPY_SPECIAL_RE.search(value) else value
+    if value is None:
+        return '\\N'
+    if isinstance(value, Raw):
+        raise ValueError(f"Raw SQL {value!r} cannot be used in a COPY row")
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    elif isinstance(value, (datetime.date, datetime.datetime)):
+        value = value.isoformat()
+    return copy_field(str(value))
+
+
+class SqlEmitter:
+    """Write SQL to a text stream chunk by chunk; counts statements and rows"""
+
+    def __init__(self, out, copy=False):
+        self.out = out
+        self.copy = copy
+        self.statements = 0
+        self.row_count = 0
+        self._owned = False
+
+    @classmethod
+    def open(cls, path, copy=False):
+        """Emitter writing to path; gzip-compressed when path ends with .gz"""
+        if path.endswith('.gz'):
+            out = gzip.open(path, 'wt', encoding='utf-8')
+        else:
+            out = open(path, 'w', encoding='utf-8')
+        emitter = cls(out, copy)
+        emitter._owned = True
+        return emitter
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._owned:
+            self.out.close()
+
+    def write(self, text):
+        self.out.write(text)
+
+    def comment(self, text):
+        for line in str(text).splitlines() or ['']:
+            self.out.write(f"-- {line}\n")
+
+    def statement(self, sql):
+        """Write one complete statement; a trailing ';' is added"""
+        self.out.write(sql.rstrip().rstrip(';') + ";\n")
+        self.statements += 1
+
+    def rows(self, table, columns, rows, on_conflict=''):
+        """Write rows as COPY in copy mode, otherwise as multi-row INSERTs
+
+        on_conflict (e.g. 'ON CONFLICT DO NOTHING') only applies to INSERTs.
+        """
+        if self.copy:
+            self.copy_rows(table, columns, rows)
+        else:
+            self.insert(table, columns, rows, on_conflict)
+
+    def insert(self, table, columns, rows, on_conflict='', batch=INSERT_BATCH):
+        head = f"INSERT INTO {table} ({', '.join(columns)}) VALUES\n"
+        tail = f"\n{on_conflict};\n" if on_conflict else ";\n"
+        pending = []
+        for row in rows:
+            pending.append("    (" + ", ".join(quote_literal(v) for v in row) + ")")
+            if len(pending) == batch:
+                self._flush_insert(head, pending, tail)
+                pending = []
+        if pending:
+            self._flush_insert(head, pending, tail)
+
+    def _flush_insert(self, head, lines, tail):
+        self.out.write(head + ",\n".join(lines) + tail)
+        self.statements += 1
+        self.row_count += len(lines)
+
+    def copy_rows(self, table, columns, rows):
+        wrote_header = False
+        for row in rows:
+            if not wrote_header:
+                self.out.write(f"COPY {table} ({', '.join(columns)}) FROM stdin;\n")
+                wrote_header = True
+            self.out.write("\t".join(copy_field(v) for v in row) + "\n")
+            self.row_count += 1
+        if wrote_header:
+            self.out.write("\\.\n")
+            self.statements += 1
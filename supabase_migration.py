@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""
+Pipelined Supabase -> Medusa product migration.
+
+Three stages run on their own threads, joined by small bounded queues so a
+slow stage holds the others back instead of buffering the whole catalog:
+
+  read       a server-side cursor streams Supabase products in chunks
+  transform  each row becomes a ProductRecord: the product row, its
+             variants (full size range for suits and tuxedos) and the
+             sales channel link
+  write      each chunk is written with one execute_values statement per
+             table, then committed; with writers > 1 every writer has its
+             own Medusa connection
+
+If a chunk fails, it is rolled back and written again one product at a time,
+each under a savepoint, so one bad row only fails its own product. The
+pipeline collects the ids of the variants it inserts, so the inventory
+backfill (inventory_backfill) only has to look at those.
+
+Runs are resumable. Source rows are read in ascending (created_at, id)
+order and, once every chunk up to a row has been committed, that row's
+position is saved in supabase_migration_checkpoint. A run that dies part
+way leaves its checkpoint behind and the next run reads on from there; the
+caller clears it once the run is complete. Reading oldest first means a
+product added to Supabase in the meantime sorts after the checkpoint, so
+the resumed run still picks it up. Products are matched on supabase_id
+before handle, so re-writing a chunk that committed just before a crash
+updates the same products instead of adding new ones.
+
+migrate-supabase.py is the command-line entry point.
+"""
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from psycopg2.extras import Json, execute_values
+
+import medusa_db
+
+SALES_CHANNEL_ID = 'sc_01K3S6WP4KCEJX26GNPQKTHTBE'
+CHECKPOINT_NAME = 'supabase_products'
+
+CHUNK_SIZE = 200
+QUEUE_DEPTH = 4
+
+# Size configurations for menswear
+SIZES = {
+    'regular': [f"{i}R" for i in range(34, 57, 2)],  # 34R-56R
+    'short': [f"{i}S" for i in range(34, 47, 2)],    # 34S-46S
+    'long': [f"{i}L" for i in range(38, 57, 2)]      # 38L-56L
+}
+
+SOURCE_SQL = """
+    SELECT
+        id, title, name, handle, description, sku, style_code,
+        vendor, category, type, color, price, compare_at_price,
+        image_url, images, sizes, tags, status, inventory,
+        created_at, updated_at
+    FROM products
+    WHERE (status = 'active' OR status IS NULL)
+    AND (
+        -- resume after the checkpoint row; NULL created_at sorts first
+        %(after_id)s::text IS NULL
+        OR (created_at, id) > (%(after_created_at)s, %(after_id)s)
+        OR (%(after_created_at)s::timestamptz IS NULL AND (created_at IS NOT NULL OR id > %(after_id)s))
+    )
+    ORDER BY created_at ASC NULLS FIRST, id ASC
+"""
+
+# Live products already migrated from these Supabase rows, whatever their
+# handle is now; served by idx_product_supabase_id (metadata_indexes)
+RESOLVE_SUPABASE_IDS = """
+    SELECT metadata->>'supabase_id', handle
+    FROM product
+    WHERE metadata->>'supabase_id' = ANY(%s) AND deleted_at IS NULL
+"""
+
+# Products are matched on their live handle; the WHERE lets the upsert use
+# Medusa's partial unique index (a plain unique index matches it too)
+UPSERT_PRODUCTS = """
+    INSERT INTO product (
+        id, handle, title, subtitle, description, status,
+        thumbnail, is_giftcard, metadata, created_at, updated_at
+    ) VALUES %s
+    ON CONFLICT (handle) WHERE deleted_at IS NULL DO UPDATE SET
+        title = EXCLUDED.title,
+        description = EXCLUDED.description,
+        thumbnail = EXCLUDED.thumbnail,
+        metadata = EXCLUDED.metadata,
+        updated_at = NOW()
+    RETURNING id, handle
+"""
+PRODUCT_TEMPLATE = "(%s, %s, %s, %s, %s, 'published', %s, false, %s, NOW(), NOW())"
+
+INSERT_VARIANTS = """
+    INSERT INTO product_variant (
+        id, product_id, title, sku, manage_inventory,
+        allow_backorder, metadata, created_at, updated_at
+    ) VALUES %s
+    ON CONFLICT (sku) WHERE deleted_at IS NULL DO NOTHING
+    RETURNING id
+"""
+VARIANT_TEMPLATE = "(%s, %s, %s, %s, true, false, %s, NOW(), NOW())"
+
+LINK_SALES_CHANNELS = """
+    INSERT INTO product_sales_channel (
+        id, product_id, sales_channel_id, created_at, updated_at
+    )
+    SELECT v.id, v.product_id, v.sales_channel_id, NOW(), NOW()
+    FROM (VALUES %s) AS v (id, product_id, sales_channel_id)
+    WHERE NOT EXISTS (
+        SELECT 1 FROM product_sales_channel psc
+        WHERE psc.product_id = v.product_id AND psc.sales_channel_id = v.sales_channel_id
+    )
+    RETURNING id
+"""
+
+SUMMARY_SQL = """
+    SELECT
+        COUNT(DISTINCT p.id) as products,
+        COUNT(DISTINCT pv.id) as variants,
+        COUNT(DISTINCT ii.id) as inventory_items
+    FROM product p
+    LEFT JOIN product_variant pv ON pv.product_id = p.id
+    LEFT JOIN inventory_item ii ON ii.sku = pv.sku
+    WHERE p.metadata->>'supabase_id' IS NOT NULL
+"""
+
+CHECKPOINT_TABLE = """
+    CREATE TABLE IF NOT EXISTS supabase_migration_checkpoint (
+        name text PRIMARY KEY,
+        started_at timestamptz NOT NULL DEFAULT NOW(),
+        last_created_at timestamptz,
+        last_id text,
+        products integer NOT NULL DEFAULT 0,
+        updated_at timestamptz NOT NULL DEFAULT NOW()
+    )
+"""
+
+LOAD_CHECKPOINT = """
+    SELECT started_at, last_created_at, last_id, products
+    FROM supabase_migration_checkpoint
+    WHERE name = %s
+"""
+
+START_CHECKPOINT = """
+    INSERT INTO supabase_migration_checkpoint (name) VALUES (%s)
+    RETURNING started_at
+"""
+
+SAVE_CHECKPOINT = """
+    UPDATE supabase_migration_checkpoint
+    SET last_created_at = %s, last_id = %s, products = products + %s, updated_at = NOW()
+    WHERE name = %s
+"""
+
+# started_at is when the run that owns the checkpoint began; created_at and
+# source_id are the last source row committed (None before the first chunk)
+Checkpoint = namedtuple('Checkpoint', 'started_at created_at source_id products resumed')
+
+# product is the row for UPSERT_PRODUCTS (an existing product with the same
+# handle keeps its own id); variants are (id, title, sku, metadata) tuples
+ProductRecord = namedtuple('ProductRecord', 'supabase_id title handle product variants')
+
+
+def generate_id(prefix):
+    """Generate Medusa-compatible ID"""
+    # Same shape as str(uuid.uuid4())[:16], without building a UUID object per id
+    raw = os.urandom(8).hex()
+    return f"{prefix}_{raw[:8]}-{raw[8:15]}"
+
+
+def create_handle(title):
+    """Create URL-friendly handle from title"""
+    if not title:
+        return generate_id('product')
+    return title.lower().replace(' ', '-').replace('/', '-').replace('&', 'and')
+
+
+def is_suit(title, category, prod_type):
+    """Suits and tuxedos get the full size range"""
+    return any(value and ('suit' in value.lower() or 'tuxedo' in value.lower())
+               for value in (category, prod_type, title))
+
+
+def transform(row):
+    """Turn one Supabase products row into a ProductRecord"""
+    (sup_id, title, name, handle, description, sku, style_code,
+     vendor, category, prod_type, color, price, compare_price,
+     image_url, images, sizes, tags, status, inventory,
+     created_at, updated_at) = row
+
+    # Use title or name
+    product_title = title or name or f"Product {sup_id}"
+    product_handle = handle or create_handle(product_title)
+
+    # Prepare metadata
+    metadata = {
+        'sku_base': sku or style_code or product_handle,
+        'vendor': vendor or 'KCT Menswear',
+        'style': style_code,
+        'color': color,
+        'price': float(price) if price else 199.99,
+        'compare_at_price': float(compare_price) if compare_price else None,
+        'images': images or [],
+        'category': category,
+        'type': prod_type,
+        'tags': tags or [],
+        'supabase_id': sup_id,
+        'inventory': inventory
+    }
+    product = (
+        generate_id('prod'), product_handle, product_title,
+        style_code, description or '',
+        image_url or (images[0] if images else None),
+        Json(metadata),
+    )
+
+    # Create variants
+    if is_suit(product_title, category, prod_type):
+        # Add full size range for suits
+        variants = [
+            (generate_id('var'), size, f"{metadata['sku_base']}-{size}",
+             Json({'size': size, 'size_type': size_type.capitalize()}))
+            for size_type, size_list in SIZES.items() for size in size_list
+        ]
+    elif sizes:
+        # Use sizes from Supabase
+        variants = [(generate_id('var'), size, f"{metadata['sku_base']}-{size}", Json({'size': size}))
+                    for size in sizes]
+    else:
+        # Single default variant
+        variants = [(generate_id('var'), 'Default', metadata['sku_base'], Json({'default': True}))]
+
+    return ProductRecord(sup_id, product_title, product_handle, product, variants)
+
+
+def write_records(cursor, records, sales_channel_id=SALES_CHANNEL_ID):
+    """Write products, variants and sales channel links for records
+
+    Returns (counts, ids of the variants inserted).
+
+    One statement per table. A record whose supabase_id was migrated before
+    updates that product under its current handle. A handle that appears
+    twice is written once, with the later row's fields, as the row-by-row
+    migration would have left it. The caller owns the transaction.
+    """
+    cursor.execute(RESOLVE_SUPABASE_IDS, ([str(record.supabase_id) for record in records],))
+    migrated = dict(cursor.fetchall())
+
+    products = {}
+    handles = []
+    for record in records:
+        handle = migrated.get(str(record.supabase_id), record.handle)
+        products[handle] = record.product[:1] + (handle,) + record.product[2:]
+        handles.append(handle)
+    returned = execute_values(cursor, UPSERT_PRODUCTS, list(products.values()),
+                              template=PRODUCT_TEMPLATE, page_size=1000, fetch=True)
+    product_ids = {handle: product_id for product_id, handle in returned}
+
+    variants = [(variant_id, product_ids[handle], title, sku, metadata)
+                for record, handle in zip(records, handles)
+                for variant_id, title, sku, metadata in record.variants]
+    inserted = execute_values(cursor, INSERT_VARIANTS, variants, template=VARIANT_TEMPLATE,
+                              page_size=5000, fetch=True) if variants else []
+
+    links = [(generate_id('psc'), product_id, sales_channel_id) for product_id in product_ids.values()]
+    linked = execute_values(cursor, LINK_SALES_CHANNELS, links, page_size=1000, fetch=True)
+
+    counts = {'products': len(product_ids), 'variants': len(inserted), 'sales_channel_links': len(linked)}
+    return counts, [variant_id for variant_id, in inserted]
+
+
+class StageStats:
+    """Rows handled and time spent working (not waiting on queues) by one stage"""
+
+    def __init__(self, name, unit='rows'):
+        self.name = name
+        self.unit = unit
+        self.rows = 0
+        self.busy = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, rows, seconds):
+        with self._lock:
+            self.rows += rows
+            self.busy += seconds
+
+    def line(self, wall):
+        rate = self.rows / self.busy if self.busy else 0.0
+        return (f"{self.name:<10} {self.rows:>8} {self.unit:<9} {self.busy:>7.2f}s busy "
+                f"{rate:>10.0f} {self.unit}/s busy  {self.rows / wall if wall else 0.0:>8.0f}/s wall")
+
+
+class MigrationPipeline:
+    """Read -> transform -> write, each stage on its own thread(s)"""
+
+    def __init__(self, chunk_size=CHUNK_SIZE, writers=1, sales_channel_id=SALES_CHANNEL_ID,
+                 source_sql=SOURCE_SQL, checkpoint_name=CHECKPOINT_NAME):
+        """checkpoint_name=None runs from the beginning without saving a checkpoint"""
+        self.chunk_size = chunk_size
+        self.writers = writers
+        self.sales_channel_id = sales_channel_id
+        self.source_sql = source_sql
+        self.checkpoint_name = checkpoint_name
+        self.checkpoint = None  # the Checkpoint this run started from
+        self.stats = {
+            'read': StageStats('read'),
+            'transform': StageStats('transform'),
+            'write': StageStats('write', 'products'),
+            'variants': StageStats('variants', 'variants'),
+        }
+        self.failures = []  # (supabase_id, title, error)
+        self.counts = dict.fromkeys(['products', 'variants', 'sales_channel_links'], 0)
+        self.variant_ids = []  # every variant inserted, for the inventory backfill
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+        self._errors = []
+        self._stop = threading.Event()
+        self._committed = {}  # chunk number -> (position, products), until the checkpoint passes it
+        self._next_chunk = 0  # first chunk not yet covered by the checkpoint
+
+    # --- stages -------------------------------------------------------------
+
+    def _put(self, out, item):
+        while not self._stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, source):
+        while True:
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return None
+
+    def _stage(self, work, *finish):
+        """Run work(); on error stop the pipeline. finish() always runs after"""
+        try:
+            work()
+        except BaseException as e:
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            for callback in finish:
+                callback()
+
+    def _read(self, chunks):
+        conn = medusa_db.connect('supabase')
+        after = self.checkpoint or Checkpoint(None, None, None, 0, False)
+        try:
+            rows = medusa_db.stream(conn, self.source_sql,
+                                    {'after_created_at': after.created_at, 'after_id': after.source_id},
+                                    itersize=self.chunk_size, cursor_name='supabase_migration')
+            for number in itertools.count():
+                if self._stop.is_set():
+                    break
+                start = time.perf_counter()
+                chunk = list(itertools.islice(rows, self.chunk_size))
+                self.stats['read'].add(len(chunk), time.perf_counter() - start)
+                if not chunk:
+                    break
+                self._put(chunks, (number, chunk))
+            rows.close()
+        finally:
+            medusa_db.release(conn)
+
+    def _transform(self, chunks, batches):
+        while True:
+            item = self._get(chunks)
+            if item is None:
+                return
+            number, chunk = item
+            start = time.perf_counter()
+            batch = [transform(row) for row in chunk]
+            self.stats['transform'].add(len(chunk), time.perf_counter() - start)
+            position = (chunk[-1][-2], chunk[-1][0])  # (created_at, id) of the last row
+            self._put(batches, (number, position, batch))
+
+    def _write(self, writer, batches, on_chunk):
+        conn = medusa_db.connect()
+        try:
+            while True:
+                item = self._get(batches)
+                if item is None:
+                    return
+                number, position, batch = item
+                start = time.perf_counter()
+                counts, variant_ids, failures = self._write_batch(conn, batch)
+                seconds = time.perf_counter() - start
+                self.stats['write'].add(len(batch) - len(failures), seconds)
+                self.stats['variants'].add(counts['variants'], seconds)
+                with self._lock:
+                    for key, value in counts.items():
+                        self.counts[key] += value
+                    self.variant_ids.extend(variant_ids)
+                    self.failures.extend(failures)
+                    self._advance_checkpoint(conn, number, position, counts['products'])
+                    if on_chunk:
+                        on_chunk(writer, batch, counts, failures)
+        finally:
+            medusa_db.release(conn)
+
+    def _write_batch(self, conn, batch):
+        """Write a chunk in one transaction; on error retry it product by product
+
+        Returns (counts, variant_ids, failures).
+        """
+        try:
+            with conn.cursor() as cursor:
+                counts, variant_ids = write_records(cursor, batch, self.sales_channel_id)
+            conn.commit()
+            return counts, variant_ids, []
+        except Exception:
+            conn.rollback()
+
+        counts = dict.fromkeys(self.counts, 0)
+        variant_ids = []
+        failures = []
+        with conn.cursor() as cursor:
+            for record in batch:
+                cursor.execute("SAVEPOINT migrate_product")
+                try:
+                    written, inserted = write_records(cursor, [record], self.sales_channel_id)
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO SAVEPOINT migrate_product")
+                    failures.append((record.supabase_id, record.title, str(e).strip().splitlines()[0]))
+                    continue
+                cursor.execute("RELEASE SAVEPOINT migrate_product")
+                for key, value in written.items():
+                    counts[key] += value
+                variant_ids.extend(inserted)
+        conn.commit()
+        return counts, variant_ids, failures
+
+    def _advance_checkpoint(self, conn, number, position, products):
+        """Record chunk number as committed and save the checkpoint if it can move
+
+        Writers commit out of order, so the checkpoint only moves past chunks
+        that have all been committed. Called with self._lock held. A crash
+        before this commits redoes the chunk, which write_records makes safe.
+        """
+        if not self.checkpoint_name:
+            return
+        self._committed[number] = (position, products)
+        position, products = None, 0
+        while self._next_chunk in self._committed:
+            position, chunk_products = self._committed.pop(self._next_chunk)
+            products += chunk_products
+            self._next_chunk += 1
+        if position:
+            with conn.cursor() as cursor:
+                save_checkpoint(cursor, self.checkpoint_name, *position, products)
+            conn.commit()
+
+    # --- driver -------------------------------------------------------------
+
+    def run(self, on_chunk=None):
+        """Migrate every source product after the checkpoint; returns self.counts
+
+        on_chunk(writer_number, records, counts, failures) is called after each
+        chunk is committed, one call at a time. The checkpoint is left in
+        place; clear_checkpoint() it once the run's follow-up work is done.
+        """
+        if self.checkpoint_name:
+            conn = medusa_db.connect()
+            try:
+                with conn.cursor() as cursor:
+                    self.checkpoint = load_checkpoint(cursor, self.checkpoint_name)
+                conn.commit()
+            finally:
+                medusa_db.release(conn)
+
+        chunks = queue.Queue(maxsize=QUEUE_DEPTH)
+        batches = queue.Queue(maxsize=QUEUE_DEPTH)
+        writer_count = max(1, self.writers)
+
+        def end_of_chunks():
+            self._put(chunks, None)
+
+        def end_of_batches():
+            for _ in range(writer_count):
+                self._put(batches, None)
+
+        threads = [
+            threading.Thread(target=self._stage, args=(lambda: self._read(chunks), end_of_chunks),
+                             name='migrate-read', daemon=True),
+            threading.Thread(target=self._stage, args=(lambda: self._transform(chunks, batches), end_of_batches),
+                             name='migrate-transform', daemon=True),
+        ] + [
+            threading.Thread(target=self._stage, args=(lambda n=n: self._write(n, batches, on_chunk),),
+                             name=f'migrate-write-{n}', daemon=True)
+            for n in range(1, writer_count + 1)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.elapsed = time.perf_counter() - start
+        if self._errors:
+            raise self._errors[0]
+        return self.counts
+
+    def report(self):
+        """Per-stage throughput lines"""
+        return [self.stats[name].line(self.elapsed) for name in ('read', 'transform', 'write', 'variants')]
+
+
+def load_checkpoint(cursor, name=CHECKPOINT_NAME):
+    """Return the saved Checkpoint for name, starting a new one if there is none"""
+    cursor.execute(CHECKPOINT_TABLE)
+    cursor.execute(LOAD_CHECKPOINT, (name,))
+    row = cursor.fetchone()
+    if row:
+        return Checkpoint(*row, resumed=True)
+    cursor.execute(START_CHECKPOINT, (name,))
+    return Checkpoint(cursor.fetchone()[0], None, None, 0, resumed=False)
+
+
+def save_checkpoint(cursor, name, created_at, source_id, products):
+    """Move the checkpoint to the source row (created_at, source_id)"""
+    cursor.execute(SAVE_CHECKPOINT, (created_at, str(source_id), products, name))
+
+
+def clear_checkpoint(cursor, name=CHECKPOINT_NAME):
+    """Forget the checkpoint, so the next run starts from the beginning"""
+    cursor.execute(CHECKPOINT_TABLE)
+    cursor.execute("DELETE FROM supabase_migration_checkpoint WHERE name = %s", (name,))
+
+
+def migration_summary(cursor):
+    """(products, variants, inventory_items) that came from Supabase"""
+    cursor.execute(SUMMARY_SQL)
+    return cursor.fetchone()
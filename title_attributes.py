@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Color, pattern, fabric and lapel extraction from product titles.
+
+Every phrase in VOCABULARY is compiled once into a single regex, factored
+as a character trie and anchored on word boundaries. One left-to-right scan
+of a title returns non-overlapping, longest matches: "Burnt Orange" wins
+over "Orange", "Blush Pink" over "Pink", and "tan" no longer matches inside
+"Standard". Any punctuation between words is accepted, so "Lt. Gray" and
+"Pin-Stripe" match too.
+
+The trie factoring matters: a flat alternation makes re try every phrase at
+every character, which measured slower than the old substring loop.
+
+  >>> extract_attributes("Black Gold Design Tuxedo").color
+  'Black & Gold'
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+VOCABULARY = {
+    'color': {
+        'black': 'Black',
+        'jet black': 'Black',
+        'navy': 'Navy',
+        'blue': 'Blue',
+        'royal blue': 'Royal Blue',
+        'beau blue': 'Beau Blue',
+        'estate blue': 'Estate Blue',
+        'smoked blue': 'Smoky Blue',
+        'grey': 'Grey',
+        'gray': 'Grey',
+        'light grey': 'Light Grey',
+        'light gray': 'Light Grey',
+        'lt gray': 'Light Grey',
+        'lt grey': 'Light Grey',
+        'dark grey': 'Dark Grey',
+        'dark gray': 'Dark Grey',
+        'charcoal': 'Charcoal',
+        'silver': 'Silver',
+        'brown': 'Brown',
+        'burgundy': 'Burgundy',
+        'burgundy wine': 'Burgundy',
+        'ivory': 'Ivory',
+        'white': 'White',
+        'champagne': 'Champagne',
+        'pink': 'Pink',
+        'blush': 'Blush Pink',
+        'blush pink': 'Blush Pink',
+        'dusty rose': 'Dusty Rose',
+        'burnt orange': 'Burnt Orange',
+        'orange': 'Orange',
+        'hunter green': 'Hunter Green',
+        'forest green': 'Forest Green',
+        'emerald green': 'Emerald Green',
+        'green': 'Green',
+        'teal': 'Teal',
+        'dark teal': 'Dark Teal',
+        'mint': 'Mint',
+        'sand': 'Sand',
+        'tan': 'Tan',
+        'wine': 'Wine',
+        'red': 'Red',
+        'gold': 'Gold',
+        'purple': 'Purple',
+        'vivid purple': 'Purple',
+        'lavender': 'Lavender',
+        'rust': 'Rust',
+        'mocha': 'Mocha Brown',
+        'canyon clay': 'Canyon Clay',
+        'brick': 'Brick Red',
+    },
+    'pattern': {
+        'pinstripe': 'Pinstripe',
+        'pin stripe': 'Pinstripe',
+        'stripe': 'Striped',
+        'striped': 'Striped',
+        'strip': 'Striped',
+        'paisley': 'Paisley',
+        'plaid': 'Plaid',
+        'windowpane': 'Windowpane',
+        'houndstooth': 'Houndstooth',
+        'check': 'Check',
+        'solid': 'Solid',
+        'design': 'Designer Pattern',
+    },
+    'fabric': {
+        'velvet': 'Velvet',
+        'satin': 'Satin',
+        'shiny satin': 'Satin',
+        'wool': 'Wool',
+        'linen': 'Linen',
+        'tweed': 'Tweed',
+        'sharkskin': 'Sharkskin',
+        'performance stretch': 'Performance Stretch',
+    },
+    'lapel': {
+        'shawl': 'Shawl',
+        'shawl lapel': 'Shawl',
+        'shawl collar': 'Shawl',
+        'notch': 'Notch',
+        'notch lapel': 'Notch',
+        'peak': 'Peak',
+        'peak lapel': 'Peak',
+    },
+}
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+SEPARATOR = r"[^a-z0-9]+"
+
+KINDS = ('color', 'pattern', 'fabric', 'lapel')
+
+
+class TitleAttributes(namedtuple('TitleAttributes', 'colors patterns fabrics lapels suit_like')):
+    __slots__ = ()
+
+    @property
+    def color(self):
+        return primary_color(self)
+
+
+def _trie_pattern(node):
+    """Regex for a character trie; a phrase that can continue prefers the longer match"""
+    branches = [(SEPARATOR if char == ' ' else re.escape(char)) + _trie_pattern(child)
+                for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    return f"(?:{body})?" if '' in node else body
+
+
+def _compile(vocabulary):
+    """Return the phrase regex and {normalized phrase: (kind index, value)}"""
+    phrases = {}
+    trie = {}
+    for kind, entries in vocabulary.items():
+        for phrase, value in entries.items():
+            key = ' '.join(WORD_RE.findall(phrase.lower()))
+            phrases[key] = (KINDS.index(kind), value)
+            node = trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node[''] = {}
+    return re.compile(rf"\b{_trie_pattern(trie)}\b"), phrases
+
+
+PHRASE_RE, PHRASES = _compile(VOCABULARY)
+
+
+def extract_attributes(title):
+    """Return the TitleAttributes of one title; each tuple is in title order, deduplicated"""
+    title_lower = (title or '').lower()
+    return _attributes(tuple(PHRASE_RE.findall(title_lower)), 'suit' in title_lower or 'tuxedo' in title_lower)
+
+
+@lru_cache(maxsize=4096)
+def _attributes(matches, suit_like):
+    # Catalog titles repeat a small set of phrase combinations, so results are cached per combination
+    found = ([], [], [], [])
+    for text in matches:
+        kind, value = PHRASES.get(text) or PHRASES[' '.join(WORD_RE.findall(text))]
+        if value not in found[kind]:
+            found[kind].append(value)
+    return TitleAttributes(*map(tuple, found), suit_like)
+
+
+def extract_all(titles):
+    """extract_attributes() for many titles at once"""
+    return [extract_attributes(title) for title in titles]
+
+
+def primary_color(attributes):
+    """The single color to store in metadata, following the catalog's naming rules
+
+    Gold design and paisley pieces keep both colors ("Black & Gold"); other
+    multi-color titles use the first one. Suits and tuxedos without a color
+    word are 'Classic'.
+    """
+    colors = attributes.colors
+    if len(colors) > 1 and 'Gold' in colors and ({'Designer Pattern', 'Paisley'} & set(attributes.patterns)):
+        return ' & '.join(colors[:2])
+    if colors:
+        return colors[0]
+    if attributes.suit_like:
+        return 'Classic'
+    return None
+
+
+def extract_color(title):
+    """Primary color of one title, or None"""
+    return primary_color(extract_attributes(title))
+
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Set-based variant and price rebuild for Medusa products.
+
+Every size of a product needs five rows: product_variant, price_set, the
+product_variant_price_set link, price and a region price_rule. Instead of
+five INSERTs per size, rows for any number of products are staged in memory
+and each table is written with a single execute_values statement.
+
+The old rows are removed by teardown_variants(), a single data-modifying CTE
+that walks variant -> link -> price set -> price -> rule on the server;
+count_teardown() counts the same rows without deleting them, for dry runs.
+
+reconcile_variants() is the incremental alternative: it loads the current
+variant/price graph, diffs it against the target sizes and price, and only
+writes what changed, so repeat runs keep variant IDs stable.
+"""
+import json
+import uuid
+from collections import Counter, namedtuple
+from decimal import Decimal
+
+from psycopg2.extras import execute_values
+
+import medusa_db
+
+# Region ID for US
+REGION_ID = 'reg_01K3S6NDGAC1DSWH9MCZCWBWWD'
+
+# Define size arrays
+REGULAR_SIZES = ['36R', '38R', '40R', '42R', '44R', '46R', '48R', '50R', '52R', '54R']
+LONG_SIZES = ['38L', '40L', '42L', '44L', '46L', '48L', '50L', '52L', '54L']
+ALL_SUIT_SIZES = REGULAR_SIZES + LONG_SIZES  # 19 total sizes
+
+# Tables in foreign-key order, with the execute_values template for each
+INSERTS = [
+    ('product_variant', """
+        INSERT INTO product_variant (id, product_id, title, sku, manage_inventory, created_at, updated_at)
+        VALUES %s
+    """, "(%s, %s, %s, %s, false, NOW(), NOW())"),
+    ('price_set', """
+        INSERT INTO price_set (id, created_at, updated_at)
+        VALUES %s
+    """, "(%s, NOW(), NOW())"),
+    ('product_variant_price_set', """
+        INSERT INTO product_variant_price_set (id, variant_id, price_set_id, created_at, updated_at)
+        VALUES %s
+    """, "(%s, %s, %s, NOW(), NOW())"),
+    ('price', """
+        INSERT INTO price (id, price_set_id, currency_code, amount, raw_amount, created_at, updated_at)
+        VALUES %s
+    """, "(%s, %s, 'usd', %s, %s::jsonb, NOW(), NOW())"),
+    ('price_rule', """
+        INSERT INTO price_rule (id, value, priority, price_id, attribute, operator, created_at, updated_at)
+        VALUES %s
+    """, "(%s, %s, 0, %s, 'region_id', 'eq', NOW(), NOW())"),
+]
+
+# One statement removes the whole variant/price graph for a set of products.
+# Every CTE sees the same snapshot and foreign keys are checked at the end of
+# the statement, so the deletes can run in any order.
+TEARDOWN_SQL = """
+    WITH variants AS (
+        DELETE FROM product_variant
+        WHERE {column} = ANY(%(ids)s)
+        RETURNING id
+    ), links AS (
+        DELETE FROM product_variant_price_set
+        WHERE variant_id IN (SELECT id FROM variants)
+        RETURNING price_set_id
+    ), price_sets AS (
+        DELETE FROM price_set
+        WHERE id IN (SELECT price_set_id FROM links)
+        RETURNING id
+    ), prices AS (
+        DELETE FROM price
+        WHERE price_set_id IN (SELECT price_set_id FROM links)
+        RETURNING id
+    ), price_rules AS (
+        DELETE FROM price_rule
+        WHERE price_id IN (SELECT id FROM prices)
+        RETURNING id
+    )
+    SELECT
+        (SELECT COUNT(*) FROM variants),
+        (SELECT COUNT(*) FROM links),
+        (SELECT COUNT(*) FROM price_sets),
+        (SELECT COUNT(*) FROM prices),
+        (SELECT COUNT(*) FROM price_rules)
+"""
+
+TEARDOWN_TABLES = ['product_variant', 'product_variant_price_set', 'price_set', 'price', 'price_rule']
+
+# The rows TEARDOWN_SQL would delete, counted without deleting them (dry runs)
+TEARDOWN_COUNT_SQL = """
+    WITH variants AS (
+        SELECT id FROM product_variant
+        WHERE {column} = ANY(%(ids)s)
+    ), links AS (
+        SELECT price_set_id FROM product_variant_price_set
+        WHERE variant_id IN (SELECT id FROM variants)
+    ), prices AS (
+        SELECT id FROM price
+        WHERE price_set_id IN (SELECT price_set_id FROM links)
+    )
+    SELECT
+        (SELECT COUNT(*) FROM variants),
+        (SELECT COUNT(*) FROM links),
+        (SELECT COUNT(*) FROM price_set WHERE id IN (SELECT price_set_id FROM links)),
+        (SELECT COUNT(*) FROM prices),
+        (SELECT COUNT(*) FROM price_rule WHERE price_id IN (SELECT id FROM prices))
+"""
+
+# Current variant graph, one row per variant (extra links or prices are ignored)
+GRAPH_SQL = """
+    SELECT DISTINCT ON (pv.id)
+        pv.product_id, pv.id, pv.title, pv.sku, pv.manage_inventory,
+        pvps.price_set_id, pr.id, pr.amount, rule.id, rule.value
+    FROM product_variant pv
+    LEFT JOIN product_variant_price_set pvps ON pvps.variant_id = pv.id
+    LEFT JOIN price pr ON pr.price_set_id = pvps.price_set_id AND pr.currency_code = 'usd'
+    LEFT JOIN price_rule rule ON rule.price_id = pr.id AND rule.attribute = 'region_id'
+    WHERE pv.product_id = ANY(%s) AND pv.deleted_at IS NULL
+    ORDER BY pv.id, pvps.price_set_id, pr.id, rule.id
+"""
+
+# Read once per product by every reconcile, so prepared once per connection
+GRAPH_STATEMENT = medusa_db.Statement('variant_graph', GRAPH_SQL)
+
+VariantState = namedtuple('VariantState', [
+    'product_id', 'variant_id', 'size', 'sku', 'manage_inventory',
+    'price_set_id', 'price_id', 'amount', 'rule_id', 'rule_value',
+])
+
+UPDATES = {
+    'sku': ("""
+        UPDATE product_variant SET sku = v.sku, updated_at = NOW()
+        FROM (VALUES %s) AS v (id, sku)
+        WHERE product_variant.id = v.id
+    """, None),
+    # Variants are created with inventory tracking off (INSERTS), so existing ones are brought in line
+    'manage_inventory': ("""
+        UPDATE product_variant SET manage_inventory = false, updated_at = NOW()
+        FROM (VALUES %s) AS v (id)
+        WHERE product_variant.id = v.id
+    """, None),
+    'price': ("""
+        UPDATE price SET amount = v.amount, raw_amount = v.raw_amount::jsonb, updated_at = NOW()
+        FROM (VALUES %s) AS v (id, amount, raw_amount)
+        WHERE price.id = v.id
+    """, "(%s, %s::numeric, %s)"),
+    'price_rule': ("""
+        UPDATE price_rule SET value = v.value, updated_at = NOW()
+        FROM (VALUES %s) AS v (id, value)
+        WHERE price_rule.id = v.id
+    """, None),
+}
+
+
+def generate_id(prefix=''):
+    """Generate a unique ID with optional prefix"""
+    return f"{prefix}{uuid.uuid4().hex[:24]}"
+
+
+def raw_amount(price_cents):
+    """Medusa's raw_amount jsonb for an integer amount"""
+    return json.dumps({"value": str(price_cents), "precision": 20})
+
+
+def new_staging():
+    """Empty per-table row lists for write_rows()"""
+    return {table: [] for table, _, _ in INSERTS}
+
+
+def stage_price(staged, price_set_id, price_cents, region_id=REGION_ID):
+    """Stage a USD price and its region rule under an existing price set"""
+    price_id = generate_id('price_')
+    staged['price'].append((price_id, price_set_id, price_cents, raw_amount(price_cents)))
+    staged['price_rule'].append((generate_id('prule_'), region_id, price_id))
+
+
+def stage_pricing(staged, variant_id, price_cents, region_id=REGION_ID):
+    """Stage a price set linked to an existing variant, with its price and rule"""
+    price_set_id = generate_id('pset_')
+    staged['price_set'].append((price_set_id,))
+    staged['product_variant_price_set'].append((generate_id('pvps_'), variant_id, price_set_id))
+    stage_price(staged, price_set_id, price_cents, region_id)
+
+
+def stage_variant(staged, product_id, size, sku, price_cents, region_id=REGION_ID):
+    """Stage a new variant with its full pricing graph"""
+    variant_id = generate_id('variant_')
+    staged['product_variant'].append((variant_id, product_id, size, sku))
+    stage_pricing(staged, variant_id, price_cents, region_id)
+
+
+def stage_rows(products, sizes=ALL_SUIT_SIZES, region_id=REGION_ID):
+    """Stage rows for every table; products are (product_id, sku_base, price_cents) tuples"""
+    staged = new_staging()
+    for product_id, sku_base, price_cents in products:
+        for size in sizes:
+            stage_variant(staged, product_id, size, f"{sku_base}-{size}", price_cents, region_id)
+    return staged
+
+
+def write_rows(cursor, staged, page_size=5000):
+    """Write staged rows table by table; return rows written per table"""
+    counts = {}
+    for table, sql, template in INSERTS:
+        rows = staged.get(table, [])
+        if rows:
+            execute_values(cursor, sql, rows, template=template, page_size=page_size)
+        counts[table] = len(rows)
+    return counts
+
+
+def teardown_variants(cursor, product_ids):
+    """Delete every variant and its pricing for the given products; return rows deleted per table
+
+    Runs as one statement, so no id lists travel back to the client. The
+    caller owns the transaction.
+    """
+    return _teardown(cursor, 'product_id', product_ids)
+
+
+def teardown_variant_ids(cursor, variant_ids):
+    """Delete specific variants and their pricing; return rows deleted per table"""
+    return _teardown(cursor, 'id', variant_ids)
+
+
+def count_teardown(cursor, product_ids):
+    """Rows per table teardown_variants() would delete, without deleting anything"""
+    return _teardown(cursor, 'product_id', product_ids, TEARDOWN_COUNT_SQL)
+
+
+def _teardown(cursor, column, ids, sql=TEARDOWN_SQL):
+    ids = list(ids)
+    if not ids:
+        return dict.fromkeys(TEARDOWN_TABLES, 0)
+    cursor.execute(sql.format(column=column), {'ids': ids})
+    return dict(zip(TEARDOWN_TABLES, cursor.fetchone()))
+
+
+def rebuild_variants(cursor, products, sizes=ALL_SUIT_SIZES, region_id=REGION_ID, page_size=5000):
+    """Create variants with pricing for many products in one statement per table
+
+    products is an iterable of (product_id, sku_base, price_cents). Existing
+    variants are not touched; teardown_variants() removes them first. The caller
+    also owns the transaction.
+    """
+    return write_rows(cursor, stage_rows(products, sizes, region_id), page_size)
+
+
+class ReconcilePlan:
+    """The minimal set of writes that brings products to the target sizes and price"""
+
+    def __init__(self):
+        self.staged = new_staging()
+        self.delete_variant_ids = []
+        self.updates = {name: [] for name in UPDATES}
+        self.changes = {}
+
+    def note(self, product_id, action):
+        self.changes.setdefault(product_id, Counter())[action] += 1
+
+    def counts(self):
+        """Planned changes per action, across all products"""
+        total = Counter()
+        for changes in self.changes.values():
+            total.update(changes)
+        return dict(total)
+
+    def describe(self, product_id):
+        """One-line summary of the changes planned for a product"""
+        changes = self.changes.get(product_id)
+        if not changes:
+            return "no changes"
+        return ", ".join(f"{count} {action}" for action, count in sorted(changes.items()))
+
+    def __bool__(self):
+        return bool(self.changes)
+
+
+def load_variant_graph(cursor, product_ids):
+    """Return {product_id: [VariantState]} for the live variants of the given products"""
+    graph = {}
+    GRAPH_STATEMENT.execute(cursor, (list(product_ids),))
+    for row in cursor.fetchall():
+        state = VariantState(*row)
+        graph.setdefault(state.product_id, []).append(state)
+    return graph
+
+
+def plan_reconcile(graph, products, sizes=ALL_SUIT_SIZES, region_id=REGION_ID):
+    """Diff the current graph against the target; products are (product_id, sku_base, price_cents)"""
+    plan = ReconcilePlan()
+    targets = set(sizes)
+
+    for product_id, sku_base, price_cents in products:
+        by_size = {}
+        for state in graph.get(product_id, []):
+            if state.size in targets and state.size not in by_size:
+                by_size[state.size] = state
+            else:
+                # Sizes no longer sold, or a duplicate of a size already kept
+                plan.delete_variant_ids.append(state.variant_id)
+                plan.note(product_id, 'variants deleted')
+
+        for size in sizes:
+            sku = f"{sku_base}-{size}"
+            state = by_size.get(size)
+            if state is None:
+                stage_variant(plan.staged, product_id, size, sku, price_cents, region_id)
+                plan.note(product_id, 'variants created')
+                continue
+
+            if state.sku != sku:
+                plan.updates['sku'].append((state.variant_id, sku))
+                plan.note(product_id, 'SKUs updated')
+
+            if state.manage_inventory:
+                plan.updates['manage_inventory'].append((state.variant_id,))
+                plan.note(product_id, 'inventory tracking disabled')
+
+            if state.price_set_id is None:
+                stage_pricing(plan.staged, state.variant_id, price_cents, region_id)
+                plan.note(product_id, 'prices created')
+            elif state.price_id is None:
+                stage_price(plan.staged, state.price_set_id, price_cents, region_id)
+                plan.note(product_id, 'prices created')
+            else:
+                if state.amount is None or Decimal(state.amount) != Decimal(price_cents):
+                    plan.updates['price'].append((state.price_id, price_cents, raw_amount(price_cents)))
+                    plan.note(product_id, 'prices updated')
+                if state.rule_id is None:
+                    plan.staged['price_rule'].append((generate_id('prule_'), region_id, state.price_id))
+                    plan.note(product_id, 'region rules created')
+                elif state.rule_value != region_id:
+                    plan.updates['price_rule'].append((state.rule_id, region_id))
+                    plan.note(product_id, 'region rules updated')
+
+    return plan
+
+
+def apply_plan(cursor, plan, page_size=5000):
+    """Execute a ReconcilePlan; the caller owns the transaction"""
+    teardown_variant_ids(cursor, plan.delete_variant_ids)
+    write_rows(cursor, plan.staged, page_size)
+    for name, rows in plan.updates.items():
+        if rows:
+            sql, template = UPDATES[name]
+            execute_values(cursor, sql, rows, template=template, page_size=page_size)
+
+
+def reconcile_variants(cursor, products, sizes=ALL_SUIT_SIZES, region_id=REGION_ID, dry_run=False):
+    """Bring products to the target sizes and price, writing only the difference
+
+    products is a list of (product_id, sku_base, price_cents). Returns the
+    ReconcilePlan; with dry_run=True nothing is written.
+    """
+    products = list(products)
+    graph = load_variant_graph(cursor, [product_id for product_id, _, _ in products])
+    plan = plan_reconcile(graph, products, sizes, region_id)
+    if not dry_run:
+        apply_plan(cursor, plan)
+    return plan
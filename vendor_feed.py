@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Incremental reader for vendor_import_data.json.
+
+iter_colors() yields one (base_sku, color, color_data) record at a time
+without loading the file: the reader walks the outer objects key by key and
+only decodes one color's data at once, so memory stays flat however many
+products and variants the feed holds.
+
+Two layouts are read, plus gzip of either:
+
+  vendor_import_data.json    {"products": {base_sku: {"colors": {color: {...}}}}},
+                             as written by import_vendor_products.py
+  *.jsonl / *.ndjson         one {"base_sku", "color", "color_data"} object per line
+
+  python3 vendor_feed.py vendor_import_data.json               # summary
+  python3 vendor_feed.py vendor_import_data.json --jsonl out.jsonl.gz
+"""
+import argparse
+import gzip
+import json
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = ' \t\n\r'
+NUMBER_CHARS = '0123456789.eE+-'
+
+_decoder = json.JSONDecoder()
+
+
+class FeedFormatError(ValueError):
+    """Raised when the feed is not shaped like vendor_import_data.json"""
+
+
+class _Reader:
+    """Pull-parser over a text stream: object keys one at a time, values whole"""
+
+    def __init__(self, stream, chunk_size=CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size):
+        # Drop what has been consumed, then read at least size more characters
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        chunk = self.stream.read(max(size, self.chunk_size))
+        if not chunk:
+            self.eof = True
+        self.buffer += chunk
+
+    def _next_char(self):
+        """Skip whitespace; return the next character without consuming it ('' at EOF)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self._fill(self.chunk_size)
+
+    def _expect(self, char):
+        found = self._next_char()
+        if found != char:
+            raise FeedFormatError(f"expected {char!r}, found {found or 'end of file'!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self._next_char()
+        need = self.chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            else:
+                # A number cut off by the end of the buffer ("229." of "229.99")
+                # still decodes, so only trust it if something else follows
+                if self.eof or not isinstance(value, (int, float)) or (
+                        end < len(self.buffer) and self.buffer[end] not in NUMBER_CHARS):
+                    self.pos = end
+                    return value
+            self._fill(need)
+            need *= 2  # a value bigger than the buffer: grow it geometrically
+
+    def keys(self):
+        """Yield the keys of the next object; the caller must read or skip each value"""
+        self._expect('{')
+        if self._next_char() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise FeedFormatError(f"expected an object key, found {key!r}")
+            self._expect(':')
+            yield key
+            if self._next_char() == ',':
+                self.pos += 1
+                continue
+            self._expect('}')
+            return
+
+
+def open_feed(path):
+    """Open a feed file as text, gunzipping .gz"""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def is_line_delimited(path):
+    return path.removesuffix('.gz').endswith(('.jsonl', '.ndjson'))
+
+
+def iter_colors(path):
+    """Yield (base_sku, color, color_data) for every color in the feed, in file order"""
+    with open_feed(path) as stream:
+        if is_line_delimited(path):
+            for line in stream:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record['base_sku'], record['color'], record['color_data']
+            return
+
+        reader = _Reader(stream)
+        for key in reader.keys():
+            if key != 'products':
+                reader.value()
+                continue
+            for base_sku in reader.keys():
+                for field in reader.keys():
+                    if field != 'colors':
+                        reader.value()
+                        continue
+                    for color in reader.keys():
+                        yield base_sku, color, reader.value()
+
+
+def write_jsonl(path, records):
+    """Write (base_sku, color, color_data) records as line-delimited JSON; returns the count"""
+    count = 0
+    with (gzip.open(path, 'wt', encoding='utf-8') if path.endswith('.gz') else open(path, 'w', encoding='utf-8')) as out:
+        for base_sku, color, color_data in records:
+            out.write(json.dumps({'base_sku': base_sku, 'color': color, 'color_data': color_data}) + "\n")
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise or convert a vendor import feed")
+    parser.add_argument('path', nargs='?', default='vendor_import_data.json')
+    parser.add_argument('--jsonl', metavar='OUT', help="write the feed as line-delimited JSON (.gz to compress)")
+    args = parser.parse_args()
+
+    if args.jsonl:
+        count = write_jsonl(args.jsonl, iter_colors(args.path))
+        print(f"✅ Wrote {count} colors to {args.jsonl}")
+        return
+
+    skus = {}
+    for base_sku, color, color_data in iter_colors(args.path):
+        totals = skus.setdefault(base_sku, [0, 0, 0])
+        totals[0] += 1
+        totals[1] += len(color_data.get('variants', []))
+        totals[2] += color_data.get('total_stock', 0)
+    for base_sku, (colors, variants, stock) in skus.items():
+        print(f"📦 {base_sku}: {colors} colors, {variants} variants, {stock} stock")
+
+
+if __name__ == "__main__":
+    main()
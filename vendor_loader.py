@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Load vendor_import_data.json straight into Medusa, without a .sql file.
+
+Rows are streamed into temporary staging tables with COPY FROM STDIN, then
+merged into the catalog by a handful of set-based statements, all in one
+transaction:
+
+  products        new handles are inserted; live products with the same
+                  handle keep their id and get the vendor metadata merged in
+  variants        new SKUs are inserted with their price set, link and USD
+                  price; existing SKUs get their metadata (shopify_stock)
+                  refreshed. A SKU the feed lists more than once is created
+                  for its first occurrence only
+  tags            missing product_tag values are created and linked
+  images          the first five images per product, skipping known URLs
+  sales channel   every product is linked to the store's sales channel
+
+The feed is read one color at a time (vendor_feed) and staged rows are
+spooled to temporary files rather than held in lists, so the feed size
+does not set memory use. --check-images HEAD-checks the images first and
+loads only the ones that resolve (see generate_vendor_sql).
+
+Usage: python3 vendor_loader.py [--input vendor_import_data.json] [--dry-run] [--check-images]
+"""
+import argparse
+import tempfile
+import time
+from datetime import datetime
+
+import medusa_db
+from generate_vendor_sql import check_feed_images, display_size, vendor_products
+from sql_emitter import copy_field
+from variant_rebuild import generate_id, raw_amount
+from vendor_feed import iter_colors
+
+SALES_CHANNEL_ID = 'sc_01K3S6WP4KCEJX26GNPQKTHTBE'
+
+MAX_IMAGES = 5
+SPOOL_BYTES = 8 * 1024 * 1024
+
+# Staging tables in load order: name, columns, column types
+STAGING = [
+    ('stage_product', ['stage_id', 'handle', 'title', 'subtitle', 'description',
+                       'thumbnail', 'metadata', 'channel_link_id'],
+     ['text', 'text', 'text', 'text', 'text', 'text', 'jsonb', 'text']),
+    ('stage_variant', ['id', 'position', 'stage_product_id', 'title', 'sku', 'barcode', 'weight',
+                       'metadata', 'price_set_id', 'link_id', 'price_id', 'amount', 'raw_amount'],
+     ['text', 'integer', 'text', 'text', 'text', 'text', 'numeric',
+      'jsonb', 'text', 'text', 'text', 'numeric', 'jsonb']),
+    ('stage_tag', ['stage_product_id', 'value', 'tag_id'], ['text', 'text', 'text']),
+    ('stage_image', ['id', 'stage_product_id', 'url', 'rank', 'metadata'],
+     ['text', 'text', 'text', 'integer', 'jsonb']),
+]
+
+# Existing live products are matched by handle; product_id is filled in for
+# every staged product, matched or new
+RESOLVE_PRODUCTS = """
+    ALTER TABLE stage_product ADD COLUMN product_id text;
+    UPDATE stage_product s SET product_id = p.id
+    FROM product p
+    WHERE p.handle = s.handle AND p.deleted_at IS NULL
+"""
+
+# Each merge statement returns one row of counts, named by the list that follows it
+MERGES = [
+    ("""
+    WITH updated AS (
+        UPDATE product p
+        SET metadata = COALESCE(p.metadata, '{}'::jsonb) || s.metadata, updated_at = NOW()
+        FROM stage_product s
+        WHERE p.id = s.product_id
+        RETURNING p.id
+    ), inserted AS (
+        INSERT INTO product (
+            id, handle, title, subtitle, description, status,
+            thumbnail, is_giftcard, metadata, created_at, updated_at
+        )
+        SELECT stage_id, handle, title, subtitle, description, 'published',
+               thumbnail, false, metadata, NOW(), NOW()
+        FROM stage_product
+        WHERE product_id IS NULL
+        RETURNING id
+    ), resolved AS (
+        UPDATE stage_product s SET product_id = i.id
+        FROM inserted i
+        WHERE i.id = s.stage_id
+    )
+    SELECT (SELECT COUNT(*) FROM inserted), (SELECT COUNT(*) FROM updated)
+    """, ['products_inserted', 'products_updated']),
+    ("""
+    WITH refreshed AS (
+        UPDATE product_variant v
+        SET metadata = COALESCE(v.metadata, '{}'::jsonb) || s.metadata, updated_at = NOW()
+        FROM stage_variant s
+        WHERE v.sku = s.sku AND v.deleted_at IS NULL
+          AND NOT COALESCE(v.metadata, '{}'::jsonb) @> s.metadata
+        RETURNING v.id
+    ), new_variants AS (
+        INSERT INTO product_variant (
+            id, product_id, title, sku, barcode, manage_inventory,
+            allow_backorder, weight, metadata, created_at, updated_at
+        )
+        SELECT DISTINCT ON (s.sku)
+               s.id, sp.product_id, s.title, s.sku, NULLIF(s.barcode, ''), false,
+               true, s.weight, s.metadata, NOW(), NOW()
+        FROM stage_variant s
+        JOIN stage_product sp ON sp.stage_id = s.stage_product_id
+        WHERE NOT EXISTS (
+            SELECT 1 FROM product_variant v
+            WHERE v.sku = s.sku AND v.deleted_at IS NULL
+        )
+        ORDER BY s.sku, s.position
+        RETURNING id
+    ), price_sets AS (
+        INSERT INTO price_set (id, created_at, updated_at)
+        SELECT s.price_set_id, NOW(), NOW()
+        FROM stage_variant s JOIN new_variants n ON n.id = s.id
+        RETURNING id
+    ), links AS (
+        INSERT INTO product_variant_price_set (id, variant_id, price_set_id, created_at, updated_at)
+        SELECT s.link_id, s.id, s.price_set_id, NOW(), NOW()
+        FROM stage_variant s JOIN new_variants n ON n.id = s.id
+        RETURNING id
+    ), prices AS (
+        INSERT INTO price (
+            id, price_set_id, currency_code, amount, raw_amount,
+            min_quantity, max_quantity, created_at, updated_at
+        )
+        SELECT s.price_id, s.price_set_id, 'usd', s.amount, s.raw_amount, 1, NULL, NOW(), NOW()
+        FROM stage_variant s JOIN new_variants n ON n.id = s.id
+        RETURNING id
+    )
+    SELECT (SELECT COUNT(*) FROM new_variants), (SELECT COUNT(*) FROM refreshed),
+           (SELECT COUNT(*) - COUNT(DISTINCT sku) FROM stage_variant),
+           (SELECT COUNT(*) FROM price_sets), (SELECT COUNT(*) FROM links),
+           (SELECT COUNT(*) FROM prices)
+    """, ['variants_inserted', 'variants_refreshed', 'duplicate_skus_skipped',
+          'price_sets', 'price_links', 'prices']),
+    ("""
+    WITH wanted AS (
+        SELECT DISTINCT ON (value) value, tag_id FROM stage_tag ORDER BY value, tag_id
+    ), new_tags AS (
+        INSERT INTO product_tag (id, value, created_at, updated_at)
+        SELECT w.tag_id, w.value, NOW(), NOW()
+        FROM wanted w
+        WHERE NOT EXISTS (
+            SELECT 1 FROM product_tag t WHERE t.value = w.value AND t.deleted_at IS NULL
+        )
+        RETURNING id, value
+    ), tags AS (
+        SELECT id, value FROM new_tags
+        UNION ALL
+        SELECT t.id, t.value FROM product_tag t
+        JOIN wanted w ON w.value = t.value
+        WHERE t.deleted_at IS NULL
+    ), linked AS (
+        INSERT INTO product_tags (product_id, product_tag_id)
+        SELECT DISTINCT sp.product_id, t.id
+        FROM stage_tag st
+        JOIN stage_product sp ON sp.stage_id = st.stage_product_id
+        JOIN tags t ON t.value = st.value
+        WHERE NOT EXISTS (
+            SELECT 1 FROM product_tags pt
+            WHERE pt.product_id = sp.product_id AND pt.product_tag_id = t.id
+        )
+        RETURNING 1
+    )
+    SELECT (SELECT COUNT(*) FROM new_tags), (SELECT COUNT(*) FROM linked)
+    """, ['tags_created', 'tags_linked']),
+    ("""
+    WITH inserted AS (
+        INSERT INTO image (id, url, rank, product_id, metadata, created_at, updated_at)
+        SELECT si.id, si.url, si.rank, sp.product_id, si.metadata, NOW(), NOW()
+        FROM stage_image si
+        JOIN stage_product sp ON sp.stage_id = si.stage_product_id
+        WHERE NOT EXISTS (
+            SELECT 1 FROM image i
+            WHERE i.product_id = sp.product_id AND i.url = si.url AND i.deleted_at IS NULL
+        )
+        RETURNING 1
+    )
+    SELECT COUNT(*) FROM inserted
+    """, ['images']),
+    ("""
+    WITH linked AS (
+        INSERT INTO product_sales_channel (id, product_id, sales_channel_id, created_at, updated_at)
+        SELECT s.channel_link_id, s.product_id, %(sales_channel_id)s, NOW(), NOW()
+        FROM stage_product s
+        WHERE NOT EXISTS (
+            SELECT 1 FROM product_sales_channel psc
+            WHERE psc.product_id = s.product_id AND psc.sales_channel_id = %(sales_channel_id)s
+        )
+        RETURNING 1
+    )
+    SELECT COUNT(*) FROM linked
+    """, ['sales_channel_links']),
+]
+
+
+def stage_products(products, import_date):
+    """Spool staging rows for every (base_sku, color, product_data); returns {table: file}"""
+    files = {table: tempfile.SpooledTemporaryFile(SPOOL_BYTES) for table, _, _ in STAGING}
+    tag_ids = {}
+    position = 0
+
+    def write(table, *row):
+        files[table].write(("\t".join(copy_field(value) for value in row) + "\n").encode('utf-8'))
+
+    for base_sku, color, product_data in products:
+        stage_id = generate_id('prod_')
+        vendor = product_data['vendor']
+        images = product_data['images']
+        amount = int(product_data['retail_price'] * 100)
+        metadata = {"vendor": vendor, "base_sku": base_sku, "color": color,
+                    "source": "shopify_vendor", "import_date": import_date}
+        thumbnail = images[0] if images else 'https://placehold.co/600x800?text=' + color.replace(' ', '+')
+        write('stage_product', stage_id, product_data['handle'], product_data['title'],
+              f"{base_sku} - {color}", product_data['description'], thumbnail, metadata,
+              generate_id('prodsc_'))
+
+        for variant in product_data['variants']:
+            size = display_size(variant['size'])
+            position += 1
+            write('stage_variant', generate_id('variant_'), position, stage_id, size, variant['sku'],
+                  variant.get('barcode', ''), variant.get('weight', 1800),
+                  {"size": size, "color": color, "shopify_stock": variant['inventory']},
+                  generate_id('pset_'), generate_id('pvps_'), generate_id('price_'),
+                  amount, raw_amount(amount))
+
+        for tag in (color.lower(), 'suit', 'formal wear', 'wedding', 'prom', vendor.lower(), base_sku.lower()):
+            if tag not in tag_ids:
+                tag_ids[tag] = generate_id('ptag_')
+            write('stage_tag', stage_id, tag, tag_ids[tag])
+
+        for rank, url in enumerate(images[:MAX_IMAGES]):
+            write('stage_image', generate_id('img_'), stage_id, url, rank, {"color": color})
+
+    for spool in files.values():
+        spool.seek(0)
+    return files
+
+
+def copy_staging(cursor, files):
+    """Create the staging tables and COPY the spooled rows in; returns rows per table"""
+    # The spooled rows are UTF-8 bytes whatever the session's encoding is
+    cursor.execute("SET LOCAL client_encoding = 'UTF8'")
+    counts = {}
+    for table, columns, types in STAGING:
+        definition = ', '.join(f"{column} {kind}" for column, kind in zip(columns, types))
+        cursor.execute(f"CREATE TEMP TABLE {table} ({definition}) ON COMMIT DROP")
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", files[table])
+        counts[table] = cursor.rowcount
+        cursor.execute(f"ANALYZE {table}")  # temp tables are never auto-analyzed
+    return counts
+
+
+def merge_staging(cursor, sales_channel_id=SALES_CHANNEL_ID):
+    """Merge the staging tables into the catalog; returns {count name: rows}"""
+    cursor.execute(RESOLVE_PRODUCTS)
+    counts = {}
+    for sql, names in MERGES:
+        cursor.execute(sql, {'sales_channel_id': sales_channel_id})
+        counts.update(zip(names, cursor.fetchone()))
+    return counts
+
+
+def load_vendor_products(conn, products, sales_channel_id=SALES_CHANNEL_ID, dry_run=False):
+    """Stage and merge products in one transaction; returns (staged, merged) counts
+
+    With dry_run the transaction is rolled back after the merge, so the
+    counts show what a real run would write.
+    """
+    files = stage_products(products, datetime.now().isoformat())
+    try:
+        with conn.cursor() as cursor:
+            staged = copy_staging(cursor, files)
+            merged = merge_staging(cursor, sales_channel_id)
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        for spool in files.values():
+            spool.close()
+    return staged, merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load vendor products into Medusa with COPY")
+    parser.add_argument('--input', default='vendor_import_data.json', help="vendor import JSON")
+    parser.add_argument('--sales-channel', default=SALES_CHANNEL_ID, help="sales channel id to link products to")
+    parser.add_argument('--dry-run', action='store_true', help="merge, report, then roll back")
+    parser.add_argument('--check-images', action='store_true', help="HEAD-check image URLs and skip broken ones")
+    args = parser.parse_args()
+
+    print("📥 Loading vendor products")
+    print("=" * 70)
+
+    image_checks = check_feed_images(args.input) if args.check_images else None
+
+    start = time.perf_counter()
+    conn = medusa_db.connect()
+    try:
+        staged, merged = load_vendor_products(conn, vendor_products(iter_colors(args.input), image_checks),
+                                              args.sales_channel, args.dry_run)
+    finally:
+        medusa_db.release(conn)
+    seconds = time.perf_counter() - start
+
+    print(f"\n📊 Staged rows:")
+    for table, count in staged.items():
+        print(f"   • {table}: {count}")
+    print(f"\n{'🧪 Dry run (rolled back)' if args.dry_run else '✅ Merged'} in {seconds:.2f}s:")
+    for name, count in merged.items():
+        print(f"   • {name}: {count}")
+
+
+if __name__ == "__main__":
+    main()